@@ -0,0 +1,182 @@
+#配置备份模块：并发采集各设备组运行配置（华为display current-configuration / 思科show running-config），
+#写入按内容去重的备份存储，配置未变化的设备只比对哈希，不重复存储
+
+import os
+import sys
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import DEVICES, SETTINGS
+from configure.config_diff import RUNNING_COMMANDS, vendor_of
+from connect.netmiko_connect import connect_device
+from connect.session_pool import SESSION_POOL, POOL_ENABLED
+from connect.preflight import preflight, PREFLIGHT_ENABLED
+from backup.config_store import CONFIG_STORE
+from log.log_record import get_logger, log_context
+
+logger = get_logger(__name__, "backup.log")
+
+BACKUP_SETTINGS = SETTINGS.get("backup", {}) or {}
+# 最大并发采集数、读取运行配置超时（秒）
+MAX_WORKERS = BACKUP_SETTINGS.get("max_workers", 20)
+READ_TIMEOUT = BACKUP_SETTINGS.get("read_timeout", 120)
+
+
+def fetch_running_config(device_conn, device_info):
+    """读取设备运行配置"""
+    vendor = vendor_of(device_info.get("device_type"))
+    return device_conn.send_command(RUNNING_COMMANDS[vendor], read_timeout=READ_TIMEOUT)
+
+
+def backup_one(device_info, group_name=None, backup_time=None, store=CONFIG_STORE):
+    """
+    备份单台设备运行配置，会话池开启时借用池内连接
+    :return: (device_name, 备份结果 {"status", "hash", "changed", "size", "elapsed"} 或 {"status", "reason"})
+    """
+    device_name = device_info.get("device_name", device_info["ip"])
+    start = time.perf_counter()
+    try:
+        if POOL_ENABLED:
+            with SESSION_POOL.session(device_info) as conn:
+                if not conn:
+                    return device_name, {"status": "备份失败", "reason": "设备未连接"}
+                config = fetch_running_config(conn, device_info)
+        else:
+            conn = connect_device(device_info)
+            if not conn:
+                return device_name, {"status": "备份失败", "reason": "设备未连接"}
+            try:
+                config = fetch_running_config(conn, device_info)
+            finally:
+                try:
+                    conn.disconnect()
+                except Exception:
+                    pass
+        if not config.strip():
+            raise ValueError("运行配置回显为空")
+        entry = store.save(device_name, config, group_name, backup_time)
+        entry.update(status="备份成功", elapsed=round(time.perf_counter() - start, 3))
+        logger.info(f"设备 {device_name} 配置备份完成：{'配置已变化，新版本' if entry['changed'] else '配置未变化'} "
+                    f"{entry['hash'][:12]}，耗时{entry['elapsed']}s")
+        return device_name, entry
+    except Exception as e:
+        logger.error(f"设备 {device_name} 配置备份失败：{str(e)}")
+        return device_name, {"status": "备份失败", "reason": str(e)}
+
+
+def backup_devices(devices, on_result=None, max_workers=None, store=CONFIG_STORE):
+    """
+    并发备份设备列表
+    :param devices: [(设备组名, 设备信息), ...]
+    :param on_result: 单设备备份完成回调 on_result(device_name, entry)
+    :param max_workers: 最大并发数，默认读取settings.yaml
+    :return: {device_name: 备份结果}，按设备清单顺序
+    """
+    results = {}
+
+    def _collect(device_name, entry):
+        results[device_name] = entry
+        if on_result:
+            try:
+                on_result(device_name, entry)
+            except Exception as e:
+                logger.error(f"设备 {device_name} 备份结果回调失败：{str(e)}")
+
+    backup_time = time.strftime("%Y-%m-%d %H:%M:%S")
+    groups = {id(device): group_name for group_name, device in devices}
+    targets = [device for _, device in devices]
+    # 连接预检：离线设备不再等待SSH连接超时
+    if PREFLIGHT_ENABLED:
+        targets, offline = preflight(targets)
+        for device_name, reason in offline.items():
+            _collect(device_name, {"status": "备份失败", "reason": f"设备离线（{reason}）", "offline": True})
+
+    if targets:
+        max_workers = max(1, min(int(max_workers or MAX_WORKERS), len(targets)))
+
+        def _worker(device):
+            group_name = groups.get(id(device))
+            with log_context(device=device.get("device_name", device["ip"]), group=group_name):
+                return backup_one(device, group_name, backup_time, store)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backup") as executor:
+            # 复制日志上下文（任务ID）到备份线程
+            futures = [executor.submit(contextvars.copy_context().run, _worker, device) for device in targets]
+            for future in as_completed(futures):
+                _collect(*future.result())
+    # 本次备份的最近备份时间统一写盘
+    store.flush()
+    order = [device.get("device_name", device["ip"]) for _, device in devices]
+    return {name: results[name] for name in order if name in results}
+
+
+def backup_targets(group_names=None):
+    """
+    待备份设备：按设备组展开，同一设备出现在多个组时只备份一次
+    :param group_names: 设备组名列表，为空时备份全部设备组
+    :return: [(设备组名, 设备信息), ...]
+    """
+    group_names = group_names or list(DEVICES.keys())
+    missing = [name for name in group_names if name not in DEVICES]
+    if missing:
+        raise KeyError(f"设备组 {','.join(missing)} 不存在！可用组名：{list(DEVICES.keys())}")
+    targets, seen = [], set()
+    for group_name in group_names:
+        for device in DEVICES.get(group_name) or []:
+            device_name = device.get("device_name", device["ip"])
+            if device_name not in seen:
+                seen.add(device_name)
+                targets.append((group_name, device))
+    return targets
+
+
+def batch_backup(group_names=None, on_result=None, max_workers=None):
+    """
+    配置备份核心函数：所有设备组的设备统一并发采集
+    :param group_names: 设备组名列表（或单个组名），为空时备份全部设备组
+    :param on_result: 单设备备份完成回调 on_result(device_name, entry)
+    :param max_workers: 最大并发数，默认读取settings.yaml
+    :return: 备份结果字典 {"total", "success", "changed", "unchanged", "failed", "elapsed", "devices", "error"}
+    """
+    if isinstance(group_names, str):
+        group_names = [group_names]
+    result = {"total": 0, "success": 0, "changed": [], "unchanged": [], "failed": [], "elapsed": 0,
+              "devices": {}, "error": ""}
+    try:
+        targets = backup_targets(group_names)
+    except KeyError as e:
+        result["error"] = str(e.args[0])
+        logger.error(result["error"])
+        return result
+    if not targets:
+        result["error"] = "无可备份的设备"
+        logger.error(result["error"])
+        return result
+
+    start = time.perf_counter()
+    logger.info(f"开始配置备份，设备组：{group_names or '全部'}，共 {len(targets)} 台设备")
+    result["total"] = len(targets)
+    result["devices"] = backup_devices(targets, on_result=on_result, max_workers=max_workers)
+    for device_name, entry in result["devices"].items():
+        if entry["status"] != "备份成功":
+            result["failed"].append(device_name)
+            continue
+        result["success"] += 1
+        result["changed" if entry["changed"] else "unchanged"].append(device_name)
+    result["elapsed"] = round(time.perf_counter() - start, 3)
+    logger.info(f"配置备份完成 - 总设备数：{result['total']}，成功：{result['success']}"
+                f"（配置变化：{len(result['changed'])}，未变化：{len(result['unchanged'])}），"
+                f"失败：{len(result['failed'])}，耗时{result['elapsed']}s")
+    if result["failed"]:
+        logger.warning(f"备份失败设备列表：{','.join(result['failed'])}")
+    return result
+
+
+if __name__ == "__main__":
+    test_result = batch_backup()
+    print(f"总设备数：{test_result['total']}，成功：{test_result['success']}，"
+          f"配置变化：{test_result['changed']}，失败：{test_result['failed']}")
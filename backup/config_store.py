@@ -0,0 +1,287 @@
+#配置备份存储模块：运行配置按内容寻址（sha256）zlib压缩存储，内容相同的配置只存一份；
+#每台设备一个历史索引（jsonl，只在配置变化时追加），heads.json记录各设备当前版本，配置未变化的设备备份时只比对哈希
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import hashlib
+import difflib
+import threading
+
+try:
+    import fcntl  # 跨进程文件锁（仅类Unix系统）
+except ImportError:
+    fcntl = None
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import SETTINGS
+
+BACKUP_SETTINGS = SETTINGS.get("backup", {}) or {}
+STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         BACKUP_SETTINGS.get("store_dir", "backup/config_store"))
+HEADS_FILE = "heads.json"
+# 每次回显都会变化、不属于配置内容的行（时间戳、配置长度等），不参与哈希与存储
+VOLATILE_LINES = re.compile(
+    r"^\s*(Building configuration|Current configuration\s*:|! ?Last configuration change|"
+    r"! ?NVRAM config last updated|! ?No configuration change since|!Last configuration was updated|"
+    r"!Time:|ntp clock-period)", re.IGNORECASE)
+
+
+def normalize_config(text):
+    """去除易变行与行尾空白，统一换行符"""
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    lines = [line for line in lines if not VOLATILE_LINES.match(line)]
+    return "\n".join(lines).strip("\n") + "\n"
+
+# 口令、密钥、团体名等敏感值：关键字后（可选的加密类型数字）的一个参数，
+# 如 local-user admin password irreversible-cipher xxx、enable secret 5 xxx、snmp-server community xxx RO
+SECRET_VALUES = re.compile(
+    r"(?<![\w-])((?:password|secret|cipher|irreversible-cipher|key-string|pre-shared-key|authentication-key|"
+    r"community|md5|key)[ \t]+(?:\d[ \t]+)?)"
+    r"(?!(?:cipher|irreversible-cipher|simple|plain|hash|secret|password|generate|chain|config-key)\b)(\S+)",
+    re.IGNORECASE)
+SECRET_MASK = "******"
+
+
+def mask_secrets(text):
+    """屏蔽配置中的口令、密钥、SNMP团体名（Web查看备份配置时使用）"""
+    return SECRET_VALUES.sub(lambda m: m.group(1) + SECRET_MASK, text)
+
+
+def config_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _safe_name(device_name):
+    """设备名转为历史索引文件名"""
+    return re.sub(r"[^\w.\-]", "_", device_name)
+
+
+class ConfigStore:
+    """
+    运行配置备份存储
+    - objects/ab/cdef...：配置内容（zlib压缩），文件名为内容的sha256，已存在则不再写入
+    - history/<设备名>.jsonl：设备配置变化历史 {"time", "hash", "size", "lines", "group"}，
+      最后一行即设备当前版本，备份时在文件锁内与之比对并追加（CLI、定时任务、Web多进程同时备份也不会错乱）
+    - heads.json：{设备名: {"hash", "time"（当前版本首次出现时间）, "checked"（最近一次备份时间）, "group"}}，
+      设备列表查询用的汇总，每次批量备份结束写一次，文件变化时各进程自动重新读取
+    """
+
+    def __init__(self, store_dir=STORE_DIR, compress_level=6):
+        self.store_dir = store_dir
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._heads = {}
+        self._heads_key = None    # 已读取的heads.json (修改时间, 大小)
+        self._dirty = {}          # 本进程更新、尚未写盘的设备 {设备名: head}
+
+    def _path(self, *parts):
+        return os.path.join(self.store_dir, *parts)
+
+    # ---------- 对象 ----------
+    def _object_path(self, digest):
+        return self._path("objects", digest[:2], digest[2:])
+
+    def has_object(self, digest):
+        return os.path.exists(self._object_path(digest))
+
+    def put_object(self, text):
+        """
+        写入配置内容
+        :return: (哈希, 是否新写入)
+        """
+        digest = config_hash(text)
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(text.encode("utf-8"), self.compress_level))
+        os.replace(tmp_path, path)
+        return digest, True
+
+    def get_object(self, digest):
+        """读取配置内容，对象不存在时返回None"""
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    # ---------- 当前版本汇总 ----------
+    def _read_heads(self):
+        path = self._path(HEADS_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _refresh_heads(self):
+        """heads.json被其他进程更新时重新读取（调用方持有锁）"""
+        try:
+            stat = os.stat(self._path(HEADS_FILE))
+            key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            key = None
+        if key != self._heads_key:
+            self._heads = self._read_heads() if key else {}
+            self._heads_key = key
+        return self._heads
+
+    @staticmethod
+    def _newer(head, other):
+        """按最近备份时间取较新的汇总记录"""
+        if not other:
+            return head
+        return head if (head.get("checked") or "") >= (other.get("checked") or "") else other
+
+    def flush(self):
+        """heads.json写盘：在文件锁内与磁盘上的最新内容合并，同一设备保留最近一次备份的记录"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.store_dir, exist_ok=True)
+            with open(self._path(f"{HEADS_FILE}.lock"), "a") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    merged = dict(self._refresh_heads())
+                    for device_name, head in self._dirty.items():
+                        merged[device_name] = self._newer(head, merged.get(device_name))
+                    tmp_path = self._path(f"{HEADS_FILE}.{os.getpid()}.tmp")
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(merged, f, ensure_ascii=False)
+                    os.replace(tmp_path, self._path(HEADS_FILE))
+                    self._heads_key = None
+                    self._refresh_heads()
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+            self._dirty.clear()
+
+    def heads(self, group_name=None):
+        """各设备当前备份版本（含本进程尚未写盘的更新），可按设备组筛选"""
+        with self._lock:
+            heads = {name: dict(head) for name, head in self._refresh_heads().items()}
+            for device_name, head in self._dirty.items():
+                heads[device_name] = dict(self._newer(head, heads.get(device_name)))
+        if group_name:
+            heads = {name: head for name, head in heads.items() if head.get("group") == group_name}
+        return heads
+
+    # ---------- 历史 ----------
+    def _history_path(self, device_name):
+        return self._path("history", f"{_safe_name(device_name)}.jsonl")
+
+    @staticmethod
+    def _last_entry(f):
+        """读取历史文件最后一条记录"""
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        block = 4096
+        while True:
+            f.seek(max(0, size - block))
+            lines = f.read().splitlines()
+            # 块起点落在行中间时第一行不完整，继续向前扩大读取范围
+            if len(lines) > 1 or block >= size:
+                break
+            block *= 4
+        for line in reversed(lines):
+            if line.strip():
+                return json.loads(line)
+        return None
+
+    def history(self, device_name):
+        """
+        设备配置变化历史，按时间倒序
+        :return: [{"time", "hash", "size", "lines", "group"}, ...]
+        """
+        path = self._history_path(device_name)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        return entries[::-1]
+
+    def save(self, device_name, config, group_name=None, backup_time=None):
+        """
+        保存一次备份：在设备历史文件锁内与最后一条记录比对，配置变化才写入对象并追加历史
+        :param config: 设备运行配置回显
+        :return: {"hash", "changed", "size"}
+        """
+        backup_time = backup_time or time.strftime("%Y-%m-%d %H:%M:%S")
+        text = normalize_config(config)
+        digest = config_hash(text)
+        os.makedirs(self._path("history"), exist_ok=True)
+        with open(self._history_path(device_name), "a+b") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                last = self._last_entry(f)
+                changed = not last or last["hash"] != digest
+                if changed:
+                    # 配置回退到历史版本时对象已存在，只追加历史
+                    self.put_object(text)
+                    last = {"time": backup_time, "hash": digest, "size": len(text),
+                            "lines": text.count("\n"), "group": group_name}
+                    f.write((json.dumps(last, ensure_ascii=False) + "\n").encode("utf-8"))
+                    f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        with self._lock:
+            self._dirty[device_name] = {"hash": digest, "time": last["time"], "checked": backup_time,
+                                        "group": group_name}
+        return {"hash": digest, "changed": changed, "size": len(text)}
+
+    def resolve(self, device_name, version=None):
+        """
+        解析设备的配置版本
+        :param version: 哈希（可为前缀）或历史序号（0为最新，1为上一版本...），为空时取最新
+        :return: 完整哈希，不存在时返回None
+        """
+        history = self.history(device_name)
+        if not history:
+            return None
+        if version is None or version == "":
+            return history[0]["hash"]
+        version = str(version)
+        if version.isdigit() and len(version) < 8:
+            index = int(version)
+            return history[index]["hash"] if index < len(history) else None
+        matches = {entry["hash"] for entry in history if entry["hash"].startswith(version)}
+        return matches.pop() if len(matches) == 1 else None
+
+    def read(self, device_name, version=None):
+        """读取设备某个版本的配置，不存在时返回None"""
+        digest = self.resolve(device_name, version)
+        return self.get_object(digest) if digest else None
+
+    def diff(self, device_name, old=1, new=0, context=3, mask=False):
+        """
+        对比设备两个配置版本
+        :param old: 旧版本（哈希前缀或历史序号），默认上一版本
+        :param new: 新版本，默认最新
+        :param mask: 是否屏蔽口令等敏感值（只有敏感值变化的行不再出现在diff中）
+        :return: unified diff文本，版本不存在时抛出KeyError
+        """
+        old_hash, new_hash = self.resolve(device_name, old), self.resolve(device_name, new)
+        if not old_hash or not new_hash:
+            raise KeyError(f"设备 {device_name} 不存在配置版本 {old if not old_hash else new}")
+        old_text, new_text = self.get_object(old_hash), self.get_object(new_hash)
+        if mask:
+            old_text, new_text = mask_secrets(old_text), mask_secrets(new_text)
+        return "".join(difflib.unified_diff(
+            old_text.splitlines(keepends=True),
+            new_text.splitlines(keepends=True),
+            fromfile=f"{device_name}@{old_hash[:12]}", tofile=f"{device_name}@{new_hash[:12]}", n=context))
+
+
+# 全局存储实例
+CONFIG_STORE = ConfigStore()
@@ -0,0 +1,177 @@
+#仿真设备农场基准：在10/100/1000台仿真设备上测量批量连接、巡检、配置下发、配置备份吞吐，输出JSON Lines便于回归对比
+#用法：python benchmark/bench_farm.py [--sizes 10,100,1000] [--scenarios connect,inspect,config,backup]
+#      [--latency 0.05] [--jitter 0.02] [--timeout-rate 0] [--auth-fail-rate 0] [--vendor mix] [--output 结果文件]
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.fake_device import DeviceFarm
+from connect.netmiko_connect import connect_devices, CONNECT_LATENCY
+from connect.session_pool import SESSION_POOL, POOL_ENABLED
+from inspect_module.batch_inspect import inspect_devices, ENGINE, COLLECT_MODE, MAX_WORKERS
+from configure.batch_configuration import rollout, ROLLOUT_SETTINGS
+from backup.config_backup import backup_devices
+from backup.config_store import ConfigStore
+from log.metrics import DEVICE_LAST_SECONDS
+
+# 配置下发场景使用的命令
+CONFIG_CMDS = {"huawei_vrpv8": ["vlan 3999", "description bench"],
+               "cisco_ios": ["vlan 3999", "name bench"]}
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+
+def _raise_fd_limit():
+    """1000台设备需要上千个监听socket，尽量调高文件描述符上限"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def bench_connect(devices):
+    """批量连接后全部断开"""
+    start = time.perf_counter()
+    conns = connect_devices(devices)
+    elapsed = time.perf_counter() - start
+    for conn in conns.values():
+        try:
+            conn.disconnect()
+        except Exception:
+            pass
+    latencies = [CONNECT_LATENCY[d["device_name"]] for d in devices if d["device_name"] in CONNECT_LATENCY]
+    return elapsed, len(conns), latencies
+
+
+def bench_inspect(devices):
+    """按settings.yaml的引擎/会话池配置巡检全部设备（不保存报告）"""
+    start = time.perf_counter()
+    report = inspect_devices(devices)
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for entry in report.values() if entry.get("status") == "巡检成功")
+    names = {d["device_name"] for d in devices}
+    latencies = [value for (device, _), value in DEVICE_LAST_SECONDS.samples().items() if device in names]
+    return elapsed, ok, latencies
+
+
+def bench_config(devices):
+    """并发下发配置（关闭金丝雀与失败中止，测量全量吞吐）"""
+    result = {"success": 0, "failed": [], "timings": {}, "skipped": [], "aborted": False, "error": ""}
+    start = time.perf_counter()
+    for device_type, cmds in CONFIG_CMDS.items():
+        group = [d for d in devices if d["device_type"] == device_type]
+        if group:
+            rollout(group, cmds, result, canary=False, max_failures=0)
+    elapsed = time.perf_counter() - start
+    return elapsed, result["success"], list(result["timings"].values())
+
+
+def bench_backup(devices):
+    """连续两次备份到临时存储，测量第二次（配置未变化，只比对哈希）的耗时"""
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = ConfigStore(store_dir)
+        targets = [("bench", d) for d in devices]
+        backup_devices(targets, store=store)
+        start = time.perf_counter()
+        results = backup_devices(targets, store=store)
+        elapsed = time.perf_counter() - start
+    ok = sum(1 for entry in results.values() if entry["status"] == "备份成功")
+    return elapsed, ok, [entry["elapsed"] for entry in results.values() if "elapsed" in entry]
+
+
+SCENARIOS = {"connect": bench_connect, "inspect": bench_inspect, "config": bench_config, "backup": bench_backup}
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(sizes, scenarios, latency, jitter, timeout_rate, auth_fail_rate, vendor="mix", seed=0):
+    """
+    执行基准场景，每个场景/规模完成即产出一条结果（生成器）
+    :return: 结果行字典的生成器
+    """
+    _raise_fd_limit()
+    common = {
+        "git_rev": _git_rev(),
+        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "engine": ENGINE,
+        "collect_mode": COLLECT_MODE,
+        "session_pool": POOL_ENABLED,
+        "inspect_workers": MAX_WORKERS,
+        "config_workers": ROLLOUT_SETTINGS["max_workers"],
+        "latency": latency,
+        "jitter": jitter,
+        "timeout_rate": timeout_rate,
+        "auth_fail_rate": auth_fail_rate,
+        "vendor": vendor,
+    }
+    for size in sizes:
+        with DeviceFarm(size, vendor, latency, jitter, timeout_rate, auth_fail_rate, seed) as farm:
+            devices = farm.device_list()
+            for name in scenarios:
+                # 每个场景从冷启动开始，避免上一场景的池内会话影响结果
+                SESSION_POOL.close_all()
+                elapsed, ok, latencies = SCENARIOS[name](devices)
+                SESSION_POOL.close_all()
+                row = dict(common, scenario=name, devices=size, ok=ok, failed=size - ok,
+                           elapsed_s=round(elapsed, 3),
+                           devices_per_sec=round(size / elapsed, 2) if elapsed else None,
+                           p50_s=percentile(latencies, 0.5), p95_s=percentile(latencies, 0.95),
+                           max_s=percentile(latencies, 1.0))
+                yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="仿真设备农场基准")
+    parser.add_argument("--sizes", default="10,100,1000", help="设备规模，逗号分隔")
+    parser.add_argument("--scenarios", default="connect,inspect,config", help=f"场景：{','.join(SCENARIOS)}")
+    parser.add_argument("--latency", type=float, default=0.05, help="命令/握手基础时延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="时延抖动（秒）")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="无响应设备比例")
+    parser.add_argument("--auth-fail-rate", type=float, default=0.0, help="认证失败设备比例")
+    parser.add_argument("--vendor", default="mix", choices=["mix", "huawei", "cisco"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="结果追加写入的JSON Lines文件")
+    args = parser.parse_args()
+
+    # 仿真设备与客户端的paramiko日志过多，只保留错误
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景：{unknown}")
+
+    for row in run(sizes, scenarios, args.latency, args.jitter, args.timeout_rate, args.auth_fail_rate,
+                   args.vendor, args.seed):
+        line = json.dumps(row, ensure_ascii=False)
+        print(line)
+        if args.output:
+            with open(args.output, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
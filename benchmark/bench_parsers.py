@@ -0,0 +1,89 @@
+#解析器微基准：对比原逐行split解析与解析器注册表在大回显上的吞吐
+#用法：python benchmark/bench_parsers.py [接口数] [重复次数]
+
+import os
+import sys
+import json
+import time
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inspect_module.parsers import parse
+
+
+def make_interface_output(count):
+    """生成华为display interface brief回显（约1/10接口down）"""
+    lines = ["Interface                   PHY   Protocol  InUti OutUti   inErrors  outErrors"]
+    for i in range(count):
+        status = "down" if i % 10 == 0 else "up"
+        lines.append(f"GigabitEthernet{i // 48}/0/{i % 48 + 1:<10} {status:<5} {status:<9} 0.01%  0.01%          0          0")
+    return "\n".join(lines)
+
+
+def make_vlan_output(count):
+    """生成华为display vlan brief回显"""
+    lines = ["VID  Name                             Status  Ports", "-" * 60]
+    lines += [f"{i:<4} VLAN{i:04d}                         enable  GE0/0/{i % 48 + 1}" for i in range(1, count + 1)]
+    return "\n".join(lines)
+
+
+def legacy_interface(output):
+    """原逐行split解析（对照组）"""
+    result = []
+    for line in output.strip().split("\n")[1:]:
+        if not line.strip():
+            continue
+        parts = line.split()
+        if len(parts) < 3:
+            continue
+        if parts[1].lower() != "up" or parts[2].lower() != "up":
+            result.append({"interface": parts[0], "physical_status": parts[1], "protocol_status": parts[2]})
+    return result
+
+
+def legacy_vlan(output):
+    """原逐行split解析（对照组）"""
+    result = []
+    for line in output.strip().split("\n")[1:]:
+        if not line.strip() or "----" in line:
+            continue
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        result.append({"vlan_id": parts[0], "vlan_name": parts[1]})
+    return result
+
+
+def bench(func, output, repeat):
+    """返回 (每秒解析行数, 单次耗时ms)"""
+    func(output)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(output)
+    elapsed = (time.perf_counter() - start) / repeat
+    return round(output.count("\n") / elapsed), round(elapsed * 1000, 3)
+
+
+def run(count=5000, repeat=50):
+    cases = {
+        "interface_status": (make_interface_output(count), legacy_interface),
+        "vlan_status": (make_vlan_output(count), legacy_vlan),
+    }
+    results = []
+    for item, (output, legacy) in cases.items():
+        registry = lambda text, item=item: parse("huawei_vrpv8", item, text)
+        # 两种解析结果必须一致
+        assert [r._asdict() for r in registry(output)] == legacy(output), f"{item} 解析结果不一致"
+        for name, func in (("legacy_split", legacy), ("registry", registry)):
+            lines_per_sec, ms = bench(func, output, repeat)
+            results.append({"item": item, "parser": name, "rows": count,
+                            "lines_per_sec": lines_per_sec, "ms_per_parse": ms})
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for row in run(count, repeat):
+        print(json.dumps(row, ensure_ascii=False))
@@ -0,0 +1,322 @@
+#仿真设备农场：本地批量启动华为VRP/思科IOS仿真SSH设备，回放采集的命令回显，可注入时延、抖动、超时与认证失败
+#依赖paramiko（Netmiko的依赖，安装Netmiko时已一并安装）
+
+import os
+import re
+import time
+import random
+import socket
+import logging
+import selectors
+import threading
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+logger = logging.getLogger(__name__)
+
+# 采集的命令回显目录：captures/<厂商>/<命令>.txt
+CAPTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "captures")
+# 厂商 -> Netmiko设备类型
+DEVICE_TYPES = {"huawei": "huawei_vrpv8", "cisco": "cisco_ios"}
+# 带子命令的视图命令
+SECTION_COMMANDS = ("interface", "vlan", "router", "ospf", "bgp", "acl", "line", "user-interface", "aaa")
+USERNAME = "bench"
+PASSWORD = "Bench@123"
+
+
+def capture_name(command):
+    """命令对应的回显文件名"""
+    return re.sub(r"[^\w.-]", "_", command) + ".txt"
+
+
+def load_captures(vendor, capture_dir=CAPTURE_DIR):
+    """
+    读取厂商的采集回显
+    :return: {文件名: 回显}
+    """
+    vendor_dir = os.path.join(capture_dir, vendor)
+    captures = {}
+    if os.path.isdir(vendor_dir):
+        for file_name in os.listdir(vendor_dir):
+            with open(os.path.join(vendor_dir, file_name), "r", encoding="utf-8") as f:
+                captures[file_name] = f.read().strip("\n")
+    return captures
+
+
+class FakeDevice:
+    """
+    单台仿真设备
+    :param hang: 接受TCP连接但不进行SSH握手（模拟设备无响应导致的连接超时）
+    :param auth_fail: 拒绝所有登录（模拟账号密码错误）
+    """
+
+    def __init__(self, name, vendor, captures, latency=0.0, jitter=0.0, hang=False, auth_fail=False):
+        self.name = name
+        self.vendor = vendor
+        self.captures = captures
+        self.latency = latency
+        self.jitter = jitter
+        self.hang = hang
+        self.auth_fail = auth_fail
+        # 运行配置：{视图/顶层命令: [子命令]}，配置模式下的命令写入，供配置差异比对读取
+        self.config = {"sysname " + name if vendor == "huawei" else "hostname " + name: []}
+        self._section = None
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(64)
+        self.sock.setblocking(False)
+        self.port = self.sock.getsockname()[1]
+
+    def device_info(self):
+        """devices.yaml格式的设备信息"""
+        return {
+            "device_type": DEVICE_TYPES[self.vendor],
+            "ip": "127.0.0.1",
+            "port": self.port,
+            "username": USERNAME,
+            "password": PASSWORD,
+            "device_name": self.name,
+        }
+
+    def delay(self):
+        """模拟设备处理时延"""
+        wait = self.latency + random.uniform(-self.jitter, self.jitter)
+        if wait > 0:
+            time.sleep(wait)
+
+    def prompt(self, config_mode):
+        if self.vendor == "huawei":
+            return f"[{self.name}]" if config_mode else f"<{self.name}>"
+        return f"{self.name}(config)#" if config_mode else f"{self.name}#"
+
+    def running_config(self):
+        """华为display current-configuration / 思科show running-config格式的运行配置"""
+        sep = "#" if self.vendor == "huawei" else "!"
+        lines = [] if self.vendor == "huawei" else ["Building configuration...", "", "Current configuration : 1024 bytes"]
+        for header, children in self.config.items():
+            lines.append(sep)
+            lines.append(header)
+            lines.extend(" " + child for child in children)
+        lines.extend([sep, "return" if self.vendor == "huawei" else "end"])
+        return "\n".join(lines)
+
+    def apply_config(self, command):
+        """记录配置命令：视图命令开启子命令块，exit/quit结束，no/undo删除对应命令"""
+        if command in ("exit", "quit"):
+            self._section = None
+            return
+        negation = "undo " if self.vendor == "huawei" else "no "
+        if self._section is None:
+            if command.startswith(negation):
+                self.config.pop(command[len(negation):], None)
+            else:
+                self.config.setdefault(command, [])
+                if command.split()[0] in SECTION_COMMANDS:
+                    self._section = command
+            return
+        children = self.config[self._section]
+        if command.startswith(negation):
+            if command[len(negation):] in children:
+                children.remove(command[len(negation):])
+        elif command not in children:
+            children.append(command)
+
+    def respond(self, command, config_mode):
+        """
+        执行命令
+        :return: (回显, 执行后是否处于配置模式)，用户视图下退出命令返回None表示断开会话
+        """
+        if not config_mode and command in ("quit", "exit", "logout"):
+            return None, False
+        if self.vendor == "huawei":
+            if command == "screen-length 0 temporary":
+                return "Info: The configuration takes effect on the current user terminal interface only.", config_mode
+            if command == "system-view":
+                self._section = None
+                return "Enter system view, return user view with Ctrl+Z.", True
+            # 子视图未单独模拟：quit回到系统视图（仍在配置模式），return回到用户视图
+            if command == "return" and config_mode:
+                return "", False
+            unknown = "              ^\nError: Unrecognized command found at '^' position."
+        else:
+            if command.startswith("terminal "):
+                return "", config_mode
+            if command in ("configure terminal", "conf t"):
+                self._section = None
+                return "Enter configuration commands, one per line.  End with CNTL/Z.", True
+            # 子模式未单独模拟：exit回到全局配置模式，end回到特权模式
+            if command == "end" and config_mode:
+                return "", False
+            unknown = "                ^\n% Invalid input detected at '^' marker."
+        # 华为display命令在任意视图下可执行
+        if config_mode and not (self.vendor == "huawei" and command.startswith("display ")):
+            # 配置模式下的命令全部接受并写入运行配置
+            self.apply_config(command)
+            return "", True
+        if command in ("display current-configuration", "show running-config"):
+            return self.running_config(), config_mode
+        output = self.captures.get(capture_name(command))
+        return (unknown if output is None else output), config_mode
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+if paramiko is not None:
+    class _Server(paramiko.ServerInterface):
+        """SSH服务端：密码认证 + 交互式shell"""
+
+        def __init__(self, device):
+            self.device = device
+            self.shell_ready = threading.Event()
+
+        def get_allowed_auths(self, username):
+            return "password"
+
+        def check_auth_password(self, username, password):
+            if not self.device.auth_fail and username == USERNAME and password == PASSWORD:
+                return paramiko.AUTH_SUCCESSFUL
+            return paramiko.AUTH_FAILED
+
+        def check_channel_request(self, kind, chanid):
+            if kind == "session":
+                return paramiko.OPEN_SUCCEEDED
+            return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+        def check_channel_pty_request(self, *args):
+            return True
+
+        def check_channel_shell_request(self, channel):
+            self.shell_ready.set()
+            return True
+
+
+def _run_shell(device, channel):
+    """交互式shell：逐行读取命令，回显命令与输出后返回提示符"""
+    config_mode = False
+    channel.sendall(f"\nInfo: Simulated device {device.name}.\n{device.prompt(config_mode)}".encode())
+    buffer = ""
+    while True:
+        data = channel.recv(4096)
+        if not data:
+            return
+        buffer += data.decode("utf-8", "replace").replace("\r\n", "\n").replace("\r", "\n")
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            command = line.replace("\x00", "").strip()
+            if not command:
+                channel.sendall(f"\n{device.prompt(config_mode)}".encode())
+                continue
+            device.delay()
+            output, config_mode = device.respond(command, config_mode)
+            if output is None:
+                channel.close()
+                return
+            reply = f"{line}\n{output}\n" if output else f"{line}\n"
+            channel.sendall(f"{reply}{device.prompt(config_mode)}".encode())
+
+
+class DeviceFarm:
+    """
+    仿真设备农场
+    :param count: 设备数量
+    :param vendor: huawei / cisco / mix（交替）
+    :param latency: 每条命令与SSH握手的基础时延（秒）
+    :param jitter: 时延抖动幅度（秒）
+    :param timeout_rate: 无响应设备比例
+    :param auth_fail_rate: 认证失败设备比例
+    :param seed: 随机种子，保证同一参数下故障设备分布一致
+    """
+
+    def __init__(self, count, vendor="mix", latency=0.05, jitter=0.02, timeout_rate=0.0, auth_fail_rate=0.0,
+                 seed=0, capture_dir=CAPTURE_DIR):
+        if paramiko is None:
+            raise ImportError("仿真设备农场依赖paramiko，请执行 pip install paramiko 安装")
+        rng = random.Random(seed)
+        captures = {v: load_captures(v, capture_dir) for v in DEVICE_TYPES}
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.devices = []
+        for i in range(count):
+            device_vendor = vendor if vendor != "mix" else ("huawei", "cisco")[i % 2]
+            roll = rng.random()
+            self.devices.append(FakeDevice(
+                f"{'HW' if device_vendor == 'huawei' else 'CS'}-SIM-{i + 1:04d}", device_vendor,
+                captures[device_vendor], latency, jitter,
+                hang=roll < timeout_rate,
+                auth_fail=timeout_rate <= roll < timeout_rate + auth_fail_rate))
+        self._selector = selectors.DefaultSelector()
+        self._stopped = threading.Event()
+        self._transports = []
+        self._hung = []
+        self._thread = None
+
+    def start(self):
+        for device in self.devices:
+            self._selector.register(device.sock, selectors.EVENT_READ, device)
+        self._thread = threading.Thread(target=self._accept_loop, name="fake-farm", daemon=True)
+        self._thread.start()
+        logger.info(f"仿真设备农场已启动，共{len(self.devices)}台设备")
+        return self
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            for key, _ in self._selector.select(timeout=0.2):
+                device = key.data
+                try:
+                    sock, _ = device.sock.accept()
+                except (BlockingIOError, OSError):
+                    continue
+                sock.setblocking(True)
+                if device.hang:
+                    # 保持连接但不响应，客户端等待SSH握手直至超时
+                    self._hung.append(sock)
+                    continue
+                threading.Thread(target=self._serve, args=(device, sock), daemon=True).start()
+
+    def _serve(self, device, sock):
+        transport = paramiko.Transport(sock)
+        self._transports.append(transport)
+        try:
+            transport.add_server_key(self.host_key)
+            server = _Server(device)
+            # 模拟SSH握手时延
+            device.delay()
+            transport.start_server(server=server)
+            channel = transport.accept(30)
+            if channel is None or not server.shell_ready.wait(10):
+                return
+            _run_shell(device, channel)
+        except Exception as e:
+            if not self._stopped.is_set():
+                logger.debug(f"仿真设备 {device.name} 会话结束：{str(e)}")
+        finally:
+            transport.close()
+
+    def device_list(self):
+        """设备信息列表，可直接传给connect_devices/inspect_devices/rollout"""
+        return [device.device_info() for device in self.devices]
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        for device in self.devices:
+            device.close()
+        for sock in self._hung:
+            sock.close()
+        for transport in self._transports:
+            transport.close()
+        self._selector.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
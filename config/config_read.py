@@ -1,33 +1,352 @@
 #读取设备配置和系统配置yaml文件模块
+#首次访问时才解析（优先使用libyaml的CSafeLoader），解析结果按文件修改时间/大小/内容哈希缓存到config/.cache，
+#设备清单按设备组、IP、设备名、设备类型建立索引，devices.yaml修改后自动重新加载（无需重启Web服务与定时巡检）
 import yaml
 import os
 import sys
+import time
+import pickle
+import hashlib
+import logging
+import threading
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# libyaml可用时使用C实现的加载器，解析速度约为纯Python实现的10倍
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+# 解析结果缓存目录
+CACHE_DIR = os.path.join(CONFIG_DIR, ".cache")
+CACHE_VERSION = 1
+
+# 日志模块依赖本模块，这里使用标准logging
+logger = logging.getLogger(__name__)
+
+
+def _config_path(file_name):
+    return os.path.join(CONFIG_DIR, file_name)
+
+
+def parse_yaml(full_path):
+    """
+    解析YAML文件（不使用缓存）
+    :param full_path: 配置文件绝对路径
+    :return: (解析后的对象, 文件内容sha256)
+    """
+    with open(full_path, 'rb') as f:
+        content = f.read()
+    try:
+        data = yaml.load(content.decode("UTF-8"), Loader=YamlLoader)
+    except yaml.YAMLError as e:
+        raise ValueError(f"解析YAML文件失败：{e}")
+    if data is None:
+        raise ValueError(f"配置文件 {os.path.basename(full_path)} 内容为空")
+    return data, hashlib.sha256(content).hexdigest()
+
+
+def _cache_path(file_name):
+    return os.path.join(CACHE_DIR, f"{file_name}.pickle")
+
+
+def _read_cache(file_name):
+    try:
+        with open(_cache_path(file_name), "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("cache_version") == CACHE_VERSION:
+            return cached
+    except Exception:
+        # 缓存不存在或损坏时重新解析
+        pass
+    return None
+
+
+def _write_cache(file_name, cached):
+    tmp_path = f"{_cache_path(file_name)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _cache_path(file_name))
+    except OSError as e:
+        logger.warning(f"写入配置解析缓存失败：{e}")
+
+
+def load_cached(file_name, stat=None):
+    """
+    读取YAML配置（带解析缓存）
+    - 文件修改时间与大小均与缓存一致时直接使用缓存
+    - 不一致时比对内容哈希（如git checkout只改变修改时间），内容相同仍使用缓存，否则重新解析并更新缓存
+    :return: 解析后的对象
+    """
+    full_path = _config_path(file_name)
+    stat = stat or os.stat(full_path)
+    cached = _read_cache(file_name)
+    if cached and (cached["mtime_ns"], cached["size"]) == (stat.st_mtime_ns, stat.st_size):
+        return cached["data"]
+    if cached:
+        with open(full_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if digest == cached["sha256"]:
+            cached.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write_cache(file_name, cached)
+            return cached["data"]
+    data, digest = parse_yaml(full_path)
+    _write_cache(file_name, {"cache_version": CACHE_VERSION, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                             "sha256": digest, "data": data})
+    return data
+
+
 def read_yaml(file_name):
     """
     读取YAML配置文件,使用绝对路径
     :param file_name: 配置文件名
     :return: 解析后的对象
     """
-    # 获取当前脚本所在目录
-    current_dir = os.path.dirname(os.path.abspath(__file__))
     # 拼接配置文件绝对路径
-    full_path = os.path.join(current_dir, file_name)
+    full_path = _config_path(file_name)
     # 检查文件是否存在
     if not os.path.exists(full_path):
         raise FileNotFoundError(f"配置文件不存在：{full_path}")
-    # 读取并解析YAML文件
-    try:
-        with open(full_path, 'r', encoding="UTF-8") as f:
-            data = yaml.safe_load(f)
-        if data is None:
-            raise ValueError(f"配置文件 {file_name} 内容为空")
+    return load_cached(file_name)
+
+
+class YamlSource:
+    """
+    延迟加载的YAML配置文件
+    - 首次调用load()时才读取（解析缓存命中时只需反序列化）
+    - reload_interval不为None时，每隔reload_interval秒检查一次文件修改时间，文件变化即重新加载；
+      新文件解析失败时保留原配置。reload_interval可为无参函数，首次load()时才取值（避免导入时读取其他配置）
+    """
+
+    def __init__(self, file_name, reload_interval=None):
+        self.file_name = file_name
+        self.reload_interval = reload_interval
+        self.version = 0          # 每次（重新）加载加1
+        self._data = None
+        self._state = (None, 0)   # (配置, 版本号)，整体替换，读取时无需加锁
+        self._stat_key = None     # (修改时间, 文件大小)
+        self._checked = 0.0
+        self._lock = threading.RLock()
+
+    def _stat(self):
+        full_path = _config_path(self.file_name)
+        if not os.path.exists(full_path):
+            raise FileNotFoundError(f"配置文件不存在：{full_path}")
+        return os.stat(full_path)
+
+    def _interval(self):
+        if callable(self.reload_interval):
+            self.reload_interval = self.reload_interval()
+        return self.reload_interval
+
+    def load(self):
+        """当前配置（文件变化时重新加载）"""
+        interval = self._interval()
+        data = self._data
+        if data is not None and (interval is None or time.monotonic() - self._checked < interval):
+            return data
+        with self._lock:
+            if self._data is None:
+                stat = self._stat()
+                self._set(load_cached(self.file_name, stat), stat)
+            elif time.monotonic() - self._checked >= interval:
+                self._checked = time.monotonic()
+                self._reload()
+            return self._data
+
+    def current(self):
+        """
+        当前配置及其版本号（同一次加载的配置与版本号，重新加载时整体替换）
+        :return: (配置, 版本号)
+        """
+        self.load()
+        return self._state
+
+    def _set(self, data, stat):
+        self._data = data
+        self._stat_key = (stat.st_mtime_ns, stat.st_size)
+        self._checked = time.monotonic()
+        self.version += 1
+        self._state = (data, self.version)
+
+    def _reload(self):
+        # 调用方持有锁
+        try:
+            stat = self._stat()
+            if (stat.st_mtime_ns, stat.st_size) == self._stat_key:
+                return
+            data = load_cached(self.file_name, stat)
+        except (OSError, ValueError) as e:
+            logger.warning(f"配置文件 {self.file_name} 重新加载失败，继续使用原配置：{e}")
+            return
+        self._set(data, stat)
+        logger.info(f"配置文件 {self.file_name} 已变化，重新加载完成")
+
+    def reload(self):
+        """立即检查文件变化并重新加载"""
+        with self._lock:
+            if self._data is None:
+                return self.load()
+            self._reload()
+            return self._data
+
+
+class ConfigProxy(dict):
+    """
+    配置字典代理：读取操作转发到YamlSource的当前配置，兼容原有的 DEVICES.get()/DEVICES[group]/isinstance(DEVICES, dict) 用法；
+    配置为只读，重新加载时整体替换（遍历时请先用snapshot()取得当前配置）
+    """
+
+    def __init__(self, source):
+        super().__init__()
+        self._source = source
+        self._synced = None
+
+    def snapshot(self):
+        """当前配置（普通字典，重新加载不影响已取得的对象）"""
+        data, version = self._source.current()
+        if self._synced != version:
+            # 同步到dict自身存储，供json.dumps等直接读取底层存储的C实现使用
+            with self._source._lock:
+                dict.clear(self)
+                dict.update(self, data)
+                self._synced = version
         return data
-    except yaml.YAMLError as e:
-        raise ValueError(f"解析YAML文件失败：{e}")
-#读取设备配置
-DEVICES = read_yaml("devices.yaml")
-#读取系统配置
-SETTINGS = read_yaml("settings.yaml")
+
+    def __getitem__(self, key):
+        return self.snapshot()[key]
+
+    def __contains__(self, key):
+        return key in self.snapshot()
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def __len__(self):
+        return len(self.snapshot())
+
+    def __eq__(self, other):
+        return self.snapshot() == other
+
+    def __ne__(self, other):
+        return self.snapshot() != other
+
+    def __repr__(self):
+        return repr(self.snapshot())
+
+    def __reduce__(self):
+        # 序列化（如传给子进程）时按普通字典处理
+        return dict, (dict(self.snapshot()),)
+
+    def get(self, key, default=None):
+        return self.snapshot().get(key, default)
+
+    def keys(self):
+        return self.snapshot().keys()
+
+    def values(self):
+        return self.snapshot().values()
+
+    def items(self):
+        return self.snapshot().items()
+
+    def copy(self):
+        return dict(self.snapshot())
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"配置 {self._source.file_name} 为只读，请修改配置文件")
+
+    __setitem__ = __delitem__ = update = pop = popitem = clear = setdefault = _readonly
+
+
+class Inventory:
+    """
+    设备清单索引：按设备组、IP、设备名、设备类型查询，devices.yaml重新加载后自动重建
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._indexes = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        data, version = self.source.current()
+        if self._version == version:
+            return self._indexes
+        with self._lock:
+            if self._version != version:
+                by_ip, by_name, by_type = {}, {}, {}
+                for group_name, group_devices in data.items():
+                    for device in group_devices or []:
+                        entry = (group_name, device)
+                        by_ip.setdefault(device.get("ip"), []).append(entry)
+                        by_name.setdefault(device.get("device_name", device.get("ip")), []).append(entry)
+                        by_type.setdefault(device.get("device_type", "huawei_vrpv8"), []).append(entry)
+                self._indexes = {"ip": by_ip, "name": by_name, "type": by_type}
+                self._version = version
+        return self._indexes
+
+    def groups(self):
+        """设备组名列表"""
+        return list(self.source.load())
+
+    def group(self, group_name):
+        """设备组的设备列表，设备组不存在时为空"""
+        return list(self.source.load().get(group_name) or [])
+
+    def by_ip(self, ip, port=None):
+        """按IP（及端口）查询设备列表"""
+        return [device for _, device in self._build()["ip"].get(ip, [])
+                if port is None or device.get("port", 22) == port]
+
+    def by_name(self, device_name):
+        """按设备名查询设备，不存在时返回None"""
+        entries = self._build()["name"].get(device_name)
+        return entries[0][1] if entries else None
+
+    def by_type(self, device_type):
+        """按设备类型查询设备列表（同一设备在多个组中时只返回一次）"""
+        devices, seen = [], set()
+        for _, device in self._build()["type"].get(device_type, []):
+            if id(device) not in seen:
+                seen.add(id(device))
+                devices.append(device)
+        return devices
+
+    def groups_of(self, device_name):
+        """设备所属的设备组"""
+        return [group_name for group_name, _ in self._build()["name"].get(device_name, [])]
+
+    def find(self, group=None, ip=None, name=None, device_type=None):
+        """
+        多条件查询设备（条件之间为且）
+        :return: [(group_name, device_info), ...]
+        """
+        indexes = self._build()
+        if ip is not None:
+            entries = indexes["ip"].get(ip, [])
+        elif name is not None:
+            entries = indexes["name"].get(name, [])
+        elif device_type is not None:
+            entries = indexes["type"].get(device_type, [])
+        else:
+            entries = [(g, d) for g, devices in self.source.load().items() for d in devices or []]
+        return [(g, d) for g, d in entries
+                if (group is None or g == group)
+                and (name is None or d.get("device_name", d.get("ip")) == name)
+                and (device_type is None or d.get("device_type", "huawei_vrpv8") == device_type)]
+
+    def reload(self):
+        """立即检查devices.yaml变化并重新加载"""
+        self.source.reload()
+
+
+#读取系统配置（多数模块在导入时读取设置，修改settings.yaml后需重启）
+SETTINGS = ConfigProxy(YamlSource("settings.yaml"))
+#读取设备配置，文件变化时按inventory.reload_interval秒的间隔检查并自动重新加载
+#（检查间隔在首次读取设备清单时才从settings.yaml取得，导入本模块不解析任何配置文件）
+_DEVICES_SOURCE = YamlSource("devices.yaml",
+                             reload_interval=lambda: (SETTINGS.get("inventory") or {}).get("reload_interval", 2))
+DEVICES = ConfigProxy(_DEVICES_SOURCE)
+INVENTORY = Inventory(_DEVICES_SOURCE)
@@ -1,6 +1,10 @@
 import os
 import sys
+import time
 import logging
+import contextvars
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -8,8 +12,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # 导入自定义模块
 try:
     from config.config_read import DEVICES, SETTINGS
-    from configure.render_tpl import render_tpl
+    from configure.render_tpl import render_bulk
+    from configure.device_vars import device_variables
+    from configure.config_diff import plan_push, RUNNING_CACHE
     from connect.netmiko_connect import connect_device,connect_device_group
+    from connect.session_pool import SESSION_POOL, POOL_ENABLED
+    from log.log_record import log_context
+    from log.metrics import timed, conn_device_type, SEND_CONFIG_SECONDS
 except ImportError as e:
     #导入失败时初始化默认值
     DEVICES = {}
@@ -19,10 +28,17 @@ except ImportError as e:
         "timeout": 10,
         "retry": 3
     }
+    POOL_ENABLED = False
+    log_context = None
+    SEND_CONFIG_SECONDS = None
     #定义占位函数
     logger = None
 
 
+    def timed(*args, **kwargs):
+        return lambda func: func
+
+
     def connect_device(device_info):
         logger.error(f"netmiko_connect.py 导入失败：{e}，无法连接设备")
         return None
@@ -33,6 +49,12 @@ except ImportError as e:
 
 # 初始化日志,主程序日志
 def init_batch_logger():
+    """接入统一日志队列（logs/batch_config.log），日志模块不可用时退回同步文件日志"""
+    try:
+        from log.log_record import get_logger
+        return get_logger(__name__, "batch_config.log")
+    except ImportError:
+        pass
     log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
@@ -49,6 +71,16 @@ def init_batch_logger():
 
 logger = init_batch_logger()
 
+# 批量配置灰度发布配置：并发数、金丝雀设备、每批设备数、失败阈值、是否只下发与运行配置的差异
+ROLLOUT_SETTINGS = {
+    "max_workers": 10,
+    "canary": True,
+    "wave_size": 20,
+    "max_failures": 3,
+    "diff": False
+}
+ROLLOUT_SETTINGS.update(SETTINGS.get("config", {}) or {})
+
 
 def get_devices_by_group(group_name):
     """
@@ -86,11 +118,14 @@ def get_devices_by_group(group_name):
         return []
 
 
-def send_config(device_conn, config_cmds):
+@timed(SEND_CONFIG_SECONDS, labels=lambda args, kwargs: {"device_type": conn_device_type(args[0] if args else None)},
+       result=bool)
+def send_config(device_conn, config_cmds, disconnect=True):
     """
     向设备下发配置
     :param device_conn: 从netmiko_connect获取的连接对象
     :param config_cmds: 配置命令列表
+    :param disconnect: 下发后是否断开连接（会话池借用的连接不断开）
     :return: 下发结果（True/False）
     """
     if not device_conn:
@@ -113,28 +148,179 @@ def send_config(device_conn, config_cmds):
         return False
     finally:
         #连接关闭
+        if disconnect:
+            try:
+                device_conn.disconnect()
+                logger.info(f"设备 {ip} 连接已关闭")
+            except:
+                pass
+
+
+# 差异下发时运行配置已包含全部命令的设备（计为成功）
+UNCHANGED = "unchanged"
+
+
+def push_config(dev, dev_conn, config_cmds, diff=False, disconnect=True):
+    """
+    向已连接设备下发配置
+    :param diff: 是否只下发运行配置中缺失或变化的命令（config_cmds为保留缩进的配置行）
+    :return: True/False，差异下发且设备配置已一致时返回UNCHANGED
+    """
+    dev_ip = dev.get("ip")
+    if diff:
         try:
-            device_conn.disconnect()
-            logger.info(f"设备 {ip} 连接已关闭")
-        except:
-            pass
+            config_cmds = plan_push(dev_conn, dev, config_cmds)
+        except Exception as e:
+            logger.error(f"设备 {dev_ip} 读取运行配置失败：{str(e)}")
+            config_cmds = None
+        if not config_cmds:
+            if disconnect:
+                try:
+                    dev_conn.disconnect()
+                except Exception:
+                    pass
+            if config_cmds is None:
+                return False
+            logger.info(f"设备 {dev_ip} 运行配置已包含全部命令，跳过下发")
+            return UNCHANGED
+        logger.info(f"设备 {dev_ip} 差异下发，共 {len(config_cmds)} 条命令")
+    try:
+        return send_config(dev_conn, config_cmds, disconnect=disconnect)
+    finally:
+        # 配置已变化，下次差异比对重新读取运行配置
+        RUNNING_CACHE.invalidate(dev)
 
 
-def batch_config(group_name, tpl_name, **tpl_kwargs):
+def config_device(dev, config_cmds, diff=False):
+    """
+    连接单台设备并下发配置，会话池开启时借用池内连接
+    :param diff: 是否只下发与运行配置的差异
+    :return: 下发结果（True/False/UNCHANGED）
+    """
+    dev_ip = dev.get("ip")
+    if POOL_ENABLED:
+        with SESSION_POOL.session(dev) as dev_conn:
+            if not dev_conn:
+                logger.warning(f"设备 {dev_ip} 加入失败列表")
+                return False
+            return push_config(dev, dev_conn, config_cmds, diff, disconnect=False)
+
+    dev_conn = connect_device(dev)
+    if not dev_conn:
+        logger.warning(f"设备 {dev_ip} 加入失败列表")
+        return False
+    return push_config(dev, dev_conn, config_cmds, diff)
+
+
+def _log_context(dev=None, group_name=None):
+    """日志上下文（日志模块不可用时为空上下文）"""
+    if log_context is None:
+        return nullcontext()
+    return log_context(device=dev.get("device_name", dev.get("ip")) if dev else None, group=group_name)
+
+
+def _timed_config(dev, config_cmds, diff=False):
+    """下发单台设备配置并计时，config_cmds为字典时按设备名取该设备的命令"""
+    if isinstance(config_cmds, dict):
+        config_cmds = config_cmds[dev.get("device_name", dev.get("ip"))]
+    start = time.perf_counter()
+    with _log_context(dev):
+        ok = config_device(dev, config_cmds, diff)
+    return dev, ok, round(time.perf_counter() - start, 3)
+
+
+def plan_waves(devices, canary=True, wave_size=20):
+    """
+    划分发布批次：可选金丝雀设备单独一批，其余按wave_size分批
+    :return: 批次列表 [[dev, ...], ...]
+    """
+    devices = list(devices)
+    waves = []
+    if canary and len(devices) > 1:
+        waves.append(devices[:1])
+        devices = devices[1:]
+    wave_size = max(1, int(wave_size or len(devices) or 1))
+    waves.extend(devices[i:i + wave_size] for i in range(0, len(devices), wave_size))
+    return waves
+
+
+def rollout(devices, config_cmds, result, on_result=None, **options):
+    """
+    灰度并发下发配置：金丝雀设备先行，随后按批次并发下发，失败数达到阈值即中止
+    :param devices: 设备信息列表
+    :param config_cmds: 配置命令列表（所有设备相同），或按设备生成的 {device_name: 配置命令列表}
+    :param result: 批量配置结果字典，原地更新success/failed/unchanged/timings/skipped/aborted
+    :param on_result: 单设备下发完成回调 on_result(dev_ip, ok, elapsed)
+    :param options: 覆盖settings.yaml中的max_workers/canary/wave_size/max_failures/diff
+    """
+    opts = dict(ROLLOUT_SETTINGS, **options)
+    max_workers = max(1, int(opts["max_workers"]))
+    max_failures = int(opts["max_failures"] or 0)
+    waves = plan_waves(devices, opts["canary"], opts["wave_size"])
+    canary = opts["canary"] and len(waves) > 1
+
+    for index, wave in enumerate(waves):
+        is_canary = canary and index == 0
+        logger.info(f"开始下发第{index + 1}/{len(waves)}批{'（金丝雀）' if is_canary else ''}，共 {len(wave)} 台设备")
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(wave)), thread_name_prefix="config") as executor:
+            # 复制日志上下文（设备组/任务ID）到下发线程
+            contexts = [contextvars.copy_context() for _ in wave]
+            for dev, ok, elapsed in executor.map(lambda c, d: c.run(_timed_config, d, config_cmds, opts["diff"]),
+                                                 contexts, wave):
+                dev_ip = dev.get("ip")
+                result["timings"][dev_ip] = elapsed
+                if ok:
+                    result["success"] += 1
+                    if ok == UNCHANGED:
+                        result.setdefault("unchanged", []).append(dev_ip)
+                else:
+                    result["failed"].append(dev_ip)
+                if on_result:
+                    try:
+                        on_result(dev_ip, ok, elapsed)
+                    except Exception as e:
+                        logger.error(f"设备 {dev_ip} 配置结果回调失败：{str(e)}")
+
+        # 中止判断：金丝雀失败或失败数达到阈值
+        reason = ""
+        if is_canary and result["failed"]:
+            reason = f"金丝雀设备 {wave[0].get('ip')} 配置失败"
+        elif max_failures and len(result["failed"]) >= max_failures:
+            reason = f"失败设备数 {len(result['failed'])} 达到阈值 {max_failures}"
+        if reason and index < len(waves) - 1:
+            result["aborted"] = True
+            result["skipped"] = [d.get("ip") for w in waves[index + 1:] for d in w]
+            result["error"] = f"发布中止：{reason}，跳过 {len(result['skipped'])} 台设备"
+            logger.error(result["error"])
+            break
+    return result
+
+
+def batch_config(group_name, tpl_name, tpl_params=None, rollout_options=None, on_result=None, var_matrix=None,
+                 **tpl_kwargs):
     """
     批量配置核心函数
     :param group_name: 设备组名
     :param tpl_name: 模板文件名
-    :param tpl_kwargs: 模板渲染参数
+    :param tpl_params: 模板渲染公共参数字典（Web/命令行传入的用户参数使用此项，参数名不受本函数参数名限制）
+    :param rollout_options: 发布参数，覆盖settings.yaml的config配置（max_workers/canary/wave_size/max_failures）
+    :param on_result: 单设备下发完成回调 on_result(dev_ip, ok, elapsed)
+    :param var_matrix: 变量矩阵文件名（configure/var_matrix目录下的CSV/YAML），可选
+    :param tpl_kwargs: 模板渲染公共参数（关键字形式，与tpl_params合并），与设备组默认变量、设备vars、变量矩阵合并为每台设备的参数
     :return: 批量配置结果字典
     """
+    tpl_kwargs = dict(tpl_params or {}, **tpl_kwargs)
     # 初始化结果字典
     result = {
         "total": 0,
         "success": 0,
         "failed": [],
         "group_name": group_name,
-        "error": ""
+        "error": "",
+        "timings": {},
+        "skipped": [],
+        "unchanged": [],
+        "aborted": False
     }
 
     # 前置参数校验
@@ -154,39 +340,32 @@ def batch_config(group_name, tpl_name, **tpl_kwargs):
         return result
     result["total"] = len(devices)
 
-    # 2. 渲染配置模板
+    # 2. 按设备渲染配置模板
     try:
-        logger.info(f"开始渲染模板 {tpl_name}，参数：{tpl_kwargs}")
-        tpl_content = render_tpl(tpl_name, **tpl_kwargs)
-        # 将模板内容按行分割为配置命令列表
-        config_cmds = [line.strip() for line in tpl_content.split("\n") if line.strip()]
+        logger.info(f"开始渲染模板 {tpl_name}，参数：{tpl_kwargs}，变量矩阵：{var_matrix or '无'}")
+        variables = device_variables(devices, group_name, tpl_kwargs, var_matrix)
+        # 差异下发需保留缩进还原配置层级
+        diff = dict(ROLLOUT_SETTINGS, **(rollout_options or {}))["diff"]
+        config_cmds = render_bulk(tpl_name, variables, keep_indent=diff)
 
-        if not config_cmds:
-            raise ValueError("模板渲染后无有效配置命令")
-        logger.info(f"模板渲染成功，生成配置命令 {len(config_cmds)} 条")
+        empty = [name for name, cmds in config_cmds.items() if not cmds]
+        if empty:
+            raise ValueError(f"模板渲染后无有效配置命令：{','.join(empty)}")
+        logger.info(f"模板渲染成功，共 {len(config_cmds)} 台设备，"
+                    f"生成配置命令 {sum(len(cmds) for cmds in config_cmds.values())} 条")
     except Exception as e:
         result["error"] = f"模板渲染失败：{str(e)}"
         logger.error(result["error"], exc_info=True)
         return result
 
-    # 3. 遍历设备执行配置
-    logger.info(f"开始批量配置设备组 {group_name}，共 {len(devices)} 台设备")
-    for dev in devices:
-        dev_ip = dev.get("ip")
-        dev_conn = connect_device(dev)
-        if not dev_conn:
-            result["failed"].append(dev_ip)
-            logger.warning(f"设备 {dev_ip} 加入失败列表")
-            continue
-        # 下发配置
-        if send_config(dev_conn, config_cmds):
-            result["success"] += 1
-        else:
-            result["failed"].append(dev_ip)
+    # 3. 分批并发执行配置
+    with _log_context(group_name=group_name):
+        logger.info(f"开始批量配置设备组 {group_name}，共 {len(devices)} 台设备")
+        rollout(devices, config_cmds, result, on_result=on_result, **(rollout_options or {}))
 
     # 4. 输出汇总日志
     logger.info(
-        f"批量配置完成 - 设备组：{group_name}，总设备数：{result['total']}，成功：{result['success']}，失败：{len(result['failed'])}")
+        f"批量配置完成 - 设备组：{group_name}，总设备数：{result['total']}，成功：{result['success']}（配置无变化：{len(result['unchanged'])}），失败：{len(result['failed'])}，跳过：{len(result['skipped'])}")
     if result["failed"]:
         logger.warning(f"失败设备列表：{','.join(result['failed'])}")
 
@@ -0,0 +1,152 @@
+#配置差异模块：读取设备运行配置（按设备缓存），与渲染后的模板按层级结构比对，只下发缺失或变化的命令行
+#比对按命令全文匹配，模板中需使用与运行配置一致的完整命令形式（如 interface GigabitEthernet0/0/1）
+
+import os
+import sys
+import time
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import SETTINGS
+
+# 运行配置缓存有效期（秒），下发配置后立即失效
+RUNNING_CACHE_TTL = (SETTINGS.get("config", {}) or {}).get("running_cache_ttl", 300)
+# 各厂商查看运行配置、退出视图、取反命令
+RUNNING_COMMANDS = {"huawei": "display current-configuration", "cisco": "show running-config"}
+EXIT_COMMANDS = {"huawei": "quit", "cisco": "exit"}
+NEGATIONS = {"huawei": "undo ", "cisco": "no "}
+# 分隔符与视图切换命令不参与比对
+SKIP_LINES = ("#", "!", "return", "end", "exit", "quit")
+
+
+def vendor_of(device_type):
+    return "cisco" if "cisco" in (device_type or "") else "huawei"
+
+
+class ConfigNode:
+    """配置树节点：命令文本 + 子命令（按命令文本索引）+ 模板中的块结束命令"""
+    __slots__ = ("text", "children", "closer")
+
+    def __init__(self, text=""):
+        self.text = text
+        self.children = {}
+        self.closer = None
+
+    def lines(self, vendor):
+        """整棵子树展开为下发命令"""
+        cmds = []
+        for text, node in self.children.items():
+            cmds.append(text)
+            if node.children:
+                cmds.extend(node.lines(vendor))
+                cmds.append(node.closer or EXIT_COMMANDS[vendor])
+        return cmds
+
+
+def parse_config(lines):
+    """
+    按缩进解析为层级配置树
+    :param lines: 运行配置或模板渲染结果的行列表（保留缩进）
+    :return: 根节点
+    """
+    root = ConfigNode()
+    stack = [(-1, root)]
+    for raw in lines:
+        text = " ".join(raw.split())
+        if not text:
+            continue
+        indent = len(raw) - len(raw.lstrip())
+        if text in SKIP_LINES:
+            # 模板中的exit/quit记录为同级块的结束命令
+            for level, node in reversed(stack):
+                if level == indent and text in EXIT_COMMANDS.values():
+                    node.closer = text
+                    break
+            continue
+        while stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1]
+        node = parent.children.get(text)
+        if node is None:
+            node = parent.children[text] = ConfigNode(text)
+        stack.append((indent, node))
+    return root
+
+
+def _satisfied(text, running, vendor):
+    if text in running.children:
+        return True
+    # 取反命令（no shutdown / undo shutdown）：运行配置中没有对应的肯定形式即已满足
+    negation = NEGATIONS[vendor]
+    return text.startswith(negation) and text[len(negation):] not in running.children
+
+
+def diff_config(desired, running, vendor):
+    """
+    对比期望配置与运行配置
+    :param desired: 模板配置树
+    :param running: 运行配置树
+    :return: 需下发的命令列表（含进入视图的父命令与退出命令），为空表示设备配置已一致
+    """
+    cmds = []
+    for text, node in desired.children.items():
+        existing = running.children.get(text)
+        if not node.children:
+            if not _satisfied(text, running, vendor):
+                cmds.append(text)
+            continue
+        # 新增的视图整块下发，已有视图只下发缺失的子命令
+        sub_cmds = node.lines(vendor) if existing is None else diff_config(node, existing, vendor)
+        if sub_cmds:
+            cmds.append(text)
+            cmds.extend(sub_cmds)
+            cmds.append(node.closer or EXIT_COMMANDS[vendor])
+    return cmds
+
+
+class RunningConfigCache:
+    """设备运行配置缓存：同一次发布（及有效期内的重复发布）每台设备只读取一次运行配置"""
+
+    def __init__(self, ttl=RUNNING_CACHE_TTL):
+        self.ttl = ttl
+        self._cache = {}   # {ip:port: (读取时间, 配置树)}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(device_info):
+        return f"{device_info['ip']}:{device_info.get('port', 22)}"
+
+    def get(self, device_conn, device_info):
+        key = self._key(device_info)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        vendor = vendor_of(device_info.get("device_type"))
+        output = device_conn.send_command(RUNNING_COMMANDS[vendor], read_timeout=120)
+        tree = parse_config(output.splitlines())
+        with self._lock:
+            self._cache[key] = (time.monotonic(), tree)
+        return tree
+
+    def invalidate(self, device_info):
+        with self._lock:
+            self._cache.pop(self._key(device_info), None)
+
+
+RUNNING_CACHE = RunningConfigCache()
+
+
+def plan_push(device_conn, device_info, config_lines):
+    """
+    计算设备需下发的命令
+    :param device_conn: 设备连接对象
+    :param device_info: 设备信息字典
+    :param config_lines: 模板渲染结果（保留缩进的行列表）
+    :return: 需下发的命令列表，为空表示无需下发
+    """
+    vendor = vendor_of(device_info.get("device_type"))
+    running = RUNNING_CACHE.get(device_conn, device_info)
+    return diff_config(parse_config(config_lines), running, vendor)
@@ -0,0 +1,98 @@
+#设备变量模块：合并设备组默认变量、devices.yaml设备级变量与CSV/YAML变量矩阵，生成每台设备的模板参数
+#优先级（低 -> 高）：设备基础信息 < 设备组默认变量 < 调用参数 < 设备vars < 变量矩阵
+
+import os
+import csv
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 设备组默认变量文件 {group_name: {变量: 值}}
+GROUP_VARS_FILE = os.path.join(ROOT_DIR, "config", "group_vars.yaml")
+# 变量矩阵目录：CSV（首列为设备名或IP）或YAML（{设备名或IP: {变量: 值}}）
+MATRIX_DIR = os.path.join(ROOT_DIR, "configure", "var_matrix")
+# 可直接在模板中引用的设备基础信息（不含账号密码）
+DEVICE_FACTS = ("device_name", "ip", "port", "device_type", "device_model")
+# CSV单元格中的列表分隔符，如 GE0/0/1;GE0/0/2
+LIST_SEP = ";"
+
+
+def device_id(dev):
+    return dev.get("device_name", dev["ip"])
+
+
+def load_group_vars(group_name, path=GROUP_VARS_FILE):
+    """读取设备组默认变量，文件不存在时为空"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding="UTF-8") as f:
+        data = yaml.safe_load(f) or {}
+    return dict(data.get(group_name) or {})
+
+
+def list_matrices():
+    """变量矩阵文件列表"""
+    if not os.path.isdir(MATRIX_DIR):
+        return []
+    return sorted(f for f in os.listdir(MATRIX_DIR) if f.endswith((".csv", ".yaml", ".yml")))
+
+
+def _csv_value(value):
+    value = value.strip()
+    if LIST_SEP in value:
+        return [item.strip() for item in value.split(LIST_SEP) if item.strip()]
+    return value
+
+
+def load_matrix(matrix_name):
+    """
+    读取变量矩阵
+    :param matrix_name: 矩阵文件名（位于configure/var_matrix目录）
+    :return: {设备名或IP: {变量: 值}}，CSV空单元格不覆盖低优先级变量
+    """
+    path = os.path.join(MATRIX_DIR, os.path.basename(matrix_name))
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"变量矩阵文件 {path} 不存在")
+    if path.endswith(".csv"):
+        with open(path, 'r', encoding="UTF-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                return {}
+            columns = [name.strip() for name in header[1:]]
+            matrix = {}
+            for row in reader:
+                if not row or not row[0].strip():
+                    continue
+                matrix[row[0].strip()] = {name: _csv_value(value) for name, value in zip(columns, row[1:])
+                                          if name and value.strip()}
+            return matrix
+    with open(path, 'r', encoding="UTF-8") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"变量矩阵 {matrix_name} 格式错误，预期 {{设备名或IP: {{变量: 值}}}}")
+    return {str(key): dict(value or {}) for key, value in data.items()}
+
+
+def device_variables(devices, group_name=None, tpl_kwargs=None, matrix=None):
+    """
+    生成每台设备的模板参数
+    :param devices: 设备信息列表
+    :param group_name: 设备组名，用于读取设备组默认变量
+    :param tpl_kwargs: 调用时传入的公共参数
+    :param matrix: 变量矩阵文件名或已加载的矩阵字典
+    :return: {device_name: 模板参数}，按设备清单顺序
+    """
+    group_vars = load_group_vars(group_name) if group_name else {}
+    if isinstance(matrix, str):
+        matrix = load_matrix(matrix)
+    matrix = matrix or {}
+    variables = {}
+    for dev in devices:
+        merged = {key: dev[key] for key in DEVICE_FACTS if key in dev}
+        merged.update(group_vars)
+        merged.update(tpl_kwargs or {})
+        merged.update(dev.get("vars") or {})
+        # 矩阵按设备名匹配，其次按IP
+        merged.update(matrix.get(device_id(dev)) or matrix.get(dev.get("ip")) or {})
+        variables[device_id(dev)] = merged
+    return variables
@@ -1,23 +1,188 @@
 #读取端口限速模板和vlan模板模块
+#模板按文件修改时间缓存编译结果，渲染前校验必填参数，支持按设备批量渲染与列表参数展开（如多个接口）
 
 import os
+import string
+import threading
 
-def render_tpl(tpl_name, **tpl_kwargs):
-    # 获取当前脚本所在目录
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # 模板文件路径
-    tpl_dir = os.path.join(current_dir, "config_tpl")
-    # 拼接出模板文件的绝对路径
-    tpl_path = os.path.join(tpl_dir, tpl_name)
+# 模板目录
+TPL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config_tpl")
+# 列表参数展开时一并重复的块结束命令
+BLOCK_END = ("exit", "quit", "#")
+
+
+def _field_root(field_name):
+    """占位符引用的参数名：{intf.name} / {vlans[0]} -> intf / vlans"""
+    for sep in (".", "["):
+        field_name = field_name.split(sep, 1)[0]
+    return field_name
+
+
+class _Line:
+    """模板中的一行：无占位符的行编译时即完成转义（{{ }} 还原为 { }），有占位符的行渲染时format_map"""
+
+    def __init__(self, text, tpl_name):
+        self.text = text
+        self.indent = len(text) - len(text.lstrip())
+        self.fields = []
+        for _, field_name, format_spec, _ in string.Formatter().parse(text):
+            if field_name is None:
+                continue
+            root = _field_root(field_name)
+            if not root or root.isdigit():
+                raise ValueError(f"模板 {tpl_name} 不支持位置占位符：{text.strip()}")
+            if root not in self.fields:
+                self.fields.append(root)
+            # 格式说明中的嵌套占位符，如 {name:{width}}
+            for _, nested, _, _ in string.Formatter().parse(format_spec or ""):
+                if nested and _field_root(nested) not in self.fields:
+                    self.fields.append(_field_root(nested))
+        self.block_end = None
+        # 无占位符的行渲染结果固定，与str.format一致地还原转义的花括号
+        self.static = None if self.fields else text.format()
+
+    def render(self, variables):
+        return self.text.format_map(variables) if self.fields else self.static
+
+
+class Template:
+    """
+    编译后的配置模板
+    - fields：全部必填参数名（按出现顺序）
+    - 参数值为列表/元组时，引用它的行连同其下缩进的子命令（及紧随的exit/quit）按元素逐个重复
+    """
+
+    def __init__(self, name, source, version=None):
+        self.name = name
+        self.source = source
+        self.version = version      # (文件修改时间, 文件大小)
+        self.lines = [_Line(text, name) for text in source.split("\n")]
+        self.fields = []
+        for line in self.lines:
+            self.fields.extend(f for f in line.fields if f not in self.fields)
+        self._mark_blocks()
+
+    def _mark_blocks(self):
+        # 预先计算每个含占位符行的块范围，渲染时直接切片
+        for index, line in enumerate(self.lines):
+            if not line.fields:
+                continue
+            end = index + 1
+            while end < len(self.lines) and self.lines[end].text.strip() and self.lines[end].indent > line.indent:
+                end += 1
+            if end < len(self.lines) and self.lines[end].indent == line.indent \
+                    and self.lines[end].text.strip() in BLOCK_END:
+                end += 1
+            line.block_end = end
+
+    def missing(self, variables):
+        """缺少的必填参数"""
+        return [f for f in self.fields if f not in variables]
+
+    def validate(self, variables):
+        missing = self.missing(variables)
+        if missing:
+            raise KeyError(f"模板 {self.name} 缺少参数：{', '.join(missing)}")
+
+    def render_lines(self, variables):
+        """
+        渲染为行列表（保留缩进与空行）
+        :param variables: 模板参数字典
+        """
+        self.validate(variables)
+        rendered = []
+        index = 0
+        while index < len(self.lines):
+            line = self.lines[index]
+            list_fields = [f for f in line.fields if isinstance(variables[f], (list, tuple))]
+            if not list_fields:
+                rendered.append(line.render(variables))
+                index += 1
+                continue
+            # 列表参数：整块按元素重复，多个列表参数按位置一一对应
+            block = self.lines[index:line.block_end]
+            for values in zip(*(variables[f] for f in list_fields)):
+                scoped = dict(variables, **dict(zip(list_fields, values)))
+                rendered.extend(sub.render(scoped) for sub in block)
+            index = line.block_end
+        return rendered
+
+    def render(self, variables):
+        """渲染为文本"""
+        return "\n".join(self.render_lines(variables))
 
-    if not os.path.exists(tpl_path):
-        raise FileNotFoundError(f"模板文件 {tpl_path} 不存在")
+    def commands(self, variables):
+        """渲染为配置命令列表（去除首尾空白与空行）"""
+        return [cmd for cmd in (text.strip() for text in self.render_lines(variables)) if cmd]
 
-    with open(tpl_path, 'r', encoding="UTF-8") as f:
-        tpl_content = f.read()
+    def config_lines(self, variables):
+        """渲染为保留缩进的配置行（去除空行），供配置差异比对还原层级"""
+        return [text.rstrip() for text in self.render_lines(variables) if text.strip()]
 
+
+class TemplateCache:
+    """模板缓存：按文件修改时间与大小判断是否需要重新编译"""
+
+    def __init__(self, tpl_dir=TPL_DIR):
+        self.tpl_dir = tpl_dir
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def get(self, tpl_name):
+        tpl_path = os.path.join(self.tpl_dir, tpl_name)
+        try:
+            stat = os.stat(tpl_path)
+        except OSError:
+            raise FileNotFoundError(f"模板文件 {tpl_path} 不存在")
+        version = (stat.st_mtime_ns, stat.st_size)
+        template = self._templates.get(tpl_name)
+        if template is not None and template.version == version:
+            return template
+        with open(tpl_path, 'r', encoding="UTF-8") as f:
+            template = Template(tpl_name, f.read(), version)
+        with self._lock:
+            self._templates[tpl_name] = template
+        return template
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+TEMPLATE_CACHE = TemplateCache()
+
+
+def get_template(tpl_name):
+    """获取编译后的模板（文件未修改时直接使用缓存）"""
+    return TEMPLATE_CACHE.get(tpl_name)
+
+
+def render_tpl(tpl_name, **tpl_kwargs):
     # 渲染模板
-    return tpl_content.format(**tpl_kwargs)
+    return get_template(tpl_name).render(tpl_kwargs)
+
+
+def render_bulk(tpl_name, device_vars, common_vars=None, keep_indent=False):
+    """
+    按设备批量渲染配置命令，渲染前统一校验，任一设备缺少参数时不渲染任何设备
+    :param tpl_name: 模板文件名
+    :param device_vars: {设备标识: 该设备的参数字典}，覆盖common_vars中的同名参数
+    :param common_vars: 所有设备共用的参数
+    :param keep_indent: 是否保留缩进（配置差异比对时使用）
+    :return: {设备标识: 配置命令列表}
+    """
+    template = get_template(tpl_name)
+    common_vars = common_vars or {}
+    merged = {key: dict(common_vars, **(variables or {})) for key, variables in device_vars.items()}
+    errors = [f"{key}（{', '.join(template.missing(variables))}）"
+              for key, variables in merged.items() if template.missing(variables)]
+    if errors:
+        raise KeyError(f"模板 {tpl_name} 缺少参数：{'; '.join(errors)}")
+    render = template.config_lines if keep_indent else template.commands
+    return {key: render(variables) for key, variables in merged.items()}
+
 
 if __name__ == '__main__':
-    render_tpl( "vlan_tpl.txt",vlan_id=10, vlan_name="net",interface="GigabitEthernet0/0/1")
\ No newline at end of file
+    print(render_tpl("vlan_tpl.txt", vlan_id=10, vlan_name="net", interface="GigabitEthernet0/0/1"))
+    print(render_tpl("vlan_tpl.txt", vlan_id=10, vlan_name="net",
+                     interface=["GigabitEthernet0/0/1", "GigabitEthernet0/0/2"]))
@@ -1,9 +1,10 @@
 #设备连接模块：基于Netmiko连接华为设备
 
-import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from netmiko import ConnectHandler
 from netmiko.exceptions import NetMikoTimeoutException, NetMikoAuthenticationException
 import time
+import contextvars
 from config.config_read import DEVICES, SETTINGS
 import os
 import sys
@@ -12,47 +13,65 @@ import sys
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# 创建日志目录,用绝对路径
-current_dir = os.path.dirname(os.path.abspath(__file__))
-log_dir = os.path.join(current_dir, "logs")
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
+from log.log_record import get_logger, log_context
+from log.metrics import timed, CONNECT_SECONDS
+from connect.resilience import RESILIENCE, HALF_OPEN
+from connect.preflight import preflight, PREFLIGHT_ENABLED
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(os.path.join(log_dir, "connect.log"), 'a', encoding="utf-8"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+# 日志经统一日志队列异步写入 logs/connect.log
+logger = get_logger(__name__, "connect.log")
+
+# 并发连接配置
+CONNECT_SETTINGS = SETTINGS.get("connect", {})
+# 最近一次连接耗时（秒）{device_name: latency}
+CONNECT_LATENCY = {}
+
+
+def _connect_labels(args, kwargs):
+    device_info = args[0] if args else kwargs.get("device_info", {})
+    return {"device_type": device_info.get("device_type", "huawei_vrpv8")}
 
 
 #心函数
+@timed(CONNECT_SECONDS, labels=_connect_labels, result=lambda conn: conn is not None)
 def connect_device(device_info, retry=3):
 
+    # 1. 提取自定义字段
+    device_name = device_info.get("device_name", device_info["ip"])
+    device_ip = device_info["ip"]
+
+    # 熔断中的设备直接跳过，冷却结束后放行一次探测（探测只连一次，不重试）
+    allowed, circuit = RESILIENCE.allow(device_info)
+    if not allowed:
+        logger.warning(f"[跳过] 设备 {device_name} ({device_ip}) 连续连接失败已熔断，"
+                       f"{RESILIENCE.status(device_info)['retry_at']}后再探测")
+        return None
+    if circuit == HALF_OPEN:
+        logger.info(f"[探测] 设备 {device_name} ({device_ip}) 熔断冷却结束，尝试恢复连接")
+        retry = 1
+
+    # 2. 连接超时按该设备历史连接耗时学习（TCP连接/SSH握手/认证分别计时）
+    timeout = RESILIENCE.connect_timeout(device_info)
     netmiko_params = {
         "device_type": device_info.get("device_type", "huawei_vrpv8"),
-        "ip": device_info["ip"],
+        "ip": device_ip,
         "username": device_info.get("username", "admin"),
         "password": device_info.get("password", "Huawei@123"),
         "port": device_info.get("port", 22),
-        "timeout": 10
+        "conn_timeout": timeout,
+        "banner_timeout": timeout,
+        "auth_timeout": timeout
     }
     netmiko_params = {k: v for k, v in netmiko_params.items() if v is not None}
 
-
-    # 2. 提取自定义字段
-    device_name = device_info.get("device_name", device_info["ip"])
-    device_ip = device_info["ip"]
-
-    # 3. 重试连接
+    # 3. 重试连接，重试间隔指数退避+随机抖动
+    error = ""
     for i in range(retry):
         try:
             # 建立SSH连接
+            start = time.perf_counter()
             conn = ConnectHandler(**netmiko_params)
+            RESILIENCE.record_success(device_info, time.perf_counter() - start)
 
             # 特权模式
             if "secret" in device_info:
@@ -61,42 +80,99 @@ def connect_device(device_info, retry=3):
             # 日志记录
             success_msg = f"[成功] 连接设备 {device_name} ({device_ip})"
             logger.info(success_msg)
-            print(success_msg)
             return conn
 
         except NetMikoTimeoutException:
-            error_msg = f"[失败] 设备 {device_name} ({device_ip}) 连接超时，第{i + 1}次重试"
+            error = f"连接超时（{timeout}s）"
+            error_msg = f"[失败] 设备 {device_name} ({device_ip}) {error}，第{i + 1}次重试"
             logger.warning(error_msg)
-            print(error_msg)
-            time.sleep(1)
 
         except NetMikoAuthenticationException:
-            error_msg = f"[失败] 设备 {device_name} ({device_ip}) 账号/密码错误"
+            error = "账号/密码错误"
+            error_msg = f"[失败] 设备 {device_name} ({device_ip}) {error}"
             logger.error(error_msg)
-            print(error_msg)
             break  # 认证错误无需重试
 
         except Exception as e:
-            error_msg = f"[失败] 设备 {device_name} ({device_ip}) 连接异常：{str(e)}，第{i + 1}次重试"
+            error = f"连接异常：{str(e)}"
+            error_msg = f"[失败] 设备 {device_name} ({device_ip}) {error}，第{i + 1}次重试"
             logger.error(error_msg)
-            print(error_msg)
-            time.sleep(1)
 
-    # 所有重试失败
+        # 最后一次失败后不再等待
+        if i < retry - 1:
+            time.sleep(RESILIENCE.backoff(i))
+
+    # 所有重试失败，计入熔断
+    RESILIENCE.record_failure(device_info, error)
     final_msg = f"设备 {device_name} ({device_ip}) 经{retry}次重试后仍连接失败"
     logger.error(final_msg)
-    print(f"[最终失败] {final_msg}")
     return None
 
 
-def connect_device_group(group_name):
+def _timed_connect(device, retry):
+    """连接单台设备并记录耗时"""
+    device_name = device.get("device_name", device["ip"])
+    start = time.perf_counter()
+    with log_context(device=device_name):
+        conn = connect_device(device, retry=retry)
+    latency = round(time.perf_counter() - start, 3)
+    CONNECT_LATENCY[device_name] = latency
+    logger.info(f"设备 {device_name} 连接耗时 {latency}s（{'成功' if conn else '失败'}）")
+    return device_name, conn
+
+
+def connect_devices(devices, concurrent=None, max_workers=None, preflight_check=None):
+    """
+    批量连接设备列表
+    :param devices: 设备信息列表
+    :param concurrent: 是否并发连接，默认读取settings.yaml
+    :param max_workers: 最大并发数，默认读取settings.yaml
+    :param preflight_check: 是否先做TCP预检、只连接可达设备，默认读取settings.yaml
+    :return: 连接字典 {device_name: conn}
+    """
+    conn_dict = {}
+    if preflight_check is None:
+        preflight_check = PREFLIGHT_ENABLED
+    if preflight_check:
+        # TCP预检，离线设备不再等待SSH连接超时
+        devices, _ = preflight(devices)
+    retry = SETTINGS.get("retry", 3)
+    if concurrent is None:
+        concurrent = CONNECT_SETTINGS.get("concurrent", True)
+    if max_workers is None:
+        max_workers = CONNECT_SETTINGS.get("max_workers", 10)
+    max_workers = max(1, min(int(max_workers), len(devices) or 1))
+
+    if not concurrent or max_workers == 1:
+        # 串行连接
+        for device in devices:
+            device_name, conn = _timed_connect(device, retry)
+            if conn:
+                conn_dict[device_name] = conn
+        return conn_dict
+
+    # 并发连接，总耗时取决于最慢的设备
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="connect") as executor:
+        # 复制日志上下文（设备组/任务ID）到连接线程
+        futures = [executor.submit(contextvars.copy_context().run, _timed_connect, device, retry)
+                   for device in devices]
+        for future in as_completed(futures):
+            device_name, conn = future.result()
+            if conn:
+                conn_dict[device_name] = conn
+
+    # 按设备清单顺序返回
+    order = [d.get("device_name", d["ip"]) for d in devices]
+    return {name: conn_dict[name] for name in order if name in conn_dict}
+
+
+def connect_device_group(group_name, concurrent=None):
     """
     批量连接指定设备组
     :param group_name: 设备组名
+    :param concurrent: 是否并发连接，默认读取settings.yaml
     :return: 连接字典 {device_name: conn}
     """
-    conn_dict = {}
-
     # 1. 检查组名
     if group_name not in DEVICES:
         error_msg = f"设备组 {group_name} 不存在！可用组名：{list(DEVICES.keys())}"
@@ -107,20 +183,22 @@ def connect_device_group(group_name):
     group_devices = DEVICES[group_name]
     total = len(group_devices)
     logger.info(f"开始批量连接设备组 {group_name}，共{total}台设备")
-    print(f"\n===== 开始批量连接设备组 {group_name}（共{total}台）=====")
 
-    # 3. 遍历设备连接
-    for device in group_devices:
-        conn = connect_device(device, retry=SETTINGS.get("retry", 3))
-        if conn:
-            conn_dict[device["device_name"]] = conn
+    # 3. 连接设备
+    start = time.perf_counter()
+    conn_dict = connect_devices(group_devices, concurrent=concurrent)
+    elapsed = round(time.perf_counter() - start, 3)
 
     # 4. 统计结果
     success = len(conn_dict)
     fail = total - success
-    result_msg = f"设备组 {group_name} 连接完成：总{total}台 | 成功{success}台 | 失败{fail}台"
+    latencies = {d.get("device_name", d["ip"]): CONNECT_LATENCY.get(d.get("device_name", d["ip"]))
+                 for d in group_devices}
+    slowest = max(latencies.items(), key=lambda x: x[1] or 0) if latencies else None
+    result_msg = f"设备组 {group_name} 连接完成：总{total}台 | 成功{success}台 | 失败{fail}台 | 耗时{elapsed}s"
+    if slowest:
+        result_msg += f" | 最慢设备 {slowest[0]}（{slowest[1]}s）"
     logger.info(result_msg)
-    print(f"\n===== {result_msg} =====")
 
     return conn_dict
 
@@ -0,0 +1,99 @@
+#连接预检模块：SSH握手前对设备SSH端口做高并发非阻塞TCP探测，离线设备直接标记，只对可达设备建立SSH会话
+
+import os
+import sys
+import time
+import socket
+import asyncio
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import SETTINGS
+from log.log_record import get_logger
+
+logger = get_logger(__name__, "connect.log")
+
+# 预检配置：是否启用、单设备探测超时（秒）、最大并发探测数
+PREFLIGHT_SETTINGS = SETTINGS.get("connect", {}).get("preflight", {})
+PREFLIGHT_ENABLED = PREFLIGHT_SETTINGS.get("enabled", True)
+PREFLIGHT_TIMEOUT = PREFLIGHT_SETTINGS.get("timeout", 2)
+PREFLIGHT_CONCURRENCY = PREFLIGHT_SETTINGS.get("concurrency", 500)
+
+
+async def probe(ip, port=22, timeout=PREFLIGHT_TIMEOUT):
+    """
+    TCP连接探测（只完成三次握手，不进行SSH协商）
+    :return: (是否可达, 耗时秒数或失败原因)
+    """
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except asyncio.TimeoutError:
+        return False, f"TCP {port}端口探测超时（>{timeout}s）"
+    except (OSError, socket.gaierror) as e:
+        return False, f"TCP {port}端口不可达：{e.strerror or str(e)}"
+    latency = round(time.perf_counter() - start, 4)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True, latency
+
+
+async def scan_async(devices, timeout=None, concurrency=None):
+    """
+    协程并发探测设备列表
+    :return: {device_name: (是否可达, 耗时或失败原因)}
+    """
+    timeout = timeout or PREFLIGHT_TIMEOUT
+    semaphore = asyncio.Semaphore(concurrency or PREFLIGHT_CONCURRENCY)
+
+    async def _probe(device):
+        async with semaphore:
+            return await probe(device["ip"], device.get("port", 22), timeout)
+
+    results = await asyncio.gather(*(_probe(d) for d in devices))
+    return {d.get("device_name", d["ip"]): result for d, result in zip(devices, results)}
+
+
+def split_reachable(devices, results):
+    """
+    按探测结果拆分设备列表
+    :return: (可达设备列表, 离线设备 {device_name: 失败原因})
+    """
+    reachable, offline = [], {}
+    for device in devices:
+        device_name = device.get("device_name", device["ip"])
+        ok, detail = results.get(device_name, (True, None))
+        if ok:
+            reachable.append(device)
+        else:
+            offline[device_name] = detail
+    return reachable, offline
+
+
+def preflight(devices, timeout=None, concurrency=None):
+    """
+    SSH连接前的TCP预检（同步入口，在新事件循环中执行）
+    :param devices: 设备信息列表
+    :param timeout: 单设备探测超时（秒），默认读取settings.yaml
+    :param concurrency: 最大并发探测数，默认读取settings.yaml
+    :return: (可达设备列表, 离线设备 {device_name: 失败原因})
+    """
+    if not devices:
+        return [], {}
+    start = time.perf_counter()
+    results = asyncio.run(scan_async(devices, timeout, concurrency))
+    reachable, offline = split_reachable(devices, results)
+    logger.info(f"连接预检完成：共{len(devices)}台 | 可达{len(reachable)}台 | 离线{len(offline)}台 | "
+                f"耗时{round(time.perf_counter() - start, 3)}s")
+    for device_name, reason in offline.items():
+        logger.warning(f"设备 {device_name} 预检离线，跳过SSH连接：{reason}")
+    return reachable, offline
+
+
+def offline_entry(reason):
+    """预检离线设备的报告条目"""
+    return {"status": "巡检失败", "reason": f"设备离线（{reason}）", "offline": True}
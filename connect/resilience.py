@@ -0,0 +1,244 @@
+#连接弹性模块：指数退避+抖动重试、按历史连接耗时学习单设备超时、设备级熔断（连续失败后跳过，冷却后探测恢复）
+
+import os
+import sys
+import json
+import time
+import atexit
+import random
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import SETTINGS
+from log.log_record import get_logger
+
+logger = get_logger(__name__, "connect.log")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESILIENCE_SETTINGS = SETTINGS.get("connect", {}).get("resilience", {})
+
+# 熔断状态：closed正常连接，open跳过连接，half_open冷却结束后放行一次探测
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=30.0):
+    """
+    第attempt次（从0开始）重试前的等待时间：指数退避，一半固定一半随机抖动，
+    避免大量设备同时失败后在同一时刻集中重连
+    """
+    ceiling = min(max_delay, base_delay * (2 ** attempt))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def device_key(device_info):
+    """设备健康状态按 ip:port 记录（与登录账号无关）"""
+    return f"{device_info['ip']}:{device_info.get('port', 22)}"
+
+
+class ConnectResilience:
+    """
+    设备连接健康状态
+    - 超时学习：成功连接耗时的指数加权平均 × multiplier，限制在[timeout_min, timeout_max]，无历史时取timeout_default
+    - 熔断：连续failure_threshold次连接失败（每次connect_device调用计一次）后熔断，
+      冷却cooldown秒后放行一次探测，探测成功恢复，失败重新计时冷却
+    - 状态持久化到JSON文件，定时巡检进程重启后仍生效
+    """
+
+    def __init__(self, state_file=None, base_delay=1.0, max_delay=30.0, timeout_default=10, timeout_min=3,
+                 timeout_max=30, multiplier=4, alpha=0.3, failure_threshold=3, cooldown=1800, save_interval=5):
+        self.state_file = state_file
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout_default = timeout_default
+        self.timeout_min = timeout_min
+        self.timeout_max = timeout_max
+        self.multiplier = multiplier
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.save_interval = save_interval
+        self._states = None        # {key: {"latency", "failures", "state", "opened_at", "last_error", "updated"}}
+        self._dirty = set()        # 本进程修改过、尚未写盘的设备
+        self._last_save = 0.0
+        self._lock = threading.RLock()
+
+    # ---------- 持久化 ----------
+    def _read_file(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取连接健康状态失败，按空状态处理：{str(e)}")
+            return {}
+
+    def _load(self):
+        # 首次使用时加载，调用方持有锁
+        if self._states is None:
+            self._states = self._read_file()
+        return self._states
+
+    def save(self, force=True):
+        """
+        写盘：与文件中的状态合并，只覆盖本进程修改过的设备（分片巡检多进程共用同一状态文件）
+        :param force: False时按save_interval节流
+        """
+        with self._lock:
+            if not self.state_file or not self._dirty:
+                return
+            if not force and time.monotonic() - self._last_save < self.save_interval:
+                return
+            merged = self._read_file()
+            for key in self._dirty:
+                if key in self._states:
+                    merged[key] = self._states[key]
+            tmp_file = f"{self.state_file}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(merged, f, ensure_ascii=False)
+                os.replace(tmp_file, self.state_file)
+            except OSError as e:
+                logger.warning(f"保存连接健康状态失败：{str(e)}")
+                return
+            self._dirty.clear()
+            self._last_save = time.monotonic()
+
+    def _state(self, key):
+        return self._load().setdefault(key, {"latency": None, "failures": 0, "state": CLOSED,
+                                             "opened_at": None, "last_error": "", "updated": None})
+
+    def _touch(self, key, state):
+        state["updated"] = time.time()
+        self._dirty.add(key)
+
+    # ---------- 重试与超时 ----------
+    def backoff(self, attempt):
+        return backoff_delay(attempt, self.base_delay, self.max_delay)
+
+    def connect_timeout(self, device_info):
+        """按历史连接耗时计算本次连接超时（秒）"""
+        with self._lock:
+            latency = self._load().get(device_key(device_info), {}).get("latency")
+        if not latency:
+            return self.timeout_default
+        return round(min(self.timeout_max, max(self.timeout_min, latency * self.multiplier)), 1)
+
+    # ---------- 熔断 ----------
+    def allow(self, device_info):
+        """
+        是否允许连接：熔断中返回False；冷却结束时切换为半开并放行一次探测
+        :return: (是否允许, 当前状态)
+        """
+        key = device_key(device_info)
+        with self._lock:
+            state = self._state(key)
+            if state["state"] == CLOSED:
+                return True, CLOSED
+            now = time.time()
+            if now - (state["opened_at"] or 0) < self.cooldown:
+                return False, state["state"]
+            # 冷却结束（或上一次探测未返回结果超过冷却时间），放行一次探测，其他调用方继续跳过
+            state["state"] = HALF_OPEN
+            state["opened_at"] = now
+            self._touch(key, state)
+            return True, HALF_OPEN
+
+    def record_success(self, device_info, latency=None):
+        """
+        记录连接成功
+        :param latency: 本次建立连接耗时（秒），用于学习超时
+        """
+        key = device_key(device_info)
+        with self._lock:
+            state = self._state(key)
+            if latency is not None:
+                previous = state["latency"]
+                state["latency"] = round(latency if not previous else
+                                         self.alpha * latency + (1 - self.alpha) * previous, 3)
+            recovered = state["state"] != CLOSED
+            state.update(failures=0, state=CLOSED, opened_at=None, last_error="")
+            self._touch(key, state)
+        if recovered:
+            logger.info(f"设备 {key} 探测连接成功，熔断恢复")
+            self.save()
+        else:
+            self.save(force=False)
+
+    def record_failure(self, device_info, error=""):
+        """记录一次连接失败（含全部重试），达到阈值或半开探测失败时熔断"""
+        key = device_key(device_info)
+        with self._lock:
+            state = self._state(key)
+            state["failures"] += 1
+            state["last_error"] = error
+            tripped = state["state"] == HALF_OPEN or (
+                state["state"] == CLOSED and state["failures"] >= self.failure_threshold)
+            if tripped:
+                state["state"] = OPEN
+                state["opened_at"] = time.time()
+            self._touch(key, state)
+        if tripped:
+            logger.warning(f"设备 {key} 连续{state['failures']}次连接失败，熔断{self.cooldown}s后再探测")
+            self.save()
+        else:
+            self.save(force=False)
+
+    def status(self, device_info):
+        """
+        设备熔断状态，写入巡检报告
+        :return: {"state", "failures", "last_error", "retry_at"}
+        """
+        with self._lock:
+            state = dict(self._load().get(device_key(device_info)) or
+                         {"failures": 0, "state": CLOSED, "opened_at": None, "last_error": ""})
+        retry_at = None
+        if state["state"] != CLOSED and state["opened_at"]:
+            retry_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(state["opened_at"] + self.cooldown))
+        return {"state": state["state"], "failures": state["failures"],
+                "last_error": state["last_error"], "retry_at": retry_at}
+
+    def snapshot(self):
+        """全部设备的健康状态 {ip:port: 状态}"""
+        with self._lock:
+            return {key: dict(state) for key, state in self._load().items()}
+
+    def reset(self, device_info=None):
+        """手动恢复设备（如修正账号密码后），不传device_info时恢复全部"""
+        with self._lock:
+            states = self._load()
+            keys = [device_key(device_info)] if device_info else list(states)
+            for key in keys:
+                if key in states:
+                    states[key].update(failures=0, state=CLOSED, opened_at=None, last_error="")
+                    self._touch(key, states[key])
+        self.save()
+
+
+RESILIENCE = ConnectResilience(
+    state_file=os.path.join(ROOT_DIR, RESILIENCE_SETTINGS.get("state_file", "connect/connect_state.json")),
+    base_delay=RESILIENCE_SETTINGS.get("base_delay", 1.0),
+    max_delay=RESILIENCE_SETTINGS.get("max_delay", 30.0),
+    timeout_default=RESILIENCE_SETTINGS.get("timeout_default", 10),
+    timeout_min=RESILIENCE_SETTINGS.get("timeout_min", 3),
+    timeout_max=RESILIENCE_SETTINGS.get("timeout_max", 30),
+    multiplier=RESILIENCE_SETTINGS.get("timeout_multiplier", 4),
+    failure_threshold=RESILIENCE_SETTINGS.get("failure_threshold", 3),
+    cooldown=RESILIENCE_SETTINGS.get("cooldown", 1800),
+)
+# 进程退出时写入节流期间未落盘的状态
+atexit.register(RESILIENCE.save)
+
+
+def _after_fork_in_child():
+    """子进程（分片巡检进程池）重建锁，退出时借助multiprocessing的退出回调写盘（子进程不执行atexit）"""
+    RESILIENCE._lock = threading.RLock()
+    from multiprocessing import util
+    util.Finalize(None, RESILIENCE.save, exitpriority=110)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,199 @@
+#SSH会话池模块：按设备复用Netmiko连接，供巡检、配置、Web共享
+
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import SETTINGS
+from connect.netmiko_connect import connect_device
+from log.log_record import get_logger
+
+logger = get_logger(__name__, "connect.log")
+
+# 会话池配置
+POOL_SETTINGS = SETTINGS.get("session_pool", {})
+
+
+class _Session:
+    """池内会话：连接对象 + 最近使用时间"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.last_used = time.monotonic()
+
+
+class SessionPool:
+    """
+    SSH会话池
+    - 按设备（ip:port:username）缓存连接，每台设备同一时刻只借给一个使用者
+    - 借用前做健康检查，失效连接自动重建
+    - 空闲超时自动回收，池内会话总数受max_sessions限制
+    """
+
+    def __init__(self, max_sessions=50, idle_timeout=3900, reap_interval=60, retry=3):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self.retry = retry
+        self._sessions = {}        # {key: _Session}
+        self._device_locks = {}    # {key: threading.Lock}，设备级锁
+        self._guard = threading.Lock()
+        self._reaper = None
+
+    @staticmethod
+    def device_key(device_info):
+        return f"{device_info['ip']}:{device_info.get('port', 22)}:{device_info.get('username', 'admin')}"
+
+    def _get_lock(self, key):
+        with self._guard:
+            return self._device_locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.disconnect()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            return conn.is_alive()
+        except Exception:
+            return False
+
+    def _start_reaper(self):
+        """启动空闲会话回收线程（首次借用时启动）"""
+        if self._reaper or not self.reap_interval:
+            return
+
+        def _loop():
+            while True:
+                time.sleep(self.reap_interval)
+                self.evict_idle()
+
+        self._reaper = threading.Thread(target=_loop, name="session-reaper", daemon=True)
+        self._reaper.start()
+
+    def _make_room(self):
+        """会话数达到上限时，回收最久未使用的空闲会话；无可回收会话返回False"""
+        while len(self._sessions) >= self.max_sessions:
+            idle = [(s.last_used, k) for k, s in self._sessions.items()
+                    if not self._device_locks[k].locked()]
+            if not idle:
+                return False
+            _, key = min(idle)
+            self._close(self._sessions.pop(key).conn)
+            logger.info(f"会话池已满，回收最久未使用会话 {key}")
+        return True
+
+    def _checkout(self, key, device_info):
+        """取出可用连接：复用健康会话，否则新建"""
+        session = self._sessions.get(key)
+        if session:
+            expired = time.monotonic() - session.last_used > self.idle_timeout
+            if not expired and self._is_healthy(session.conn):
+                logger.info(f"复用会话 {key}")
+                return session.conn, True
+            with self._guard:
+                self._sessions.pop(key, None)
+            self._close(session.conn)
+            logger.info(f"会话 {key} 已失效，重新连接")
+
+        conn = connect_device(device_info, retry=self.retry)
+        if not conn:
+            return None, False
+        with self._guard:
+            pooled = self._make_room()
+            if pooled:
+                self._sessions[key] = _Session(conn)
+        if not pooled:
+            logger.warning(f"会话池已满且无空闲会话，设备 {key} 使用临时连接")
+        return conn, pooled
+
+    @contextmanager
+    def session(self, device_info):
+        """
+        借用设备会话，使用完毕自动归还
+        :param device_info: 设备信息字典
+        :return: 连接对象，连接失败时为None
+        """
+        self._start_reaper()
+        key = self.device_key(device_info)
+        lock = self._get_lock(key)
+        with lock:
+            conn, pooled = self._checkout(key, device_info)
+            try:
+                yield conn
+            finally:
+                if conn and pooled:
+                    session = self._sessions.get(key)
+                    if session and session.conn is conn:
+                        session.last_used = time.monotonic()
+                elif conn:
+                    # 未入池的临时连接用完即关
+                    self._close(conn)
+
+    def discard(self, device_info):
+        """强制关闭并移出设备会话（用于超时中断）"""
+        key = self.device_key(device_info)
+        with self._guard:
+            session = self._sessions.pop(key, None)
+        if session:
+            self._close(session.conn)
+            logger.info(f"会话 {key} 已强制关闭")
+
+    def evict_idle(self):
+        """回收空闲超时的会话"""
+        now = time.monotonic()
+        with self._guard:
+            expired = [k for k, s in self._sessions.items()
+                       if now - s.last_used > self.idle_timeout and not self._device_locks[k].locked()]
+            sessions = [self._sessions.pop(k) for k in expired]
+        for session in sessions:
+            self._close(session.conn)
+        if expired:
+            logger.info(f"回收空闲会话 {len(expired)} 个：{expired}")
+        return len(expired)
+
+    def close_all(self):
+        """关闭池内所有会话"""
+        with self._guard:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._close(session.conn)
+        logger.info(f"会话池已关闭，共断开 {len(sessions)} 个会话")
+
+    def stats(self):
+        """会话池状态"""
+        with self._guard:
+            busy = sum(1 for k in self._sessions if self._device_locks[k].locked())
+            return {"sessions": len(self._sessions), "busy": busy, "max_sessions": self.max_sessions}
+
+
+# 全局会话池实例，进程内共享
+POOL_ENABLED = POOL_SETTINGS.get("enabled", True)
+SESSION_POOL = SessionPool(
+    max_sessions=POOL_SETTINGS.get("max_sessions", 50),
+    idle_timeout=POOL_SETTINGS.get("idle_timeout", 3900),
+    reap_interval=POOL_SETTINGS.get("reap_interval", 60),
+    retry=SETTINGS.get("retry", 3)
+)
+
+
+def _after_fork_in_child():
+    """子进程（分片巡检进程池）不沿用父进程的会话：底层socket与父进程共享，只丢弃不断开；重建锁与回收线程"""
+    SESSION_POOL._sessions = {}
+    SESSION_POOL._device_locks = {}
+    SESSION_POOL._guard = threading.Lock()
+    SESSION_POOL._reaper = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,187 @@
+#asyncio巡检引擎：基于asyncssh单进程协程并发巡检，适用于超大规模设备清单
+
+import os
+import re
+import sys
+import time
+import asyncio
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import SETTINGS
+from inspect_module.batch_inspect import (logger, DEVICE_TIMEOUT, item_commands,
+                                          split_outputs, parse_device_outputs, build_entry,
+                                          record_device_timing, unreachable_entry)
+from connect.resilience import RESILIENCE
+from log.log_record import DEVICE_ID
+
+# asyncssh为可选依赖，仅asyncio引擎需要
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+INSPECT_SETTINGS = SETTINGS.get("inspect", {})
+# 同时保持的最大SSH会话数，限制内存占用
+ASYNC_MAX_SESSIONS = INSPECT_SETTINGS.get("async_max_sessions", 1000)
+
+# 华为 <HUAWEI> / [HUAWEI]，思科 Router# / Router>（用户模式）
+PROMPT_PATTERN = re.compile(r"(<[^<>\r\n]+>|\[[^\[\]\r\n]+\]|[\w.\-]+[#>])\s*$")
+# enable命令的口令提示
+PASSWORD_PATTERN = re.compile(r"[Pp]assword:\s*$")
+# 关闭分屏命令
+PAGING_COMMANDS = {"huawei": "screen-length 0 temporary", "cisco": "terminal length 0"}
+
+
+async def _read_until(process, predicate, buffer=""):
+    """持续读取通道回显，直到predicate(buffer)成立"""
+    while not predicate(buffer):
+        chunk = await process.stdout.read(65536)
+        if not chunk:
+            raise ConnectionError("SSH会话已关闭")
+        buffer += chunk
+    return buffer
+
+
+async def _enable(process, secret):
+    """
+    进入特权模式（与Netmiko连接的conn.enable()一致）
+    :return: 特权模式提示符，如 Router#
+    """
+    process.stdin.write("enable\n")
+    buffer = await _read_until(
+        process, lambda b: PASSWORD_PATTERN.search(b) is not None or PROMPT_PATTERN.search(b) is not None)
+    if PASSWORD_PATTERN.search(buffer):
+        process.stdin.write(f"{secret}\n")
+        buffer = await _read_until(process, lambda b: PROMPT_PATTERN.search(b) is not None)
+    prompt = PROMPT_PATTERN.search(buffer).group(1)
+    if not prompt.endswith("#"):
+        raise ValueError("进入特权模式失败，请检查secret")
+    return prompt
+
+
+async def collect_outputs_async(device_info, commands, connect_timeout=10, on_connected=None):
+    """
+    通过asyncssh交互式会话批量采集命令回显
+    :param device_info: 设备信息字典
+    :param commands: 命令列表
+    :param on_connected: SSH连接（含认证）建立后的回调 on_connected(连接耗时秒数)，用于区分连接失败与采集失败
+    :return: {command: output}
+    """
+    start = time.perf_counter()
+    async with asyncssh.connect(
+            device_info["ip"],
+            port=device_info.get("port", 22),
+            username=device_info.get("username", "admin"),
+            password=device_info.get("password", "Huawei@123"),
+            known_hosts=None,
+            connect_timeout=connect_timeout) as conn:
+        if on_connected:
+            on_connected(time.perf_counter() - start)
+        process = await conn.create_process(term_type="vt100", term_size=(511, 24))
+        try:
+            # 1. 识别提示符
+            process.stdin.write("\n")
+            buffer = await _read_until(process, lambda b: PROMPT_PATTERN.search(b) is not None)
+            prompt = PROMPT_PATTERN.search(buffer).group(1)
+            # 思科设备登录后处于用户模式（Router>）时，配置了secret则进入特权模式
+            if "secret" in device_info and prompt.endswith(">") and not prompt.startswith("<"):
+                prompt = await _enable(process, device_info["secret"])
+
+            # 2. 关闭分屏
+            device_type = device_info.get("device_type", "huawei_vrpv8")
+            paging = PAGING_COMMANDS["cisco" if "cisco" in device_type else "huawei"]
+            process.stdin.write(paging + "\n")
+            await _read_until(process, lambda b: b.count(prompt) >= 1)
+
+            # 3. 一次下发全部命令，每条命令执行完回到一次提示符
+            process.stdin.write("".join(cmd + "\n" for cmd in commands))
+            buffer = await _read_until(process, lambda b: b.count(prompt) >= len(commands))
+            return split_outputs(buffer, prompt, commands)
+        finally:
+            process.close()
+
+
+async def inspect_device_async(device_info, semaphore, device_timeout=None):
+    """
+    协程巡检单台设备，检查项与报告结构与inspect_device一致
+    :return: (device_name, 报告条目)
+    """
+    device_name = device_info.get("device_name", device_info["ip"])
+    device_type = device_info.get("device_type", "huawei_vrpv8")
+    commands = item_commands(device_type)
+    device_timeout = device_timeout or DEVICE_TIMEOUT
+    # 每个协程任务有独立的上下文副本，直接设置不影响其他设备
+    DEVICE_ID.set(device_name)
+    # 熔断中的设备不占用会话名额
+    allowed, _ = RESILIENCE.allow(device_info)
+    if not allowed:
+        logger.warning(f"设备{device_name}连续连接失败已熔断，跳过巡检")
+        return device_name, unreachable_entry(device_info)
+    async with semaphore:
+        # 耗时从获得会话名额开始计算，不含排队时间
+        start = time.perf_counter()
+        # 连接建立后记录连接成功与耗时；只有连接/认证阶段的失败计入熔断，命令执行慢或解析异常不影响设备连接状态
+        connected = []
+
+        def _on_connected(latency):
+            connected.append(latency)
+            RESILIENCE.record_success(device_info, latency)
+
+        try:
+            raw = await asyncio.wait_for(
+                collect_outputs_async(device_info, list(commands.values()),
+                                      connect_timeout=RESILIENCE.connect_timeout(device_info),
+                                      on_connected=_on_connected),
+                device_timeout)
+            outputs = {item: raw[cmd] for item, cmd in commands.items()}
+        except asyncio.TimeoutError:
+            reason = f"巡检超时（>{device_timeout}s）" if connected else f"连接超时（>{device_timeout}s）"
+            logger.error(f"设备{device_name}{reason}")
+            if not connected:
+                RESILIENCE.record_failure(device_info, reason)
+            record_device_timing(device_name, device_type, time.perf_counter() - start, False)
+            return device_name, {"status": "巡检失败", "reason": reason}
+        except Exception as e:
+            logger.error(f"设备{device_name}巡检失败：{str(e)}")
+            if not connected:
+                RESILIENCE.record_failure(device_info, str(e))
+            record_device_timing(device_name, device_type, time.perf_counter() - start, False)
+            return device_name, {"status": "巡检失败", "reason": str(e)}
+    # 解析为CPU密集操作，释放会话后再执行
+    result, data = parse_device_outputs(None, device_info["ip"], outputs, device_type)
+    record_device_timing(device_name, device_type, time.perf_counter() - start, True)
+    return device_name, build_entry(device_name, result, data)
+
+
+async def async_batch_inspect(devices, on_result=None, max_sessions=None, device_timeout=None):
+    """
+    协程并发巡检设备列表
+    :param devices: 设备信息列表
+    :param on_result: 单设备巡检完成回调 on_result(device_name, entry)
+    :param max_sessions: 最大并发会话数，默认读取settings.yaml
+    :return: 巡检报告 {device_name: entry}，按设备清单顺序
+    """
+    if asyncssh is None:
+        raise ImportError("asyncio巡检引擎依赖asyncssh，请执行 pip install asyncssh 安装")
+    semaphore = asyncio.Semaphore(max_sessions or ASYNC_MAX_SESSIONS)
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(inspect_device_async(d, semaphore, device_timeout)) for d in devices]
+    inspect_report = {}
+    for future in asyncio.as_completed(tasks):
+        device_name, entry = await future
+        inspect_report[device_name] = entry
+        if on_result:
+            try:
+                on_result(device_name, entry)
+            except Exception as e:
+                logger.error(f"设备{device_name}巡检结果回调失败：{str(e)}")
+    logger.info(f"asyncio引擎巡检完成，共{len(devices)}台设备，耗时{round(time.perf_counter() - start, 3)}s")
+    order = [d.get("device_name", d["ip"]) for d in devices]
+    return {name: inspect_report[name] for name in order if name in inspect_report}
+
+
+def run_async_inspect(devices, on_result=None, max_sessions=None, device_timeout=None):
+    """同步入口：在新事件循环中执行async_batch_inspect"""
+    return asyncio.run(async_batch_inspect(devices, on_result, max_sessions, device_timeout))
@@ -1,121 +1,165 @@
 
-#设备巡检核心模块：批量巡检华为设备（接口/CPU/内存/VLAN）
+#设备巡检核心模块：批量巡检华为/思科设备（接口/CPU/内存/VLAN）
 
 import os
 import sys
 import json
 import time
+import contextvars
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 #添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 #导入依赖模块
-from connect.netmiko_connect import connect_device_group
-from config.config_read import SETTINGS
-
-#自定义日志模块
-def init_logger():
-    import logging
-    # 创建日志目录
-    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    # 配置日志
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(os.path.join(log_dir, "inspect.log"), 'a', encoding="utf-8"),
-            logging.StreamHandler()
-        ]
-    )
-    return logging.getLogger(__name__)
-
-
-logger = init_logger()
-
-
-# 补充巡检子函数
-def inspect_interface(device_conn):
+from connect.netmiko_connect import connect_devices
+from connect.session_pool import SESSION_POOL, POOL_ENABLED
+from connect.resilience import RESILIENCE, OPEN
+from connect.preflight import preflight, offline_entry, PREFLIGHT_ENABLED
+from config.config_read import SETTINGS, DEVICES
+from inspect_module.parsers import get_command, parse
+from inspect_module import incremental
+from inspect_module.report_store import REPORT_STORE
+from inspect_module.metric_store import METRIC_STORE, METRICS_ENABLED
+from inspect_module.report_catalog import REPORT_CATALOG
+
+from log.log_record import get_logger, log_context
+from log.metrics import (timed, conn_device_type, COMMAND_SECONDS, INSPECT_ITEM_SECONDS, INSPECT_DEVICE_SECONDS,
+                         DEVICE_INSPECT_TOTAL, DEVICE_LAST_SECONDS, REPORT_SAVE_SECONDS)
+
+# 日志经统一日志队列异步写入 logs/inspect.log
+logger = get_logger(__name__, "inspect.log")
+
+
+def split_outputs(buffer, prompt, commands):
+    """
+    按提示符切分批量执行的回显，得到每条命令的输出
+    :param buffer: 通道读取的完整回显
+    :param prompt: 设备提示符，如<HUAWEI>
+    :param commands: 按发送顺序排列的命令列表
+    :return: {command: output}
+    """
+    segments = buffer.replace("\r\n", "\n").replace("\r", "\n").split(prompt)
+    # 第一个提示符之前是首条命令的回显，此后每段以命令回显开头
+    segments = [seg for seg in segments if seg.strip()]
+    if len(segments) < len(commands):
+        raise ValueError(f"批量回显切分失败：预期{len(commands)}段，实际{len(segments)}段")
+    outputs = {}
+    for cmd, seg in zip(commands, segments):
+        lines = seg.strip("\n").split("\n")
+        if lines and lines[0].strip() == cmd:
+            lines = lines[1:]
+        outputs[cmd] = "\n".join(lines).strip("\n")
+    return outputs
+
+
+@timed(COMMAND_SECONDS, labels=lambda args, kwargs: {"device_type": conn_device_type(args[0]), "item": "batch"})
+def collect_outputs(device_conn, commands, read_timeout=60):
+    """
+    一次性下发多条查询命令并读取全部回显，省去逐条等待提示符的往返
+    （Netmiko连接华为设备时已执行screen-length 0 temporary关闭分屏）
+    :param device_conn: 设备连接对象
+    :param commands: 命令列表
+    :param read_timeout: 读取超时（秒）
+    :return: {command: output}
+    """
+    prompt = device_conn.find_prompt()
+    device_conn.write_channel("".join(cmd + device_conn.RETURN for cmd in commands))
+    buffer = ""
+    deadline = time.monotonic() + read_timeout
+    # 每条命令执行完都会回到提示符
+    while buffer.count(prompt) < len(commands):
+        chunk = device_conn.read_channel()
+        if chunk:
+            buffer += chunk
+            continue
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"批量命令回显读取超时（>{read_timeout}s）")
+        time.sleep(0.05)
+    return split_outputs(buffer, prompt, commands)
+
+
+def run_command(device_conn, device_type, item):
+    """执行巡检项查询命令并记录耗时"""
+    with COMMAND_SECONDS.time(device_type=device_type, item=item):
+        return device_conn.send_command(get_command(device_type, item))
+
+
+def _item_labels(item):
+    """巡检项埋点标签：设备类型取参数或连接对象"""
+    def labels(args, kwargs):
+        device_type = kwargs.get("device_type") or conn_device_type(args[0] if args else kwargs.get("device_conn"))
+        return {"device_type": device_type, "item": item}
+    return labels
+
+
+def _records_ok(records):
+    return not any("error" in r for r in records)
+
+
+def _usage_ok(ret):
+    return ret[0] != -1
+
+
+# 补充巡检子函数（命令与解析器按设备类型从inspect_module.parsers注册表获取）
+@timed(INSPECT_ITEM_SECONDS, labels=_item_labels("interface_status"), result=_records_ok)
+def inspect_interface(device_conn, output=None, device_type=None):
     try:
+        device_type = device_type or device_conn.device_type
         # 执行接口状态查询命令
-        output = device_conn.send_command("display interface brief")
-        lines = output.strip().split("\n")[1:]
-        abnormal_interfaces = []
-
-        for line in lines:
-            if not line.strip():
-                continue
-                #解析每一行
-            parts = line.split()
-            if len(parts) < 3:
-                continue
-            intf_name = parts[0]
-            physical_status = parts[1]
-            protocol_status = parts[2]
-            # 筛选异常接口
-            if physical_status.lower() != "up" or protocol_status.lower() != "up":
-                abnormal_interfaces.append({
-                    "interface": intf_name,
-                    "physical_status": physical_status,
-                    "protocol_status": protocol_status
-                })
-        return abnormal_interfaces
+        if output is None:
+            output = run_command(device_conn, device_type, "interface_status")
+        # 筛选异常接口
+        return [record._asdict() for record in parse(device_type, "interface_status", output)]
     except Exception as e:
         logger.error(f"接口状态巡检失败：{str(e)}")
         return [{"error": f"接口巡检失败：{str(e)}"}]
 
 
-def inspect_cpu(device_conn, warn_threshold=80):
+@timed(INSPECT_ITEM_SECONDS, labels=_item_labels("cpu_usage"), result=_usage_ok)
+def inspect_cpu(device_conn, warn_threshold=80, output=None, device_type=None):
     try:
+        device_type = device_type or device_conn.device_type
         # 执行CPU使用率查询命令
-        output = device_conn.send_command("display cpu-usage")
+        if output is None:
+            output = run_command(device_conn, device_type, "cpu_usage")
         # 解析CPU使用率
-        for line in output.split("\n"):
-            if "CPU Usage" in line and "5 sec" in line:
-                usage = int(line.split("%")[0].split()[-1])
-                is_warn = usage >= warn_threshold
-                return usage, is_warn
-        return 0, False
+        usage = parse(device_type, "cpu_usage", output)
+        if usage is None:
+            return 0, False
+        return usage, usage >= warn_threshold
     except Exception as e:
         logger.error(f"CPU使用率巡检失败：{str(e)}")
         return -1, True
 
 
-def inspect_memory(device_conn, warn_threshold=80):
+@timed(INSPECT_ITEM_SECONDS, labels=_item_labels("memory_usage"), result=_usage_ok)
+def inspect_memory(device_conn, warn_threshold=80, output=None, device_type=None):
     try:
+        device_type = device_type or device_conn.device_type
         # 执行内存使用率查询命令
-        output = device_conn.send_command("display memory-usage")
+        if output is None:
+            output = run_command(device_conn, device_type, "memory_usage")
         # 解析内存使用率
-        for line in output.split("\n"):
-            if "Memory Usage Ratio" in line:
-                usage = int(line.split("%")[0].split()[-1])
-                is_warn = usage >= warn_threshold
-                return usage, is_warn
-        return 0, False
+        usage = parse(device_type, "memory_usage", output)
+        if usage is None:
+            return 0, False
+        return usage, usage >= warn_threshold
     except Exception as e:
         logger.error(f"内存使用率巡检失败：{str(e)}")
         return -1, True
 
 
-def inspect_vlan(device_conn):
+@timed(INSPECT_ITEM_SECONDS, labels=_item_labels("vlan_status"), result=_records_ok)
+def inspect_vlan(device_conn, output=None, device_type=None):
     try:
+        device_type = device_type or device_conn.device_type
         # 执行VLAN查询命令
-        output = device_conn.send_command("display vlan brief")
-        lines = output.strip().split("\n")[1:]
-        vlan_list = []
-
-        for line in lines:
-            if not line.strip() or "----" in line:
-                continue
-            parts = line.split()
-            if len(parts) < 2:
-                continue
-            vlan_id = parts[0]
-            vlan_name = parts[1] if len(parts) > 1 else "default"
-            vlan_list.append({"vlan_id": vlan_id, "vlan_name": vlan_name})
-        return vlan_list
+        if output is None:
+            output = run_command(device_conn, device_type, "vlan_status")
+        return [record._asdict() for record in parse(device_type, "vlan_status", output)]
     except Exception as e:
         logger.error(f"VLAN状态巡检失败：{str(e)}")
         return [{"error": f"VLAN巡检失败：{str(e)}"}]
@@ -128,106 +172,491 @@ INSPECT_SETTINGS = SETTINGS.get("inspect", {
 })
 CHECK_ITEMS = INSPECT_SETTINGS["check_items"]
 WARN_THRESHOLD = INSPECT_SETTINGS["warn_threshold"]
+# 并发巡检配置：最大并发数、单设备巡检超时（秒）
+MAX_WORKERS = INSPECT_SETTINGS.get("max_workers", 10)
+DEVICE_TIMEOUT = INSPECT_SETTINGS.get("device_timeout", 120)
+# 命令采集模式：batch一次下发全部命令，serial逐条send_command
+COLLECT_MODE = INSPECT_SETTINGS.get("collect_mode", "batch")
+# 报告存储：store压缩分段存储，json逐次生成缩进JSON文件
+REPORT_BACKEND = SETTINGS.get("report", {}).get("backend", "store")
+# 已解析报告的LRU缓存容量
+REPORT_CACHE_SIZE = SETTINGS.get("report", {}).get("cache_size", 128)
+# JSON报告目录（绝对路径）
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inspect_report")
+# 巡检引擎：thread线程池（Netmiko），asyncio协程（asyncssh，适合超大规模设备）
+ENGINE = INSPECT_SETTINGS.get("engine", "thread")
+
+
+def item_commands(device_type):
+    """已启用巡检项对应的查询命令 {item: command}"""
+    commands = {}
+    for item in CHECK_ITEMS:
+        try:
+            commands[item] = get_command(device_type, item)
+        except KeyError as e:
+            logger.warning(str(e))
+    return commands
 
 
 def inspect_device(device_conn):
     """单设备全项巡检"""
-    inspect_result = {}
+    return inspect_device_delta(device_conn)[0]
+
+
+def inspect_device_delta(device_conn):
+    """
+    单设备全项巡检，开启增量巡检时复用回显未变化巡检项的上次结果
+    :return: (完整巡检结果, 写入报告的数据)
+    """
     if not device_conn:
-        return {"error": "设备连接对象为空"}
+        result = {"error": "设备连接对象为空"}
+        return result, result
+    device_type = device_conn.device_type
+    # 批量采集全部巡检命令回显，失败时退回逐条采集
+    outputs = {}
+    if COLLECT_MODE == "batch":
+        commands = item_commands(device_type)
+        try:
+            raw = collect_outputs(device_conn, list(commands.values()))
+            outputs = {item: raw[cmd] for item, cmd in commands.items()}
+        except Exception as e:
+            logger.warning(f"设备 {device_conn.host} 批量采集失败，改为逐条采集：{str(e)}")
+            outputs = {}
+            # 清空通道残留回显，避免污染后续命令
+            try:
+                device_conn.clear_buffer()
+            except Exception:
+                pass
+    if incremental.ENABLED:
+        # 增量巡检需要原始回显计算哈希，逐条补齐缺失的回显
+        for item in incremental.ITEMS:
+            if item in CHECK_ITEMS and item not in outputs:
+                try:
+                    outputs[item] = run_command(device_conn, device_type, item)
+                except Exception as e:
+                    logger.warning(f"设备 {device_conn.host} 采集 {item} 回显失败：{str(e)}")
+    return parse_device_outputs(device_conn, device_conn.host, outputs, device_type)
+
+
+def parse_device_outputs(device_conn, device_key, outputs, device_type):
+    """
+    解析设备回显，开启增量巡检时跳过回显未变化的巡检项
+    :param device_key: 设备标识（IP），用于保存增量状态
+    :return: (完整巡检结果, 写入报告的数据)
+    """
+    if not incremental.ENABLED:
+        result = parse_outputs(device_conn, outputs, device_type)
+        return result, result
+    cached, hashes = incremental.plan(device_key, outputs)
+    result = parse_outputs(device_conn, outputs, device_type, cached)
+    return result, incremental.commit(device_key, hashes, result, cached)
+
+
+def parse_outputs(device_conn, outputs, device_type=None, cached=None):
+    """
+    解析各巡检项命令回显，缺失的回显通过device_conn逐条采集
+    :param device_conn: 设备连接对象（回显齐全时可为None）
+    :param outputs: {item: output}
+    :param device_type: 设备类型，默认取device_conn.device_type
+    :param cached: 无需重新解析的巡检项结果 {item: result}
+    :return: 巡检结果字典
+    """
+    inspect_result = {}
+    cached = cached or {}
+    device_type = device_type or device_conn.device_type
     # 接口状态巡检
     if "interface_status" in CHECK_ITEMS:
-        inspect_result["interface_status"] = inspect_interface(device_conn)
+        if "interface_status" in cached:
+            inspect_result["interface_status"] = cached["interface_status"]
+        else:
+            inspect_result["interface_status"] = inspect_interface(
+                device_conn, outputs.get("interface_status"), device_type)
     # CPU使用率巡检
     if "cpu_usage" in CHECK_ITEMS:
-        cpu_threshold = WARN_THRESHOLD.get("cpu_usage", 80)
-        cpu_usage, is_warn = inspect_cpu(device_conn, cpu_threshold)
-        inspect_result["cpu_usage"] = {"usage": cpu_usage, "is_warn": is_warn}
+        if "cpu_usage" in cached:
+            inspect_result["cpu_usage"] = cached["cpu_usage"]
+        else:
+            cpu_threshold = WARN_THRESHOLD.get("cpu_usage", 80)
+            cpu_usage, is_warn = inspect_cpu(device_conn, cpu_threshold, outputs.get("cpu_usage"), device_type)
+            inspect_result["cpu_usage"] = {"usage": cpu_usage, "is_warn": is_warn}
     # 内存使用率巡检
     if "memory_usage" in CHECK_ITEMS:
-        mem_threshold = WARN_THRESHOLD.get("memory_usage", 80)
-        mem_usage, is_warn = inspect_memory(device_conn, mem_threshold)
-        inspect_result["memory_usage"] = {"usage": mem_usage, "is_warn": is_warn}
+        if "memory_usage" in cached:
+            inspect_result["memory_usage"] = cached["memory_usage"]
+        else:
+            mem_threshold = WARN_THRESHOLD.get("memory_usage", 80)
+            mem_usage, is_warn = inspect_memory(device_conn, mem_threshold, outputs.get("memory_usage"), device_type)
+            inspect_result["memory_usage"] = {"usage": mem_usage, "is_warn": is_warn}
     # VLAN状态巡检
     if "vlan_status" in CHECK_ITEMS:
-        inspect_result["vlan_status"] = inspect_vlan(device_conn)
+        if "vlan_status" in cached:
+            inspect_result["vlan_status"] = cached["vlan_status"]
+        else:
+            inspect_result["vlan_status"] = inspect_vlan(device_conn, outputs.get("vlan_status"), device_type)
 
     return inspect_result
 
 
-def batch_inspect(group_name):
-    """设备组批量巡检"""
-    logger.info(f"开始执行设备组 {group_name} 批量巡检")
-    inspect_report = {}
-    # 1. 批量连接设备
+def check_warn_items(result):
+    """检测巡检结果中的预警项"""
+    warn_items = []
+    if "cpu_usage" in result and result["cpu_usage"]["is_warn"]:
+        warn_items.append(f"CPU使用率超标({result['cpu_usage']['usage']}%)")
+    if "memory_usage" in result and result["memory_usage"]["is_warn"]:
+        warn_items.append(f"内存使用率超标({result['memory_usage']['usage']}%)")
+    if "interface_status" in result and len(result["interface_status"]) > 0:
+        warn_items.append(f"异常接口({len(result['interface_status'])}个)")
+    return warn_items
+
+
+def build_entry(device_name, result, data=None):
+    """
+    由巡检结果生成报告条目，并记录预警项
+    :param result: 完整巡检结果，用于预警判断、指标统计与报告目录
+    :param data: 写入报告存储的数据（增量巡检时未变化项为标记），默认为result
+    """
+    entry = {
+        "status": "巡检成功",
+        "inspect_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "data": result
+    }
+    if data is not None and data is not result:
+        # 增量数据只在写入报告存储时替换data
+        entry["delta"] = data
+
+    # 检测预警项
+    warn_items = check_warn_items(result)
+    if warn_items:
+        logger.warning(f"设备{device_name}存在预警：{'; '.join(warn_items)}")
+    return entry
+
+
+def unreachable_entry(device_info):
+    """连接失败设备的报告条目，附带熔断状态，便于在报告中区分偶发失败与长期离线设备"""
+    circuit = RESILIENCE.status(device_info)
+    reason = "连续连接失败已熔断，跳过连接" if circuit["state"] == OPEN else "设备未连接"
+    return {"status": "巡检失败", "reason": reason, "circuit": circuit}
+
+
+def record_device_timing(device_name, device_type, elapsed, ok):
+    """记录单设备巡检耗时埋点"""
+    result = "ok" if ok else "error"
+    INSPECT_DEVICE_SECONDS.observe(elapsed, device_type=device_type, result=result)
+    DEVICE_INSPECT_TOTAL.inc(device_type=device_type, result=result)
+    DEVICE_LAST_SECONDS.set(round(elapsed, 3), device=device_name)
+
+
+def inspect_one(device_name, conn, disconnect=True):
+    """
+    单设备巡检并生成报告条目
+    :param disconnect: 巡检完成后是否断开连接（会话池借用的连接不断开）
+    :return: (device_name, 报告条目)
+    """
+    start = time.perf_counter()
+    ok = False
     try:
-        conn_dict = connect_device_group(group_name)
-    except KeyError as e:
-        logger.error(f"批量巡检失败：{e}")
-        return {"error": str(e)}
-    # 2. 遍历设备执行巡检
-    for device_name, conn in conn_dict.items():
-        try:
-            if not conn:
-                inspect_report[device_name] = {"status": "巡检失败", "reason": "设备未连接"}
-                logger.warning(f"设备{device_name}巡检失败：设备未连接")
-                continue
-
-            # 执行巡检
-            result = inspect_device(conn)
-            inspect_report[device_name] = {
-                "status": "巡检成功",
-                "inspect_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "data": result
-            }
-
-            # 检测预警项
-            warn_items = []
-            if "cpu_usage" in result and result["cpu_usage"]["is_warn"]:
-                warn_items.append(f"CPU使用率超标({result['cpu_usage']['usage']}%)")
-            if "memory_usage" in result and result["memory_usage"]["is_warn"]:
-                warn_items.append(f"内存使用率超标({result['memory_usage']['usage']}%)")
-            if "interface_status" in result and len(result["interface_status"]) > 0:
-                warn_items.append(f"异常接口({len(result['interface_status'])}个)")
-
-            if warn_items:
-                logger.warning(f"设备{device_name}存在预警：{'; '.join(warn_items)}")
-                print(f"【预警】设备{device_name}：{'; '.join(warn_items)}")
+        if not conn:
+            logger.warning(f"设备{device_name}巡检失败：设备未连接")
+            return device_name, {"status": "巡检失败", "reason": "设备未连接"}
 
-        except Exception as e:
-            inspect_report[device_name] = {"status": "巡检失败", "reason": str(e)}
-            logger.error(f"设备{device_name}巡检失败：{str(e)}")
+        # 执行巡检
+        result, data = inspect_device_delta(conn)
+        ok = True
+        return device_name, build_entry(device_name, result, data)
 
-        finally:
-            #连接断开
-            if conn:
+    except Exception as e:
+        logger.error(f"设备{device_name}巡检失败：{str(e)}")
+        return device_name, {"status": "巡检失败", "reason": str(e)}
+
+    finally:
+        record_device_timing(device_name, conn_device_type(conn), time.perf_counter() - start, ok)
+        #连接断开
+        if conn and disconnect:
+            try:
                 conn.disconnect()
-                logger.info(f"设备{device_name}巡检完成，已断开连接")
+            except Exception:
+                pass
+            logger.info(f"设备{device_name}巡检完成，已断开连接")
+
 
-    # 3. 保存巡检报告
-    save_inspect_report(inspect_report, group_name)
-    logger.info(f"设备组{group_name}批量巡检完成，共巡检{len(inspect_report)}台设备")
+def inspect_pooled(device_name, device_info):
+    """从会话池借用连接巡检单台设备，巡检完成后归还会话"""
+    try:
+        with SESSION_POOL.session(device_info) as conn:
+            device_name, entry = inspect_one(device_name, conn, disconnect=False)
+            return device_name, (entry if conn else unreachable_entry(device_info))
+    except Exception as e:
+        logger.error(f"设备{device_name}巡检失败：{str(e)}")
+        return device_name, {"status": "巡检失败", "reason": str(e)}
+
+
+def run_inspect(targets, on_result=None, max_workers=None, device_timeout=None, pooled=False):
+    """
+    并发执行多台设备巡检
+    :param targets: 连接字典 {device_name: conn}；pooled=True时为 {device_name: device_info}
+    :param on_result: 单设备巡检完成回调 on_result(device_name, entry)
+    :param max_workers: 最大并发数，默认读取settings.yaml
+    :param device_timeout: 单设备巡检超时（秒），默认读取settings.yaml
+    :param pooled: 是否从会话池借用连接
+    :return: 巡检报告 {device_name: entry}，按完成顺序写入
+    """
+    inspect_report = {}
+    if not targets:
+        return inspect_report
+    max_workers = max(1, min(int(max_workers or MAX_WORKERS), len(targets)))
+    device_timeout = device_timeout or DEVICE_TIMEOUT
+
+    def _collect(device_name, entry):
+        inspect_report[device_name] = entry
+        if on_result:
+            try:
+                on_result(device_name, entry)
+            except Exception as e:
+                logger.error(f"设备{device_name}巡检结果回调失败：{str(e)}")
+
+    # 记录每台设备开始巡检的时间，用于单设备超时判断
+    started = {}
+
+    def _worker(device_name, target):
+        started[device_name] = time.monotonic()
+        with log_context(device=device_name):
+            if pooled:
+                return inspect_pooled(device_name, target)
+            return inspect_one(device_name, target)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inspect")
+    # 复制日志上下文（设备组/任务ID）到巡检线程
+    futures = {executor.submit(contextvars.copy_context().run, _worker, name, target): name
+               for name, target in targets.items()}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                device_name, entry = future.result()
+                _collect(device_name, entry)
+
+            # 超时设备：断开连接以中断阻塞读取，结果按超时处理
+            now = time.monotonic()
+            for future in list(pending):
+                device_name = futures[future]
+                begin = started.get(device_name)
+                if begin is None or now - begin < device_timeout:
+                    continue
+                pending.discard(future)
+                logger.error(f"设备{device_name}巡检超时（>{device_timeout}s）")
+                target = targets.get(device_name)
+                if pooled:
+                    SESSION_POOL.discard(target)
+                elif target:
+                    try:
+                        target.disconnect()
+                    except Exception:
+                        pass
+                _collect(device_name, {"status": "巡检失败", "reason": f"巡检超时（>{device_timeout}s）"})
+    finally:
+        executor.shutdown(wait=False)
     return inspect_report
 
 
+def inspect_devices(devices, on_result=None):
+    """
+    巡检设备列表（不保存报告），按settings.yaml选择巡检引擎
+    :param devices: 设备信息列表
+    :param on_result: 单设备巡检完成回调 on_result(device_name, entry)
+    :return: 巡检报告 {device_name: entry}，按设备清单顺序
+    """
+    inspect_report = {}
+
+    def _collect(device_name, entry):
+        inspect_report[device_name] = entry
+        if on_result:
+            try:
+                on_result(device_name, entry)
+            except Exception as e:
+                logger.error(f"设备{device_name}巡检结果回调失败：{str(e)}")
+
+    # 连接预检：TCP端口不可达的设备直接标记离线，只对可达设备建立SSH会话
+    reachable = devices
+    if PREFLIGHT_ENABLED:
+        reachable, offline = preflight(devices)
+        for device_name, reason in offline.items():
+            _collect(device_name, offline_entry(reason))
+
+    if ENGINE == "asyncio":
+        # asyncio引擎：单进程协程并发，可同时保持数千个会话
+        from inspect_module.async_inspect import run_async_inspect
+        inspect_report.update(run_async_inspect(reachable, on_result=on_result))
+    else:
+        if POOL_ENABLED:
+            # 会话池模式：巡检线程内借用连接，热设备免去SSH握手
+            targets = {d.get("device_name", d["ip"]): d for d in reachable}
+        else:
+            # 批量连接设备（已预检，不再重复探测）
+            targets = connect_devices(reachable, preflight_check=False)
+        # 并发执行巡检，结果按完成顺序写入报告
+        inspect_report.update(run_inspect(targets, on_result=on_result, pooled=POOL_ENABLED))
+        # 连接失败（含熔断跳过）的设备同样写入报告
+        for device in reachable:
+            device_name = device.get("device_name", device["ip"])
+            if device_name not in targets:
+                _collect(device_name, unreachable_entry(device))
+    # 按设备顺序整理报告
+    order = [d.get("device_name", d["ip"]) for d in devices]
+    return {name: inspect_report[name] for name in order if name in inspect_report}
+
+
+def batch_inspect(group_name, on_result=None, save_report=True):
+    """
+    设备组批量巡检
+    :param group_name: 设备组名
+    :param on_result: 单设备巡检完成回调 on_result(device_name, entry)
+    :param save_report: 是否保存巡检报告（调用方需要报告名时自行调用save_inspect_report）
+    """
+    with log_context(group=group_name):
+        logger.info(f"开始执行设备组 {group_name} 批量巡检")
+        # 1. 检查组名
+        if group_name not in DEVICES:
+            error_msg = f"设备组 {group_name} 不存在！可用组名：{list(DEVICES.keys())}"
+            logger.error(f"批量巡检失败：{error_msg}")
+            return {"error": error_msg}
+        # 2. 执行巡检
+        inspect_report = inspect_devices(DEVICES[group_name], on_result=on_result)
+
+        # 3. 保存巡检报告
+        if save_report:
+            save_inspect_report(inspect_report, group_name)
+        logger.info(f"设备组{group_name}批量巡检完成，共巡检{len(inspect_report)}台设备")
+        return inspect_report
+
+
+@timed(REPORT_SAVE_SECONDS, labels=lambda args, kwargs: {"group": args[1] if len(args) > 1 else kwargs.get("group_name")},
+       result=lambda name: name is not None)
 def save_inspect_report(report, group_name):
-    """保存巡检报告至本地"""
+    """
+    保存巡检报告至本地，登记报告目录并写入时序指标库
+    :return: 报告名，保存失败返回None
+    """
+    if METRICS_ENABLED:
+        try:
+            METRIC_STORE.write_report(report, group_name)
+        except Exception as e:
+            logger.error(f"写入时序指标失败：{str(e)}")
+
+    report_name = _write_report(report, group_name)
+    if report_name:
+        try:
+            REPORT_CATALOG.add_report(report_name, group_name, report)
+        except Exception as e:
+            logger.error(f"登记报告目录失败：{str(e)}")
+    return report_name
+
+
+def _write_report(report, group_name):
+    """按配置的存储方式写入报告，返回报告名"""
+    if REPORT_BACKEND == "store":
+        try:
+            report_name = REPORT_STORE.write(report, group_name)
+            logger.info(f"巡检报告已保存：{report_name}")
+            return report_name
+        except Exception as e:
+            logger.error(f"保存巡检报告失败：{str(e)}")
+            return None
+
     # 创建报告目录（绝对路径）
-    report_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inspect_report")
-    if not os.path.exists(report_dir):
-        os.makedirs(report_dir)
+    if not os.path.exists(REPORT_DIR):
+        os.makedirs(REPORT_DIR)
 
     # 生成报告文件名
     report_name = f"{group_name}_inspect_{time.strftime('%Y%m%d%H%M%S')}.json"
-    report_path = os.path.join(report_dir, report_name)
+    report_path = os.path.join(REPORT_DIR, report_name)
 
-    # 保存报告
+    # 保存报告（JSON文件逐次独立保存，写入完整数据，不写增量数据）
     try:
         with open(report_path, "w", encoding="utf-8") as f:
-            json.dump(report, f, ensure_ascii=False, indent=4)
+            json.dump({name: {k: v for k, v in entry.items() if k != "delta"} for name, entry in report.items()},
+                      f, ensure_ascii=False, indent=4)
         logger.info(f"巡检报告已保存：{report_path}")
+        return report_name
     except Exception as e:
         logger.error(f"保存巡检报告失败：{str(e)}")
+        return None
+
+
+def list_inspect_reports(group_name=None, page=1, page_size=20, warn_only=False):
+    """
+    分页查询历史巡检报告（报告目录索引），按时间倒序
+    :return: {"total": n, "page": p, "page_size": s, "items": [{report_name, group, time, devices, success, warnings}]}
+    """
+    return REPORT_CATALOG.list(group_name, page=page, page_size=page_size, warn_only=warn_only)
+
+
+@lru_cache(maxsize=REPORT_CACHE_SIZE)
+def _read_report_cached(report_name):
+    """读取并缓存存储中的原始报告（增量巡检报告含未变化标记），不存在时抛出FileNotFoundError"""
+    if report_name.endswith(".json"):
+        report_path = os.path.join(REPORT_DIR, os.path.basename(report_name))
+        if not os.path.exists(report_path):
+            raise FileNotFoundError(report_name)
+        with open(report_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    report = REPORT_STORE.read(report_name)
+    if report is None:
+        raise FileNotFoundError(report_name)
+    return report
+
+
+def _is_unchanged(value):
+    return isinstance(value, dict) and value.get("unchanged") is True
+
+
+def resolve_unchanged(report_name, report):
+    """
+    增量巡检报告中的未变化项还原为完整数据：按时间倒序查找同组历史报告中该设备该项最近一次写入的结果
+    （每full_snapshot_every次巡检写一次全量快照，回溯范围以此为界）
+    :return: 还原后的报告（新对象，不修改缓存中的原始报告）
+    """
+    pending = {(device_name, item) for device_name, entry in report.items()
+               for item, value in (entry.get("data") or {}).items() if _is_unchanged(value)}
+    if not pending:
+        return report
+    resolved = {name: dict(entry, data=dict(entry["data"])) if any(d == name for d, _ in pending) else entry
+                for name, entry in report.items()}
+    for previous in REPORT_STORE.previous(report_name, limit=max(2 * incremental.FULL_SNAPSHOT_EVERY, 48)):
+        try:
+            previous_report = _read_report_cached(previous)
+        except FileNotFoundError:
+            continue
+        for device_name, item in list(pending):
+            value = ((previous_report.get(device_name) or {}).get("data") or {}).get(item)
+            if value is not None and not _is_unchanged(value):
+                resolved[device_name]["data"][item] = value
+                pending.discard((device_name, item))
+        if not pending:
+            break
+    if pending:
+        logger.warning(f"报告{report_name}有{len(pending)}个未变化巡检项未找到历史结果")
+    return resolved
+
+
+@lru_cache(maxsize=REPORT_CACHE_SIZE)
+def _load_report_cached(report_name):
+    """读取并缓存已还原的完整报告（报告写入后不再修改），不存在时抛出FileNotFoundError"""
+    report = _read_report_cached(report_name)
+    if report_name.endswith(".json"):
+        return report
+    return resolve_unchanged(report_name, report)
+
+
+def load_inspect_report(report_name):
+    """
+    读取巡检报告，兼容旧版JSON文件
+    :return: 报告内容（缓存对象，调用方不要修改），不存在时返回None
+    """
+    try:
+        return _load_report_cached(report_name)
+    except FileNotFoundError:
+        return None
 
 
 #测试代码
@@ -0,0 +1,137 @@
+#增量巡检模块：按设备保存各巡检项回显哈希与上次解析结果，回显未变化时跳过解析，报告只写入变化项
+
+import os
+import sys
+import json
+import hashlib
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import SETTINGS
+from log.log_record import get_logger
+
+logger = get_logger(__name__, "inspect.log")
+
+# 增量巡检配置
+INCREMENTAL_SETTINGS = SETTINGS.get("inspect", {}).get("incremental", {}) or {}
+ENABLED = INCREMENTAL_SETTINGS.get("enabled", False)
+# 参与增量的巡检项（CPU/内存每次都变化，默认不参与）
+ITEMS = INCREMENTAL_SETTINGS.get("items", ["interface_status", "vlan_status"])
+# 每隔多少次巡检写一次全量快照
+FULL_SNAPSHOT_EVERY = INCREMENTAL_SETTINGS.get("full_snapshot_every", 24)
+# 设备状态目录（绝对路径）
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inspect_state")
+
+# 进程内状态缓存 {device_key: ((状态文件修改时间, 大小), state)}，
+# 状态文件被其他进程（如分片巡检的其他工作进程）更新后重新读取
+_STATE_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def output_hash(output):
+    """回显内容哈希"""
+    return hashlib.sha1(output.encode("utf-8", "replace")).hexdigest()
+
+
+def _state_path(device_key):
+    safe_name = "".join(c if c.isalnum() or c in ".-_" else "_" for c in str(device_key))
+    return os.path.join(STATE_DIR, f"{safe_name}.json")
+
+
+def _stat_key(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+def load_state(device_key):
+    """
+    读取设备上次巡检状态（缓存与状态文件一致时直接使用缓存）
+    :return: {"hashes": {item: hash}, "results": {item: result}, "runs_since_full": n}
+    """
+    path = _state_path(device_key)
+    key = _stat_key(path)
+    with _LOCK:
+        cached = _STATE_CACHE.get(device_key)
+        if cached and cached[0] == key:
+            return cached[1]
+    state = None
+    if key:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"设备 {device_key} 增量状态读取失败，按首次巡检处理：{str(e)}")
+    state = state or {"hashes": {}, "results": {}, "runs_since_full": None}
+    with _LOCK:
+        _STATE_CACHE[device_key] = (key, state)
+    return state
+
+
+def save_state(device_key, state):
+    """写入设备巡检状态（先写临时文件再替换，避免中断导致文件损坏）"""
+    if not os.path.exists(STATE_DIR):
+        os.makedirs(STATE_DIR, exist_ok=True)
+    path = _state_path(device_key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with _LOCK:
+            _STATE_CACHE[device_key] = (_stat_key(path), state)
+    except Exception as e:
+        logger.error(f"设备 {device_key} 增量状态保存失败：{str(e)}")
+
+
+def plan(device_key, outputs):
+    """
+    比对回显哈希，找出未变化的巡检项
+    :param device_key: 设备标识（IP）
+    :param outputs: {item: output}
+    :return: (未变化巡检项的上次解析结果 {item: result}, 本次回显哈希 {item: hash})
+    """
+    state = load_state(device_key)
+    hashes = {item: output_hash(outputs[item]) for item in ITEMS if outputs.get(item) is not None}
+    cached = {item: state["results"][item] for item, digest in hashes.items()
+              if state["hashes"].get(item) == digest and item in state["results"]}
+    return cached, hashes
+
+
+def _is_valid(result):
+    """解析失败的结果不参与增量缓存"""
+    if isinstance(result, list):
+        return not any(isinstance(r, dict) and "error" in r for r in result)
+    return True
+
+
+def commit(device_key, hashes, result, cached):
+    """
+    更新设备状态，并生成写入报告的数据
+    :param hashes: plan返回的本次回显哈希
+    :param result: 完整巡检结果
+    :param cached: plan返回的未变化巡检项
+    :return: 报告数据：全量快照时为完整结果，否则未变化项替换为 {"unchanged": True, "hash": ...}
+    """
+    state = load_state(device_key)
+    for item, digest in hashes.items():
+        if item in result and _is_valid(result[item]):
+            state["hashes"][item] = digest
+            state["results"][item] = result[item]
+        else:
+            state["hashes"].pop(item, None)
+            state["results"].pop(item, None)
+
+    runs = state.get("runs_since_full")
+    full = runs is None or runs + 1 >= FULL_SNAPSHOT_EVERY
+    state["runs_since_full"] = 0 if full else runs + 1
+    save_state(device_key, state)
+
+    if full or not cached:
+        return result
+    return {item: ({"unchanged": True, "hash": hashes[item]} if item in cached else value)
+            for item, value in result.items()}
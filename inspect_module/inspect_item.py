@@ -1,20 +1,17 @@
+from inspect_module.parsers import get_command, parse
+
+
 def inspect_interface(device_conn):
-    """巡检：返回宕机接口列表"""
-    cmd = "show ip interface brief" if "cisco" in device_conn.device_type else "display ip interface brief"
+    """巡检：返回宕机接口列表（三层接口，华为display ip interface brief / 思科show ip interface brief）"""
+    cmd = get_command(device_conn.device_type, "ip_interface_status")
     output = device_conn.send_command(cmd)
     # 提取宕机接口
-    down_interfaces = []
-    for line in output.split("\n"):
-        if "down" in line and "administratively down" not in line:
-            intf = line.split()[0]
-            down_interfaces.append(intf)
-    return down_interfaces
+    return [record.interface for record in parse(device_conn.device_type, "ip_interface_status", output)]
 
 def inspect_cpu(device_conn, warn_threshold=80):
-    cmd = "show processes cpu | include CPU utilization" if "cisco" in device_conn.device_type else "display cpu-usage"
+    cmd = get_command(device_conn.device_type, "cpu_usage")
     output = device_conn.send_command(cmd)
     # 提取CPU使用率
-    cpu_usage = int([x for x in output.split() if x.isdigit()][0])
+    cpu_usage = parse(device_conn.device_type, "cpu_usage", output) or 0
     is_warn = cpu_usage >= warn_threshold
     return cpu_usage, is_warn
-
@@ -0,0 +1,156 @@
+#时序指标存储模块：基于SQLite保存每台设备的CPU/内存/异常接口数，提供时间范围、降采样与Top-N查询
+
+import os
+import sys
+import time
+import sqlite3
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import SETTINGS
+
+# 指标存储配置
+METRIC_SETTINGS = SETTINGS.get("metrics", {}) or {}
+METRICS_ENABLED = METRIC_SETTINGS.get("enabled", True)
+DB_PATH = METRIC_SETTINGS.get("db_path") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "metric_store", "metrics.db")
+RETENTION_DAYS = METRIC_SETTINGS.get("retention_days", 90)
+
+# 支持的指标
+METRICS = ("cpu_usage", "memory_usage", "abnormal_interfaces")
+# Top-N支持的聚合方式
+AGGREGATES = {"avg": "AVG(value)", "max": "MAX(value)", "min": "MIN(value)"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    ts INTEGER NOT NULL,
+    grp TEXT NOT NULL,
+    device TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_device ON metrics(metric, device, ts);
+CREATE INDEX IF NOT EXISTS idx_metrics_group ON metrics(metric, grp, ts);
+CREATE INDEX IF NOT EXISTS idx_metrics_ts ON metrics(metric, ts);
+"""
+
+
+def extract_metrics(entry):
+    """
+    从报告条目提取指标
+    :return: {metric: value}，巡检失败或数据缺失时为空
+    """
+    if entry.get("status") != "巡检成功":
+        return {}
+    data = entry.get("data") or {}
+    metrics = {}
+    for item in ("cpu_usage", "memory_usage"):
+        usage = data.get(item, {}).get("usage") if isinstance(data.get(item), dict) else None
+        # -1为采集失败
+        if isinstance(usage, (int, float)) and usage >= 0:
+            metrics[item] = usage
+    interfaces = data.get("interface_status")
+    if isinstance(interfaces, list) and not any("error" in i for i in interfaces):
+        metrics["abnormal_interfaces"] = len(interfaces)
+    return metrics
+
+
+class MetricStore:
+    """SQLite时序指标存储，每个线程独立连接，WAL模式支持读写并发"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def write_report(self, report, group_name, ts=None):
+        """
+        写入一次巡检报告中所有设备的指标
+        :return: 写入行数
+        """
+        ts = int(ts or time.time())
+        rows = [(ts, group_name, device_name, metric, value)
+                for device_name, entry in report.items()
+                for metric, value in extract_metrics(entry).items()]
+        if rows:
+            conn = self._conn()
+            with conn:
+                conn.executemany("INSERT INTO metrics (ts, grp, device, metric, value) VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    @staticmethod
+    def _where(metric, device=None, group=None, start=None, end=None):
+        clauses, params = ["metric = ?"], [metric]
+        if device:
+            clauses.append("device = ?")
+            params.append(device)
+        if group:
+            clauses.append("grp = ?")
+            params.append(group)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(int(start))
+        if end is not None:
+            clauses.append("ts <= ?")
+            params.append(int(end))
+        return " AND ".join(clauses), params
+
+    def query_range(self, metric, device=None, group=None, start=None, end=None, step=None):
+        """
+        时间范围查询，可按step秒降采样
+        :return: {device: [[ts, avg, max], ...]}，未降采样时avg与max相同
+        """
+        where, params = self._where(metric, device, group, start, end)
+        if step:
+            step = max(1, int(step))
+            sql = (f"SELECT device, (ts / {step}) * {step} AS bucket, AVG(value), MAX(value) FROM metrics "
+                   f"WHERE {where} GROUP BY device, bucket ORDER BY device, bucket")
+        else:
+            sql = f"SELECT device, ts, value, value FROM metrics WHERE {where} ORDER BY device, ts"
+        series = {}
+        for device_name, ts, avg_value, max_value in self._conn().execute(sql, params):
+            series.setdefault(device_name, []).append([ts, round(avg_value, 2), max_value])
+        return series
+
+    def top_n(self, metric, n=10, group=None, start=None, end=None, agg="avg"):
+        """
+        按聚合值排序的Top-N设备
+        :return: [{"device": ..., "group": ..., "value": ...}, ...]
+        """
+        if agg not in AGGREGATES:
+            raise ValueError(f"不支持的聚合方式：{agg}（可选：{list(AGGREGATES)}）")
+        where, params = self._where(metric, group=group, start=start, end=end)
+        sql = (f"SELECT device, grp, {AGGREGATES[agg]} AS v FROM metrics WHERE {where} "
+               f"GROUP BY device, grp ORDER BY v DESC LIMIT ?")
+        return [{"device": d, "group": g, "value": round(v, 2)}
+                for d, g, v in self._conn().execute(sql, params + [int(n)])]
+
+    def purge(self, retention_days=RETENTION_DAYS):
+        """删除超过保留天数的指标"""
+        before = int(time.time() - retention_days * 86400)
+        conn = self._conn()
+        with conn:
+            return conn.execute("DELETE FROM metrics WHERE ts < ?", (before,)).rowcount
+
+
+# 全局指标存储实例
+METRIC_STORE = MetricStore()
@@ -0,0 +1,150 @@
+#巡检回显解析器注册表：按(设备类型, 巡检项)查找命令与解析器
+#表格类回显按列切分（table-driven），单值类回显用预编译正则，结果为紧凑namedtuple记录
+
+import re
+from collections import namedtuple
+
+# 解析结果记录
+InterfaceRecord = namedtuple("InterfaceRecord", ["interface", "physical_status", "protocol_status"])
+VlanRecord = namedtuple("VlanRecord", ["vlan_id", "vlan_name"])
+
+# 注册表 {(设备类型或厂商, 巡检项): 解析函数 / 命令}
+PARSERS = {}
+COMMANDS = {}
+# 未匹配到厂商时的默认厂商
+DEFAULT_VENDOR = "huawei"
+
+
+def register(vendor, item, command):
+    """
+    注册解析器装饰器
+    :param vendor: 厂商（huawei/cisco）或完整device_type（如huawei_vrpv8）
+    :param item: 巡检项，与settings.yaml中check_items一致
+    :param command: 该巡检项的查询命令
+    """
+    def decorator(func):
+        PARSERS[(vendor, item)] = func
+        COMMANDS[(vendor, item)] = command
+        return func
+    return decorator
+
+
+def vendor_of(device_type):
+    """由Netmiko device_type推断厂商"""
+    device_type = (device_type or "").lower()
+    for vendor in ("cisco", "huawei"):
+        if vendor in device_type:
+            return vendor
+    return DEFAULT_VENDOR
+
+
+def _lookup(table, device_type, item):
+    """先按完整device_type查找，再按厂商，最后按默认厂商"""
+    for key in (device_type, vendor_of(device_type), DEFAULT_VENDOR):
+        if (key, item) in table:
+            return table[(key, item)]
+    raise KeyError(f"未注册巡检项 {item} 的解析器（设备类型：{device_type}）")
+
+
+def get_command(device_type, item):
+    """获取巡检项查询命令"""
+    return _lookup(COMMANDS, device_type, item)
+
+
+def get_parser(device_type, item):
+    """获取巡检项解析器"""
+    return _lookup(PARSERS, device_type, item)
+
+
+def parse(device_type, item, output):
+    """解析巡检项回显"""
+    return get_parser(device_type, item)(output)
+
+
+def _rows(output, columns):
+    """
+    表格回显按列切分：去掉首行表头，每行最多切出columns列（其余列不拆分）
+    :return: 生成器 [col1, col2, ...]
+    """
+    return (line.split(None, columns) for line in output.strip().split("\n")[1:])
+
+
+# 华为VRP
+_HW_CPU_LINE = re.compile(r"^(?=[^\n]*CPU Usage)(?=[^\n]*5 sec)[^%\n]*?(\d+)%", re.M)
+_HW_MEMORY_LINE = re.compile(r"^(?=[^\n]*Memory Usage Ratio)[^%\n]*?(\d+)%", re.M)
+
+
+@register("huawei", "interface_status", "display interface brief")
+def parse_huawei_interface(output):
+    """返回物理或协议状态非up的接口"""
+    # 绝大多数接口为up up，先做精确比较再做大小写无关比较
+    return [InterfaceRecord(row[0], row[1], row[2]) for row in _rows(output, 3)
+            if len(row) >= 3 and (row[1] != "up" or row[2] != "up")
+            and (row[1].lower() != "up" or row[2].lower() != "up")]
+
+
+@register("huawei", "ip_interface_status", "display ip interface brief")
+def parse_huawei_ip_interface(output):
+    """返回down的三层接口，管理性关闭的接口不计入"""
+    records = []
+    for line in output.split("\n"):
+        if "down" in line and "administratively down" not in line:
+            parts = line.split()
+            records.append(InterfaceRecord(parts[0], *(parts[2:4] if len(parts) >= 4 else (None, None))))
+    return records
+
+
+@register("huawei", "cpu_usage", "display cpu-usage")
+def parse_huawei_cpu(output):
+    """返回5秒CPU使用率，未找到时返回None"""
+    match = _HW_CPU_LINE.search(output)
+    return int(match.group(1)) if match else None
+
+
+@register("huawei", "memory_usage", "display memory-usage")
+def parse_huawei_memory(output):
+    """返回内存使用率，未找到时返回None"""
+    match = _HW_MEMORY_LINE.search(output)
+    return int(match.group(1)) if match else None
+
+
+@register("huawei", "vlan_status", "display vlan brief")
+def parse_huawei_vlan(output):
+    """返回VLAN列表，跳过分隔线"""
+    return [VlanRecord(row[0], row[1]) for row in _rows(output, 2)
+            if len(row) >= 2 and "----" not in row[0]]
+
+
+# 思科IOS
+_IOS_INTERFACE_ROW = re.compile(
+    r"^(\S+)\s+(?:\d+\.\d+\.\d+\.\d+|unassigned)\s+\S+\s+\S+\s+(administratively down|\S+)\s+(\S+)[ \t]*$", re.M)
+_IOS_CPU = re.compile(r"five seconds:\s*(\d+)%")
+_IOS_MEMORY = re.compile(r"Total:\s*(\d+)\s+Used:\s*(\d+)")
+_IOS_VLAN_ROW = re.compile(r"^(\d+)\s+(\S+)", re.M)
+
+
+@register("cisco", "interface_status", "show ip interface brief")
+@register("cisco", "ip_interface_status", "show ip interface brief")
+def parse_cisco_interface(output):
+    """返回down的接口，管理性关闭的接口不计入"""
+    return [InterfaceRecord(*m) for m in _IOS_INTERFACE_ROW.findall(output)
+            if m[1] != "administratively down" and (m[1] != "up" or m[2] != "up")]
+
+
+@register("cisco", "cpu_usage", "show processes cpu | include CPU utilization")
+def parse_cisco_cpu(output):
+    match = _IOS_CPU.search(output)
+    return int(match.group(1)) if match else None
+
+
+@register("cisco", "memory_usage", "show processes memory | include Processor Pool")
+def parse_cisco_memory(output):
+    match = _IOS_MEMORY.search(output)
+    if not match or not int(match.group(1)):
+        return None
+    return int(match.group(2)) * 100 // int(match.group(1))
+
+
+@register("cisco", "vlan_status", "show vlan brief")
+def parse_cisco_vlan(output):
+    return [VlanRecord(*m) for m in _IOS_VLAN_ROW.findall(output)]
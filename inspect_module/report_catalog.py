@@ -0,0 +1,148 @@
+#巡检报告目录模块：写报告时同步登记设备组、时间、设备数、预警数，支持分页筛选查询
+
+import os
+import sys
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inspect_module.report_store import REPORT_STORE, count_warnings
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_store", "catalog.db")
+# 旧版JSON报告目录
+LEGACY_REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inspect_report")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_name TEXT PRIMARY KEY,
+    grp TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    devices INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    warnings INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_ts ON reports(ts);
+CREATE INDEX IF NOT EXISTS idx_reports_grp_ts ON reports(grp, ts);
+"""
+COLUMNS = ["report_name", "group", "time", "devices", "success", "warnings"]
+
+
+def parse_report_name(report_name):
+    """
+    由报告名解析设备组与时间，如 switch_group_a_inspect_20260101120000(.json)
+    :return: (group_name, "YYYY-mm-dd HH:MM:SS")，无法解析时返回 (None, None)
+    """
+    base = report_name[:-5] if report_name.endswith(".json") else report_name
+    group_name, sep, stamp = base.rpartition("_inspect_")
+    if not sep:
+        return None, None
+    try:
+        ts = datetime.strptime(stamp[:14], "%Y%m%d%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None, None
+    return group_name, ts
+
+
+class ReportCatalog:
+    """SQLite报告目录，首次使用时从压缩存储索引和旧版JSON文件回填"""
+
+    def __init__(self, db_path=CATALOG_PATH, legacy_dir=LEGACY_REPORT_DIR, store=REPORT_STORE):
+        self.db_path = db_path
+        self.legacy_dir = legacy_dir
+        self.store = store
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+                    if not conn.execute("SELECT 1 FROM reports LIMIT 1").fetchone():
+                        self.rebuild()
+        return conn
+
+    def add(self, report_name, group_name, ts, devices, success, warnings):
+        """登记一份报告"""
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?)",
+                         (report_name, group_name, ts, devices, success, warnings))
+
+    def add_report(self, report_name, group_name, report):
+        """根据报告内容统计后登记"""
+        _, ts = parse_report_name(report_name)
+        self.add(report_name, group_name, ts or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                 len(report),
+                 sum(1 for e in report.values() if e.get("status") == "巡检成功"),
+                 count_warnings(report))
+
+    def rebuild(self):
+        """从压缩存储索引与旧版JSON文件回填目录（已登记的报告跳过）"""
+        conn = self._conn()
+        known = {row[0] for row in conn.execute("SELECT report_name FROM reports")}
+        rows = [(e["report_name"], e["group"], e["time"], e["devices"], e["success"], e["warnings"])
+                for e in self.store.index() if e["report_name"] not in known]
+        if os.path.exists(self.legacy_dir):
+            for file_name in os.listdir(self.legacy_dir):
+                if not file_name.endswith(".json") or file_name in known:
+                    continue
+                group_name, ts = parse_report_name(file_name)
+                if not group_name:
+                    continue
+                try:
+                    with open(os.path.join(self.legacy_dir, file_name), "r", encoding="utf-8") as f:
+                        report = json.load(f)
+                except Exception:
+                    continue
+                rows.append((file_name, group_name, ts, len(report),
+                             sum(1 for e in report.values() if isinstance(e, dict) and e.get("status") == "巡检成功"),
+                             count_warnings({k: v for k, v in report.items() if isinstance(v, dict)})))
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def list(self, group_name=None, page=1, page_size=20, start=None, end=None, warn_only=False):
+        """
+        分页查询报告，按时间倒序
+        :param start/end: 时间范围，格式 YYYY-mm-dd HH:MM:SS
+        :return: {"total": n, "page": p, "page_size": s, "items": [{...}, ...]}
+        """
+        clauses, params = [], []
+        if group_name:
+            clauses.append("grp = ?")
+            params.append(group_name)
+        if start:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end:
+            clauses.append("ts <= ?")
+            params.append(end)
+        if warn_only:
+            clauses.append("warnings > 0")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        page = max(1, int(page))
+        page_size = max(1, min(int(page_size), 200))
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM reports {where}", params).fetchone()[0]
+        rows = conn.execute(f"SELECT * FROM reports {where} ORDER BY ts DESC, report_name DESC LIMIT ? OFFSET ?",
+                            params + [page_size, (page - 1) * page_size]).fetchall()
+        return {"total": total, "page": page, "page_size": page_size,
+                "items": [dict(zip(COLUMNS, row)) for row in rows]}
+
+
+# 全局报告目录实例
+REPORT_CATALOG = ReportCatalog()
@@ -0,0 +1,215 @@
+#巡检报告存储模块：追加写入的压缩分段文件 + 按设备组/时间的索引，替代逐次生成的缩进JSON文件
+
+import os
+import sys
+import json
+import gzip
+import threading
+from datetime import datetime
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 文件锁（仅类Unix系统可用，Windows下仅做进程内加锁）
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 存储目录（绝对路径）
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_store")
+INDEX_FILE = "index.jsonl"
+# 设备指标列
+COLUMNS = ["device", "status", "inspect_time", "cpu_usage", "memory_usage", "abnormal_interfaces", "vlan_count"]
+
+
+def _metric(data, item):
+    value = data.get(item)
+    if isinstance(value, dict):
+        return value.get("usage")
+    return None
+
+
+def _count(data, item):
+    value = data.get(item)
+    return len(value) if isinstance(value, list) else None
+
+
+def to_columnar(report):
+    """
+    巡检报告转为列式记录，指标列按完整数据计算，增量巡检时raw中的data写入增量数据（未变化项为标记）
+    :param report: {device_name: entry}
+    :return: {"columns": [...], "rows": [[...], ...], "raw": {device_name: 其余字段}}
+    """
+    rows, raw = [], {}
+    for device_name, entry in report.items():
+        data = entry.get("data") or {}
+        rows.append([
+            device_name,
+            entry.get("status"),
+            entry.get("inspect_time"),
+            _metric(data, "cpu_usage"),
+            _metric(data, "memory_usage"),
+            _count(data, "interface_status"),
+            _count(data, "vlan_status"),
+        ])
+        raw[device_name] = {k: v for k, v in entry.items() if k not in ("status", "inspect_time", "delta")}
+        if "delta" in entry:
+            raw[device_name]["data"] = entry["delta"]
+    return {"columns": COLUMNS, "rows": rows, "raw": raw}
+
+
+def from_columnar(record):
+    """列式记录还原为巡检报告 {device_name: entry}"""
+    report = {}
+    for row in record["rows"]:
+        values = dict(zip(record["columns"], row))
+        entry = {"status": values["status"]}
+        if values.get("inspect_time"):
+            entry["inspect_time"] = values["inspect_time"]
+        entry.update(record["raw"].get(values["device"], {}))
+        report[values["device"]] = entry
+    return report
+
+
+def count_warnings(report):
+    """统计存在预警项的设备数"""
+    warn = 0
+    for entry in report.values():
+        data = entry.get("data") or {}
+        if any(isinstance(data.get(item), dict) and data[item].get("is_warn")
+               for item in ("cpu_usage", "memory_usage")):
+            warn += 1
+        elif isinstance(data.get("interface_status"), list) and data["interface_status"]:
+            warn += 1
+    return warn
+
+
+class ReportStore:
+    """
+    巡检报告存储
+    - 每个设备组按月一个分段文件，每次巡检追加一个gzip成员（列式指标 + 原始数据）
+    - index.jsonl 追加记录报告名、设备组、时间、分段文件、偏移量与统计信息
+    """
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        self._lock = threading.Lock()
+        self._index = {}          # {report_name: index_entry}
+        self._index_offset = 0    # 已加载的索引文件字节数
+
+    def _path(self, name):
+        return os.path.join(self.store_dir, name)
+
+    def _append(self, file_name, data):
+        """追加写入并返回写入偏移量（跨进程加文件锁）"""
+        with open(self._path(file_name), "ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(data)
+                f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        return offset
+
+    def write(self, report, group_name, report_time=None):
+        """
+        写入一次巡检报告
+        :return: 报告名
+        """
+        report_time = report_time or datetime.now()
+        report_name = f"{group_name}_inspect_{report_time.strftime('%Y%m%d%H%M%S')}"
+        segment = f"{group_name}_{report_time.strftime('%Y%m')}.seg"
+        record = to_columnar(report)
+        record.update({"group": group_name, "time": report_time.strftime("%Y-%m-%d %H:%M:%S")})
+        blob = gzip.compress(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+        with self._lock:
+            if not os.path.exists(self.store_dir):
+                os.makedirs(self.store_dir, exist_ok=True)
+            # 同一秒内重复巡检时追加序号，保证报告名唯一
+            self._load_index()
+            base_name, seq = report_name, 1
+            while report_name in self._index:
+                report_name = f"{base_name}_{seq}"
+                seq += 1
+            offset = self._append(segment, blob)
+            index_entry = {
+                "report_name": report_name,
+                "group": group_name,
+                "time": record["time"],
+                "segment": segment,
+                "offset": offset,
+                "length": len(blob),
+                "devices": len(report),
+                "success": sum(1 for e in report.values() if e.get("status") == "巡检成功"),
+                "warnings": count_warnings(report)
+            }
+            self._append(INDEX_FILE, (json.dumps(index_entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        return report_name
+
+    def _load_index(self):
+        """增量加载索引文件中新追加的记录"""
+        path = self._path(INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        # 只处理完整的行，未写完的行留待下次读取
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                self._index[entry["report_name"]] = entry
+        self._index_offset += end
+
+    def index(self, group_name=None):
+        """
+        报告索引列表，按时间倒序
+        :param group_name: 按设备组筛选
+        """
+        with self._lock:
+            self._load_index()
+            entries = list(self._index.values())
+        if group_name:
+            entries = [e for e in entries if e["group"] == group_name]
+        return sorted(entries, key=lambda e: (e["time"], e["report_name"]), reverse=True)
+
+    def previous(self, report_name, limit=None):
+        """
+        同一设备组中早于该报告的报告名，按时间倒序
+        :param limit: 最多返回的报告数
+        """
+        entry = self.get_entry(report_name)
+        if not entry:
+            return []
+        key = (entry["time"], entry["report_name"])
+        names = [e["report_name"] for e in self.index(entry["group"]) if (e["time"], e["report_name"]) < key]
+        return names[:limit] if limit else names
+
+    def get_entry(self, report_name):
+        with self._lock:
+            self._load_index()
+            return self._index.get(report_name)
+
+    def read(self, report_name):
+        """
+        读取报告
+        :return: {device_name: entry}，报告不存在时返回None
+        """
+        entry = self.get_entry(report_name)
+        if not entry:
+            return None
+        with open(self._path(entry["segment"]), "rb") as f:
+            f.seek(entry["offset"])
+            blob = f.read(entry["length"])
+        return from_columnar(json.loads(gzip.decompress(blob).decode("utf-8")))
+
+
+# 全局存储实例
+REPORT_STORE = ReportStore()
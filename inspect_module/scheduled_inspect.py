@@ -1,13 +1,138 @@
+import os
+import sys
+import atexit
 import schedule
 import time
-from batch_inspect import batch_inspect,logger,INSPECT_SETTINGS
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# 添加项目根目录到路径（直接运行本脚本时），统一按包路径导入，避免同一模块被加载两份
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inspect_module.batch_inspect import (batch_inspect, inspect_devices, save_inspect_report, logger,
+                                          INSPECT_SETTINGS)
+from inspect_module.metric_store import METRIC_STORE, METRICS_ENABLED
+from connect.session_pool import SESSION_POOL
+from log.metrics import REGISTRY
+
+# 全量巡检模式：serial逐组巡检（本进程会话池跨轮次复用，热设备免去SSH握手），
+# sharded多进程分片并发（会话池在各子进程内，分片不固定分配给同一子进程，基本无法跨轮次复用会话）
+SWEEP_MODE = INSPECT_SETTINGS.get("sweep_mode", "serial")
+# 进程数（0为CPU核数）、每个分片的设备数
+SWEEP_PROCESSES = INSPECT_SETTINGS.get("processes", 0) or os.cpu_count() or 1
+SHARD_SIZE = INSPECT_SETTINGS.get("shard_size", 50)
+
+
+def split_shards(devices, shard_size=SHARD_SIZE):
+    """
+    将全量设备清单切分为分片
+    :param devices: {group_name: [device_info, ...]}
+    :return: [(group_name, [device_info, ...]), ...]
+    """
+    shard_size = max(1, int(shard_size))
+    return [(group_name, group_devices[i:i + shard_size])
+            for group_name, group_devices in devices.items()
+            for i in range(0, len(group_devices), shard_size)]
+
+
+def _init_worker():
+    """子进程初始化：丢弃继承自父进程的埋点，进程退出时关闭本进程会话池中的会话"""
+    REGISTRY.drain()
+    from multiprocessing import util
+    util.Finalize(None, SESSION_POOL.close_all, exitpriority=100)
+
+
+def inspect_shard(shard):
+    """子进程：并发巡检一个分片，返回分片报告与本分片的性能埋点"""
+    group_name, devices = shard
+    return group_name, inspect_devices(devices), REGISTRY.drain()
+
+
+# 分片巡检进程池：跨轮次复用，调度进程退出时关闭（子进程退出时关闭各自的会话）
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_executor(processes):
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker)
+        return _EXECUTOR
+
+
+def _discard_executor(executor):
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is executor:
+            _EXECUTOR = None
+
+
+def shutdown_executor():
+    """关闭分片巡检进程池"""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+    if executor:
+        executor.shutdown(wait=True)
+
+
+atexit.register(shutdown_executor)
+
+
+def sharded_inspect(devices, processes=SWEEP_PROCESSES, shard_size=SHARD_SIZE):
+    """
+    多进程分片巡检：分片分发到进程池，各进程内并发巡检，结果按设备组合并保存
+    :param devices: {group_name: [device_info, ...]}
+    :return: {group_name: 巡检报告}
+    """
+    shards = split_shards(devices, shard_size)
+    merged = {group_name: {} for group_name in devices}
+    logger.info(f"【定时巡检】分片巡检：{len(shards)}个分片，{processes}个进程")
+    executor = _get_executor(processes)
+    futures = {executor.submit(inspect_shard, shard): shard for shard in shards}
+    for future in as_completed(futures):
+        group_name, shard_devices = futures[future]
+        try:
+            _, report, metrics = future.result()
+            # 子进程埋点汇总到本进程，供性能指标查看
+            REGISTRY.merge(metrics)
+        except Exception as e:
+            logger.error(f"设备组{group_name}分片巡检失败：{str(e)}")
+            if isinstance(e, BrokenProcessPool):
+                # 子进程异常退出后进程池不可再用，下一轮重建
+                _discard_executor(executor)
+            report = {d.get("device_name", d["ip"]): {"status": "巡检失败", "reason": str(e)}
+                      for d in shard_devices}
+        merged[group_name].update(report)
+
+    # 按设备清单顺序合并为各组报告
+    for group_name, group_devices in devices.items():
+        report = merged[group_name]
+        order = [d.get("device_name", d["ip"]) for d in group_devices]
+        merged[group_name] = {name: report[name] for name in order if name in report}
+        save_inspect_report(merged[group_name], group_name)
+    return merged
+
 
 def scheduled_inspect():
     """定时巡检任务：巡检所有设备组"""
     logger.info("【定时巡检】开始执行全设备组巡检")
     from config.config_read import DEVICES
-    for group_name in DEVICES.keys():
-        batch_inspect(group_name)
+    # 取当前设备清单（devices.yaml修改后下一轮巡检自动生效，本轮不受影响）
+    devices = DEVICES.snapshot()
+    if SWEEP_MODE == "sharded":
+        sharded_inspect(devices)
+    else:
+        for group_name in devices.keys():
+            batch_inspect(group_name)
+    # 清理超过保留期的时序指标
+    if METRICS_ENABLED:
+        try:
+            METRIC_STORE.purge()
+        except Exception as e:
+            logger.error(f"清理时序指标失败：{str(e)}")
     logger.info("【定时巡检】全设备组巡检执行完成")
 
 # 启动定时任务
@@ -18,4 +143,4 @@ if __name__ == "__main__":
     # 保持任务运行
     while True:
         schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+        time.sleep(1)
@@ -1,41 +1,227 @@
-import logging
+#统一日志模块：各模块日志经队列交给后台线程写文件/控制台，调用线程不阻塞在磁盘IO上
 import os
-from logging.handlers import TimedRotatingFileHandler
+import json
+import time
+import queue
+import atexit
+import logging
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 from config.config_read import SETTINGS
 
 # 日志配置
 LOG_SETTINGS = SETTINGS["log"]
-LOG_PATH = LOG_SETTINGS["path"]
+# 相对路径按项目根目录解析，保证各模块日志写入同一目录
+LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), LOG_SETTINGS["path"])
 LOG_LEVEL = getattr(logging, LOG_SETTINGS["level"])
+# 轮转：按时间（when）与单文件大小（max_bytes）任一条件触发
+ROTATE_WHEN = LOG_SETTINGS.get("when", "midnight")
+MAX_BYTES = LOG_SETTINGS.get("max_bytes", 50 * 1024 * 1024)
+BACKUP_COUNT = LOG_SETTINGS.get("backup_count", 7)
+# 结构化日志文件（JSON Lines），为空时不写
+JSON_FILE = LOG_SETTINGS.get("json_file", "net_automation.jsonl")
 
 # 创建日志目录
 if not os.path.exists(LOG_PATH):
     os.makedirs(LOG_PATH)
 
-# 定义日志格式
-fmt = "%(asctime)s - %(filename)s[line:%(lineno)d] - %(levelname)s: %(message)s"
+# 定义日志格式（末尾附带设备/设备组/任务上下文）
+fmt = "%(asctime)s - %(levelname)s - %(filename)s[line:%(lineno)d] - %(message)s%(context)s"
 formatter = logging.Formatter(fmt)
 
+# 日志上下文：设备、设备组、后台任务ID
+DEVICE_ID = contextvars.ContextVar("device_id", default=None)
+GROUP_ID = contextvars.ContextVar("group_id", default=None)
+JOB_ID = contextvars.ContextVar("job_id", default=None)
+_CONTEXT_VARS = (("device", DEVICE_ID), ("group", GROUP_ID), ("job", JOB_ID))
+
+
+@contextmanager
+def log_context(device=None, group=None, job=None):
+    """
+    设置日志上下文，范围内记录的日志自动带上对应ID
+    注意：线程池任务不继承上下文，需在任务函数内设置或用contextvars.copy_context().run提交
+    """
+    tokens = [(var, var.set(value)) for value, (_, var) in zip((device, group, job), _CONTEXT_VARS)
+              if value is not None]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """在记录日志的线程中取出上下文，写入日志记录"""
+
+    def __init__(self, log_file=None):
+        super().__init__()
+        self.log_file = log_file
+
+    def filter(self, record):
+        context = []
+        for key, var in _CONTEXT_VARS:
+            value = var.get()
+            setattr(record, key, value)
+            if value is not None:
+                context.append(f"{key}={value}")
+        record.context = f" [{' '.join(context)}]" if context else ""
+        record.log_file = self.log_file
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """结构化日志：每条日志一行JSON"""
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "message": record.getMessage(),
+            "log_file": getattr(record, "log_file", None),
+        }
+        for key, _ in _CONTEXT_VARS:
+            value = getattr(record, key, None)
+            if value is not None:
+                data[key] = value
+        return json.dumps(data, ensure_ascii=False)
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """按时间轮转，单文件超过max_bytes时提前轮转（同一周期内多次轮转的文件追加序号）"""
+
+    def __init__(self, filename, max_bytes=MAX_BYTES, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes and self.stream is not None:
+            self.stream.seek(0, os.SEEK_END)
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        # 大小触发的轮转不推进时间轮转点
+        rollover_at = self.rolloverAt
+        super().doRollover()
+        if int(time.time()) < rollover_at:
+            self.rolloverAt = rollover_at
+
+    def rotation_filename(self, default_name):
+        # 默认实现会覆盖同名的已轮转文件，这里追加序号保留
+        name, seq = default_name, 1
+        while os.path.exists(name):
+            name = f"{default_name}.{seq}"
+            seq += 1
+        return name
+
+
+def _file_handler(file_name, log_formatter):
+    handler = SizedTimedRotatingFileHandler(
+        filename=os.path.join(LOG_PATH, file_name),
+        when=ROTATE_WHEN,
+        backupCount=BACKUP_COUNT,
+        encoding="utf-8"
+    )
+    handler.setFormatter(log_formatter)
+    return handler
+
+
+class _FileRouter(logging.Handler):
+    """在后台线程中按日志记录的log_file分发到对应的文件处理器（按需创建）"""
+
+    def __init__(self):
+        super().__init__()
+        self.handlers = {}
+
+    def emit(self, record):
+        file_name = getattr(record, "log_file", None) or "net_automation.log"
+        handler = self.handlers.get(file_name)
+        if handler is None:
+            handler = self.handlers[file_name] = _file_handler(file_name, formatter)
+        handler.handle(record)
+
+    def close(self):
+        for handler in self.handlers.values():
+            handler.close()
+        super().close()
+
+
+# 全局日志队列与后台写日志线程
+_QUEUE = queue.SimpleQueue()
+_QUEUE_HANDLERS = []
+
+
+def _build_listener():
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler, _FileRouter()]
+    if JSON_FILE:
+        handlers.append(_file_handler(JSON_FILE, JsonFormatter()))
+    return QueueListener(_QUEUE, *handlers, respect_handler_level=True)
+
+
+_LISTENER = _build_listener()
+_LISTENER.start()
+
+
+def stop_logging():
+    """停止后台线程并写完队列中剩余日志（程序退出时自动调用）"""
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        for handler in _LISTENER.handlers:
+            handler.close()
+        _LISTENER = None
+
+
+atexit.register(stop_logging)
+
+
+def _after_fork_in_child():
+    """子进程（如分片巡检进程池）中重建队列与后台线程，父进程的线程不会被复制"""
+    global _QUEUE, _LISTENER
+    _QUEUE = queue.SimpleQueue()
+    for handler in _QUEUE_HANDLERS:
+        handler.queue = _QUEUE
+    _LISTENER = _build_listener()
+    _LISTENER.start()
+    # 进程池子进程退出时不执行atexit，借助multiprocessing的退出回调写完剩余日志
+    from multiprocessing import util
+    util.Finalize(None, stop_logging, exitpriority=100)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_logger(name, log_file="net_automation.log", level=LOG_LEVEL):
+    """
+    获取接入统一日志管道的日志器
+    :param name: 日志器名称（一般为模块__name__）
+    :param log_file: 写入的日志文件名（位于日志目录下）
+    :return: logging.Logger
+    """
+    log = logging.getLogger(name)
+    if not any(isinstance(h, QueueHandler) for h in log.handlers):
+        handler = QueueHandler(_QUEUE)
+        handler.addFilter(ContextFilter(log_file))
+        _QUEUE_HANDLERS.append(handler)
+        log.addHandler(handler)
+        log.setLevel(level)
+        log.propagate = False
+    return log
+
+
 # 初始化日志器
-logger = logging.getLogger("net_automation")
-logger.setLevel(LOG_LEVEL)
-logger.handlers.clear()
-
-# 1. 控制台日志处理器
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
-# 2. 文件日志处理器,保留7天
-file_handler = TimedRotatingFileHandler(
-    filename=os.path.join(LOG_PATH, "net_automation.log"),
-    when="D",
-    interval=1,
-    backupCount=7,
-    encoding="utf-8"
-)
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+logger = get_logger("net_automation")
+
 
 # 全局异常装饰器
 def exception_catch(func):
@@ -46,4 +232,4 @@ def exception_catch(func):
         except Exception as e:
             logger.error(f"函数{func.__name__}执行异常：{str(e)}", exc_info=True)
             raise e
-    return wrapper
\ No newline at end of file
+    return wrapper
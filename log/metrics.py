@@ -0,0 +1,266 @@
+#性能埋点模块：计数器/直方图/仪表盘，记录连接、命令执行、解析、配置下发与报告写入耗时，导出Prometheus文本格式
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+from log.log_record import GROUP_ID
+
+# 直方图默认分桶（秒），覆盖毫秒级解析到分钟级巡检
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _label_key(labelnames, labels):
+    # 设备组默认取日志上下文中的设备组
+    if "group" in labelnames and labels.get("group") is None:
+        labels["group"] = GROUP_ID.get()
+    return tuple(str(labels.get(name) if labels.get(name) is not None else "-") for name in labelnames)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class Counter(_Metric):
+    """计数器"""
+    kind = "counter"
+
+    def inc(self, value=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in sorted(self.samples().items())]
+
+
+class Gauge(_Metric):
+    """仪表盘（记录最近一次的值）"""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in sorted(self.samples().items())]
+
+
+class Histogram(_Metric):
+    """直方图：各分桶计数 + 总和 + 次数"""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [各分桶计数（最后一个为+Inf）, 总和, 次数]
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文，异常时result标签记为error"""
+        start = time.perf_counter()
+        try:
+            yield labels
+        except Exception:
+            if "result" in self.labelnames:
+                labels["result"] = "error"
+            raise
+        finally:
+            if "result" in self.labelnames:
+                labels.setdefault("result", "ok")
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            return {key: [list(series[0]), series[1], series[2]] for key, series in self._values.items()}
+
+    def quantile(self, q, counts):
+        """按分桶估算分位数（取所在分桶上界）"""
+        total = sum(counts)
+        if not total:
+            return None
+        target, running = q * total, 0
+        for index, count in enumerate(counts):
+            running += count
+            if running >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def render(self):
+        lines = []
+        for key, (counts, total, count) in sorted(self.samples().items()):
+            running = 0
+            for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+                running += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {round(total, 6)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        """Prometheus文本格式"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def drain(self):
+        """
+        取出并清空全部指标值（分片巡检子进程把本分片的埋点交给父进程汇总）
+        :return: {metric_name: {label_key: value}}
+        """
+        drained = {}
+        for metric in list(self._metrics.values()):
+            with metric._lock:
+                drained[metric.name] = metric._values
+                metric._values = {}
+        return drained
+
+    def merge(self, drained):
+        """合并drain()的结果：计数器与直方图累加，仪表盘取新值"""
+        for name, values in drained.items():
+            metric = self._metrics.get(name)
+            if metric is None:
+                continue
+            with metric._lock:
+                for key, value in values.items():
+                    if isinstance(metric, Counter):
+                        metric._values[key] = metric._values.get(key, 0) + value
+                    elif isinstance(metric, Histogram):
+                        series = metric._values.setdefault(key, [[0] * (len(metric.buckets) + 1), 0.0, 0])
+                        series[0] = [a + b for a, b in zip(series[0], value[0])]
+                        series[1] += value[1]
+                        series[2] += value[2]
+                    else:
+                        metric._values[key] = value
+
+    def snapshot(self):
+        """
+        直方图汇总，供命令行查看
+        :return: [{"metric", "labels", "count", "total", "avg", "p95"}, ...]，按总耗时倒序
+        """
+        rows = []
+        for metric in list(self._metrics.values()):
+            if not isinstance(metric, Histogram):
+                continue
+            for key, (counts, total, count) in metric.samples().items():
+                if not count:
+                    continue
+                rows.append({
+                    "metric": metric.name,
+                    "labels": dict(zip(metric.labelnames, key)),
+                    "count": count,
+                    "total": round(total, 3),
+                    "avg": round(total / count, 4),
+                    "p95": metric.quantile(0.95, counts)
+                })
+        return sorted(rows, key=lambda r: r["total"], reverse=True)
+
+
+def timed(histogram, labels=None, result=None):
+    """
+    函数耗时埋点装饰器
+    :param histogram: 记录耗时的直方图
+    :param labels: labels(args, kwargs) -> 标签字典
+    :param result: result(返回值) -> 是否成功，用于本项目中失败时返回None/False而非抛异常的函数
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                ret = func(*args, **kwargs)
+                outcome = "ok" if result is None or result(ret) else "error"
+                return ret
+            finally:
+                metric_labels = labels(args, kwargs) if labels else {}
+                if "result" in histogram.labelnames:
+                    metric_labels["result"] = outcome
+                histogram.observe(time.perf_counter() - start, **metric_labels)
+        return wrapper
+    return decorator
+
+
+def conn_device_type(conn):
+    """连接对象的设备类型"""
+    return getattr(conn, "device_type", None)
+
+
+# 全局注册表与热点路径指标
+REGISTRY = Registry()
+CONNECT_SECONDS = REGISTRY.histogram(
+    "netauto_connect_seconds", "SSH连接与登录耗时（含重试）", ("device_type", "group", "result"))
+COMMAND_SECONDS = REGISTRY.histogram(
+    "netauto_command_seconds", "设备命令执行与回显读取耗时", ("device_type", "item", "group"))
+INSPECT_ITEM_SECONDS = REGISTRY.histogram(
+    "netauto_inspect_item_seconds", "单项巡检耗时（含命令执行与解析）", ("device_type", "item", "group", "result"))
+INSPECT_DEVICE_SECONDS = REGISTRY.histogram(
+    "netauto_inspect_device_seconds", "单设备巡检总耗时", ("device_type", "group", "result"))
+DEVICE_INSPECT_TOTAL = REGISTRY.counter(
+    "netauto_device_inspect_total", "设备巡检次数", ("device_type", "group", "result"))
+DEVICE_LAST_SECONDS = REGISTRY.gauge(
+    "netauto_device_inspect_last_seconds", "各设备最近一次巡检耗时，用于定位慢设备", ("device", "group"))
+SEND_CONFIG_SECONDS = REGISTRY.histogram(
+    "netauto_send_config_seconds", "配置下发耗时", ("device_type", "group", "result"))
+REPORT_SAVE_SECONDS = REGISTRY.histogram(
+    "netauto_report_save_seconds", "巡检报告保存耗时（含指标库与报告目录）", ("group", "result"))
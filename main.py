@@ -33,26 +33,27 @@ except ImportError as e:
         }
 
 
+# 3. 配置备份模块导包
+try:
+    from backup.config_backup import batch_backup
+    from backup.config_store import CONFIG_STORE
+except ImportError as e:
+    CONFIG_STORE = None
+
+    # 占位函数
+    def batch_backup(group_names=None, **kwargs):
+        return {
+            "error": f"配置备份模块导入失败：{str(e)}，请检查 backup 下的文件"
+        }
+
+
 # 统一日志模块
 def init_main_logger():
-    #初始化全局日志
-    import logging
-    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(os.path.join(log_dir, "main.log"), 'a', encoding="utf-8"),
-            logging.StreamHandler()
-        ]
-    )
-    return logging.getLogger(__name__)
-
-
-# 全局日志实例,整个程序都使用此实例对象
+    #初始化全局日志，经统一日志队列异步写入 logs/main.log
+    from log.log_record import get_logger
+    return get_logger("main", "main.log")
+
+
 logger = init_main_logger()
 
 
@@ -135,6 +136,8 @@ def show_menu():
 ║  2. 设备组单次巡检                                               ║
 ║  3. 启动定时巡检服务                                             ║
 ║  4. 启动Web可视化界面                                            ║
+║  5. 查看性能指标                                                 ║
+║  6. 设备配置备份                                                 ║
 ║  0. 退出系统                                                    ║
 ╚═══════════════════════════════════════════════════════════════╝
     """
@@ -160,12 +163,17 @@ if __name__ == "__main__":
                     print("错误：配置模板名不能为空！")
                     continue
                 tpl_kwargs_str = input("请输入模板参数（如{'vlan_id':10, 'vlan_name':'IT'}）：").strip()
+                var_matrix = input("请输入变量矩阵文件名（可选，如vlan_matrix.csv，直接回车跳过）：").strip() or None
+                diff = input("是否只下发与运行配置的差异（y/N）：").strip().lower() == "y"
 
                 # 安全解析参数
                 tpl_kwargs = ast.literal_eval(tpl_kwargs_str) if tpl_kwargs_str else {}
+                if not isinstance(tpl_kwargs, dict):
+                    raise SyntaxError("模板参数必须为字典")
 
-                logger.info(f"开始批量配置：设备组{group_name}，模板{tpl_name}，参数{tpl_kwargs}")
-                result = batch_config(group_name, tpl_name, **tpl_kwargs)
+                logger.info(f"开始批量配置：设备组{group_name}，模板{tpl_name}，参数{tpl_kwargs}，变量矩阵{var_matrix}")
+                result = batch_config(group_name, tpl_name, tpl_params=tpl_kwargs,
+                                      rollout_options={"diff": True} if diff else None, var_matrix=var_matrix)
 
                 print("\n批量配置结果：")
                 for k, v in result.items():
@@ -257,6 +265,56 @@ if __name__ == "__main__":
                 logger.error(f"启动Web服务失败：{str(e)}")
                 print(f"启动失败：{str(e)}")
 
+        elif choice == "5":
+            # 5. 查看本进程内的性能埋点汇总（按总耗时倒序）
+            try:
+                from log.metrics import REGISTRY
+                rows = REGISTRY.snapshot()
+                if not rows:
+                    print("暂无性能数据，请先执行巡检或配置")
+                    continue
+                print(f"\n{'指标':<32}{'次数':>8}{'平均(s)':>10}{'P95(s)':>8}  标签")
+                for row in rows[:30]:
+                    labels = ", ".join(f"{k}={v}" for k, v in row["labels"].items() if v != "-")
+                    print(f"{row['metric']:<32}{row['count']:>8}{row['avg']:>10}{row['p95']:>8}  {labels}")
+            except Exception as e:
+                logger.error(f"查看性能指标失败：{str(e)}")
+                print(f"查看失败：{str(e)}")
+
+        elif choice == "6":
+            # 6. 配置备份：并发采集运行配置，未变化的配置不重复存储
+            try:
+                group_names = input("请输入要备份的设备组（逗号分隔，直接回车备份全部设备组）：").strip()
+                group_names = [g.strip() for g in group_names.split(",") if g.strip()]
+                logger.info(f"开始配置备份：设备组{group_names or '全部'}")
+                result = batch_backup(group_names)
+                if result.get("error"):
+                    print(f"备份失败：{result['error']}")
+                    continue
+                print(f"\n配置备份完成：共{result['total']}台，成功{result['success']}台"
+                      f"（配置变化{len(result['changed'])}台，未变化{len(result['unchanged'])}台），"
+                      f"失败{len(result['failed'])}台，耗时{result['elapsed']}s")
+                for dev_name in result["changed"]:
+                    print(f"  配置变化：{dev_name}")
+                for dev_name in result["failed"]:
+                    print(f"  备份失败：{dev_name}，原因：{result['devices'][dev_name]['reason']}")
+                logger.info(f"配置备份完成：成功{result['success']}台，失败{len(result['failed'])}台")
+
+                # 查看设备配置历史与最近一次变化
+                dev_name = input("请输入要查看配置历史的设备名（直接回车跳过）：").strip()
+                if dev_name and CONFIG_STORE:
+                    history = CONFIG_STORE.history(dev_name)
+                    if not history:
+                        print("该设备无备份记录")
+                        continue
+                    for index, entry in enumerate(history[:10]):
+                        print(f"  [{index}] {entry['time']}  {entry['hash'][:12]}  {entry['lines']}行")
+                    if len(history) > 1:
+                        print(CONFIG_STORE.diff(dev_name) or "最近两个版本无差异")
+            except Exception as e:
+                logger.error(f"配置备份失败：{str(e)}")
+                print(f"备份失败：{str(e)}")
+
         elif choice == "0":
             # 0. 退出系统
             logger.info("【系统退出】Python网络自动化运维系统停止运行")
@@ -264,5 +322,5 @@ if __name__ == "__main__":
             sys.exit(0)
 
         else:
-            print("输入错误，请重新输入有效的编号（0-4）！")
+            print("输入错误，请重新输入有效的编号（0-6）！")
         print("\n" + "-" * 60 + "\n")
\ No newline at end of file
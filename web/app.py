@@ -3,16 +3,29 @@
 import os
 import sys
 import json
+import hmac
+import functools
 from datetime import datetime
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response
 # 导入核心功能模块
-from inspect_module.batch_inspect import batch_inspect
+from inspect_module.batch_inspect import (batch_inspect, save_inspect_report,
+                                          list_inspect_reports, load_inspect_report)
 from configure.batch_configuration import batch_config
+from configure.device_vars import list_matrices
+from backup.config_backup import batch_backup, backup_targets
+from backup.config_store import CONFIG_STORE, mask_secrets
+from connect.session_pool import SESSION_POOL
+from connect.resilience import RESILIENCE, CLOSED, OPEN, HALF_OPEN
+from inspect_module.metric_store import METRIC_STORE, METRICS
 from log.log_record import logger  # 如果有独立日志模块就用，否则用内置日志
+from config.config_read import INVENTORY, SETTINGS
+from web.jobs import JOB_MANAGER
+from web import log_viewer
+from log.metrics import REGISTRY
 
 # 初始化Flask应用
 app = Flask(__name__,
@@ -35,6 +48,32 @@ for dir_path in [INSPECT_REPORT_DIR, CONFIG_TPL_DIR, LOG_DIR]:
         os.makedirs(dir_path)
 
 
+# 恢复熔断设备的管理口令：为空时只允许本机访问
+ADMIN_TOKEN = str((SETTINGS.get("web") or {}).get("admin_token") or "")
+LOCAL_ADDRS = ("127.0.0.1", "::1")
+
+
+def admin_required(func):
+    """管理接口鉴权（GET请求不校验）：请求头X-Admin-Token或表单admin_token与web.admin_token一致，未配置口令时只允许本机访问"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if request.method == "GET":
+            return func(*args, **kwargs)
+        client = request.remote_addr
+        if ADMIN_TOKEN:
+            token = request.headers.get("X-Admin-Token") or request.form.get("admin_token") or ""
+            allowed = hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+        else:
+            allowed = client in LOCAL_ADDRS
+        if not allowed:
+            logger.warning(f"拒绝未授权的变更请求：{request.method} {request.path}，来源 {client}")
+            return jsonify({"status": "error", "message": "未授权：需要管理口令（web.admin_token）"}), 403
+        logger.info(f"变更请求：{request.method} {request.path}，来源 {client}，"
+                    f"User-Agent：{request.headers.get('User-Agent', '-')}")
+        return func(*args, **kwargs)
+    return wrapper
+
+
 #页面路由
 @app.route('/')
 def index():
@@ -53,32 +92,10 @@ def index():
 
 @app.route('/inspect', methods=['GET', 'POST'])
 def inspect_page():
-    """设备巡检"""
+    """设备巡检（POST提交后台任务，返回任务ID）"""
     if request.method == 'POST':
-        # 执行巡检
-        group_name = request.form.get('group_name')
-        if not group_name:
-            return jsonify({"status": "error", "message": "请选择设备组"})
-
-        try:
-            # 执行批量巡检
-            result = batch_inspect(group_name)
-            # 保存巡检结果（同步本地报告）
-            report_name = f"{group_name}_inspect_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
-            report_path = os.path.join(INSPECT_REPORT_DIR, report_name)
-            with open(report_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=4)
-
-            logger.info(f"Web端执行巡检：{group_name}，结果已保存至 {report_name}")
-            return jsonify({
-                "status": "success",
-                "group_name": group_name,
-                "result": result,
-                "report_name": report_name
-            })
-        except Exception as e:
-            logger.error(f"Web端巡检失败：{str(e)}")
-            return jsonify({"status": "error", "message": str(e)})
+        # 兼容原有的表单提交：改为提交后台巡检任务，不在请求内执行巡检
+        return submit_inspect_job()
 
     # GET请求：查看巡检页面
     try:
@@ -86,45 +103,39 @@ def inspect_page():
         group_names = list(DEVICES.keys()) if isinstance(DEVICES, dict) else []
     except:
         group_names = ["switch_group_a", "router_group_b"]
-    # 获取历史巡检报告
-    report_files = []
-    if os.path.exists(INSPECT_REPORT_DIR):
-        report_files = [f for f in os.listdir(INSPECT_REPORT_DIR) if f.endswith('.json')]
-        report_files.sort(reverse=True)  # 按时间倒序
+    # 历史巡检报告：报告目录分页筛选（按时间倒序）
+    filter_group = request.args.get('group') or None
+    warn_only = request.args.get('warn_only') == '1'
+    reports = list_inspect_reports(filter_group,
+                                   page=request.args.get('page', 1, type=int),
+                                   page_size=request.args.get('page_size', 10, type=int),
+                                   warn_only=warn_only)
+    total_pages = max(1, (reports["total"] + reports["page_size"] - 1) // reports["page_size"])
 
     return render_template('inspect.html',
                            group_names=group_names,
-                           report_files=report_files[:10])  # 只显示最近10个报告
+                           reports=reports,
+                           total_pages=total_pages,
+                           filter_group=filter_group,
+                           warn_only=warn_only)
+
+
+@app.route('/api/reports')
+def reports_api():
+    """报告目录分页查询：?group=&page=1&page_size=20&warn_only=1"""
+    return jsonify({"status": "success",
+                    **list_inspect_reports(request.args.get('group') or None,
+                                           page=request.args.get('page', 1, type=int),
+                                           page_size=request.args.get('page_size', 20, type=int),
+                                           warn_only=request.args.get('warn_only') == '1')})
 
 
 @app.route('/config', methods=['GET', 'POST'])
 def config_page():
-    """批量配置"""
+    """批量配置（POST提交后台任务，返回任务ID）"""
     if request.method == 'POST':
-        # 执行批量配置
-        group_name = request.form.get('group_name')
-        tpl_name = request.form.get('tpl_name')
-        tpl_params = request.form.get('tpl_params')
-
-        if not group_name or not tpl_name:
-            return jsonify({"status": "error", "message": "设备组和模板名不能为空"})
-
-        try:
-            # 安全解析模板参数
-            import ast
-            tpl_kwargs = ast.literal_eval(tpl_params) if tpl_params else {}
-            # 执行批量配置
-            result = batch_config(group_name, tpl_name, **tpl_kwargs)
-
-            logger.info(f"Web端执行配置：{group_name}，模板{tpl_name}，参数{tpl_kwargs}")
-            return jsonify({
-                "status": "success",
-                "group_name": group_name,
-                "result": result
-            })
-        except Exception as e:
-            logger.error(f"Web端配置失败：{str(e)}")
-            return jsonify({"status": "error", "message": str(e)})
+        # 兼容原有的表单提交：改为提交后台配置任务，不在请求内执行配置
+        return submit_config_job()
 
     # GET请求：展示配置页面
     try:
@@ -140,48 +151,385 @@ def config_page():
 
     return render_template('config.html',
                            group_names=group_names,
-                           tpl_files=tpl_files)
+                           tpl_files=tpl_files,
+                           matrix_files=list_matrices())
+
+
+def _log_filters():
+    """日志过滤参数：级别、设备、关键字"""
+    return {"level": request.args.get('level') or None,
+            "device": request.args.get('device') or None,
+            "keyword": request.args.get('keyword') or None}
 
 
 @app.route('/logs')
 def logs_page():
-    """日志查看"""
-    log_files = []
-    if os.path.exists(LOG_DIR):
-        log_files = [f for f in os.listdir(LOG_DIR) if f.endswith('.log')]
-
+    """日志查看：从文件末尾反向读取，before为向前翻页游标"""
+    log_files = log_viewer.list_log_files(LOG_DIR)
     # 默认显示main.log
-    log_content = ""
     selected_log = request.args.get('log_file', 'main.log')
-    log_path = os.path.join(LOG_DIR, selected_log)
-
-    if os.path.exists(log_path):
-        # 避免日志过大,只显示最后100行
-        with open(log_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            log_content = ''.join(lines[-100:])
+    filters = _log_filters()
+    log_path = log_viewer.resolve_log(LOG_DIR, selected_log)
+    page = {"records": [], "cursor": None, "size": 0}
+    if log_path:
+        page = log_viewer.read_page(log_path, before=request.args.get('before', type=int),
+                                    limit=request.args.get('limit', 100, type=int), **filters)
 
     return render_template('logs.html',
                            log_files=log_files,
                            selected_log=selected_log,
-                           log_content=log_content)
+                           log_content="\n".join(page["records"]),
+                           cursor=page["cursor"],
+                           filters=filters,
+                           levels=list(log_viewer.LEVELS))
+
+
+@app.route('/api/logs')
+def api_logs():
+    """日志分页查询接口：?log_file=&before=&limit=&level=&device=&keyword="""
+    log_path = log_viewer.resolve_log(LOG_DIR, request.args.get('log_file', 'main.log'))
+    if not log_path:
+        return jsonify({"status": "error", "message": "日志文件不存在"}), 404
+    page = log_viewer.read_page(log_path, before=request.args.get('before', type=int),
+                                limit=max(1, min(request.args.get('limit', 100, type=int), 1000)),
+                                **_log_filters())
+    return jsonify({"status": "success", **page})
+
+
+@app.route('/logs/stream')
+def logs_stream():
+    """日志实时跟踪（SSE）：新增日志按过滤条件逐行推送"""
+    log_path = log_viewer.resolve_log(LOG_DIR, request.args.get('log_file', 'main.log'))
+    if not log_path:
+        return jsonify({"status": "error", "message": "日志文件不存在"}), 404
+    filters = _log_filters()
+
+    def generate():
+        for line in log_viewer.follow(log_path, **filters):
+            if line is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield _sse("line", {"line": line})
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.route('/report/<report_name>')
 def view_report(report_name):
     """查看历史巡检报告"""
-    report_path = os.path.join(INSPECT_REPORT_DIR, report_name)
-    if not os.path.exists(report_path):
+    report_data = load_inspect_report(report_name)
+    if report_data is None:
         return jsonify({"status": "error", "message": "报告文件不存在"})
 
-    with open(report_path, 'r', encoding='utf-8') as f:
-        report_data = json.load(f)
-
     return render_template('report_view.html',
                            report_name=report_name,
                            report_data=report_data)
 
 
+#后台任务
+def _group_size(group_name):
+    """设备组设备数，用于任务进度"""
+    try:
+        from config.config_read import DEVICES
+        return len(DEVICES.get(group_name, []))
+    except Exception:
+        return 0
+
+
+def _submit_inspect_job(group_name):
+    """提交巡检任务，每台设备巡检完成即记录一个事件（由/jobs/<job_id>/stream推送）；返回 (job, 是否复用已有任务)"""
+    def _task(job):
+        result = batch_inspect(group_name,
+                               on_result=lambda name, entry: job.advance(event={"device": name, "entry": entry}),
+                               save_report=False)
+        if "error" in result:
+            raise ValueError(result["error"])
+        report_name = save_inspect_report(result, group_name)
+        logger.info(f"Web端执行巡检：{group_name}，结果已保存至 {report_name}")
+        return {"group_name": group_name, "result": result, "report_name": report_name}
+
+    return JOB_MANAGER.submit("inspect", ("inspect", group_name), _task,
+                              params={"group_name": group_name}, total=_group_size(group_name))
+
+
+@app.route('/jobs/inspect', methods=['POST'])
+def submit_inspect_job():
+    """提交巡检任务，返回任务ID；同一设备组巡检执行中时返回已有任务"""
+    group_name = request.form.get('group_name')
+    if not group_name:
+        return jsonify({"status": "error", "message": "请选择设备组"})
+    job, deduped = _submit_inspect_job(group_name)
+    return jsonify({"status": "success", "job_id": job.job_id, "deduped": deduped})
+
+
+def _sse(event, data, event_id=None):
+    """格式化一条Server-Sent Events消息，event_id供断线重连时从Last-Event-ID续传"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route('/jobs/<job_id>/stream')
+def job_stream(job_id):
+    """
+    订阅后台任务的流式结果（SSE），只读取已提交的任务（巡检任务由POST /jobs/inspect提交）
+    事件：start（任务信息）、device（单设备结果，完成即推送）、done（巡检任务附报告名）、error
+    断线重连时按Last-Event-ID从下一条事件继续推送，不会重复提交任务
+    """
+    job = JOB_MANAGER.get(job_id)
+    if not job:
+        return jsonify({"status": "error", "message": "任务不存在"}), 404
+    last_id = request.headers.get("Last-Event-ID", type=int)
+    start_index = last_id + 1 if last_id is not None else 0
+
+    def generate():
+        yield _sse("start", {"job_id": job.job_id, "kind": job.kind, "params": job.params, "total": job.total})
+        index = start_index
+        while True:
+            events, finished = job.wait_events(index)
+            for offset, event in enumerate(events):
+                yield _sse("device", event, event_id=index + offset)
+            index += len(events)
+            if finished and index >= len(job.events):
+                break
+            if not events:
+                # 心跳，避免代理断开空闲连接
+                yield ": keep-alive\n\n"
+        if job.status != "success":
+            yield _sse("error", {"message": job.error})
+        elif job.kind == "inspect" and not job.result.get("report_name"):
+            yield _sse("error", {"message": "巡检完成，但巡检报告保存失败"})
+        else:
+            yield _sse("done", {"report_name": job.result.get("report_name"), "total": index})
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route('/jobs/config', methods=['POST'])
+def submit_config_job():
+    """提交批量配置任务，返回任务ID；相同设备组、模板与参数的任务执行中时返回已有任务"""
+    group_name = request.form.get('group_name')
+    tpl_name = request.form.get('tpl_name')
+    tpl_params = request.form.get('tpl_params')
+    var_matrix = request.form.get('var_matrix') or None
+    diff = bool(request.form.get('diff'))
+    if not group_name or not tpl_name:
+        return jsonify({"status": "error", "message": "设备组和模板名不能为空"})
+    try:
+        import ast
+        tpl_kwargs = ast.literal_eval(tpl_params) if tpl_params else {}
+        if not isinstance(tpl_kwargs, dict):
+            raise ValueError("模板参数必须为字典")
+    except (ValueError, SyntaxError) as e:
+        return jsonify({"status": "error", "message": f"模板参数格式错误：{str(e)}"})
+
+    def _task(job):
+        result = batch_config(group_name, tpl_name, tpl_params=tpl_kwargs,
+                              rollout_options={"diff": True} if diff else None,
+                              on_result=lambda ip, ok, elapsed: job.advance(), var_matrix=var_matrix)
+        # 渲染失败、设备组无设备、发布中止等错误记为任务失败
+        if result["error"]:
+            # 保留部分结果（如中止前已下发的设备）供查询
+            job.result = result
+            raise ValueError(result["error"])
+        logger.info(f"Web端执行配置：{group_name}，模板{tpl_name}，参数{tpl_kwargs}，变量矩阵{var_matrix}")
+        return result
+
+    key = ("config", group_name, tpl_name, var_matrix, diff, json.dumps(tpl_kwargs, sort_keys=True, ensure_ascii=False))
+    job, deduped = JOB_MANAGER.submit("config", key, _task,
+                                      params={"group_name": group_name, "tpl_name": tpl_name, "tpl_kwargs": tpl_kwargs,
+                                              "var_matrix": var_matrix, "diff": diff},
+                                      total=_group_size(group_name))
+    return jsonify({"status": "success", "job_id": job.job_id, "deduped": deduped})
+
+
+@app.route('/jobs/backup', methods=['POST'])
+def submit_backup_job():
+    """提交配置备份任务：group_names为逗号分隔的设备组名，为空时备份全部设备组"""
+    group_names = [g.strip() for g in (request.form.get('group_names') or "").split(",") if g.strip()]
+    try:
+        total = len(backup_targets(group_names))
+    except KeyError as e:
+        return jsonify({"status": "error", "message": str(e.args[0])})
+
+    def _task(job):
+        result = batch_backup(group_names, on_result=lambda name, entry: job.advance(event={"device": name,
+                                                                                              "entry": entry}))
+        if result["error"]:
+            raise ValueError(result["error"])
+        logger.info(f"Web端执行配置备份：{group_names or '全部设备组'}")
+        return result
+
+    job, deduped = JOB_MANAGER.submit("backup", ("backup",) + tuple(sorted(group_names)), _task,
+                                      params={"group_names": group_names}, total=total)
+    return jsonify({"status": "success", "job_id": job.job_id, "deduped": deduped})
+
+
+@app.route('/api/backups')
+def backups_api():
+    """各设备当前备份版本：?group="""
+    return jsonify({"status": "success", "devices": CONFIG_STORE.heads(request.args.get('group') or None)})
+
+
+@app.route('/api/backups/<device_name>')
+def backup_history(device_name):
+    """设备配置变化历史（按时间倒序）"""
+    history = CONFIG_STORE.history(device_name)
+    if not history:
+        return jsonify({"status": "error", "message": "设备无备份记录"}), 404
+    return jsonify({"status": "success", "device_name": device_name, "history": history})
+
+
+@app.route('/api/backups/<device_name>/config')
+def backup_config(device_name):
+    """查看备份配置（口令、密钥、团体名已屏蔽）：?version=哈希前缀或历史序号（0为最新）"""
+    config = CONFIG_STORE.read(device_name, request.args.get('version'))
+    if config is None:
+        return jsonify({"status": "error", "message": "配置版本不存在"}), 404
+    return Response(mask_secrets(config), mimetype="text/plain; charset=utf-8")
+
+
+@app.route('/api/backups/<device_name>/diff')
+def backup_diff(device_name):
+    """对比两个配置版本（敏感值已屏蔽）：?old=1&new=0（哈希前缀或历史序号，默认上一版本与最新版本）"""
+    old, new = request.args.get('old', '1'), request.args.get('new', '0')
+    try:
+        diff = CONFIG_STORE.diff(device_name, old, new, mask=True)
+    except KeyError as e:
+        return jsonify({"status": "error", "message": str(e.args[0])}), 404
+    # 只有敏感值变化时diff为空，是否变化按版本哈希判断
+    changed = CONFIG_STORE.resolve(device_name, old) != CONFIG_STORE.resolve(device_name, new)
+    return jsonify({"status": "success", "device_name": device_name, "changed": changed, "diff": diff})
+
+
+@app.route('/jobs')
+def list_jobs():
+    """任务列表"""
+    return jsonify({"status": "success", "jobs": [job.to_dict() for job in JOB_MANAGER.list()]})
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """任务状态与进度"""
+    job = JOB_MANAGER.get(job_id)
+    if not job:
+        return jsonify({"status": "error", "message": "任务不存在"}), 404
+    return jsonify({"status": "success", "job": job.to_dict()})
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """任务结果（任务结束后可用）"""
+    job = JOB_MANAGER.get(job_id)
+    if not job:
+        return jsonify({"status": "error", "message": "任务不存在"}), 404
+    if job.status in ("queued", "running"):
+        return jsonify({"status": "pending", "job": job.to_dict()}), 202
+    return jsonify({"status": "success", "job": job.to_dict(with_result=True)})
+
+
+# 设备查询接口不返回的字段
+SECRET_FIELDS = ("username", "password", "secret")
+
+
+@app.route('/api/devices')
+def devices_api():
+    """设备清单查询（按索引）：?group=&ip=&name=&device_type=，devices.yaml修改后自动生效"""
+    devices = INVENTORY.find(group=request.args.get('group') or None,
+                             ip=request.args.get('ip') or None,
+                             name=request.args.get('name') or None,
+                             device_type=request.args.get('device_type') or None)
+    return jsonify({"status": "success", "total": len(devices),
+                    "devices": [dict({k: v for k, v in device.items() if k not in SECRET_FIELDS}, group=group_name)
+                                for group_name, device in devices]})
+
+
+@app.route('/api/session_pool')
+def session_pool_status():
+    """SSH会话池状态（巡检/配置路由通过batch_inspect、batch_config借用池内会话）"""
+    return jsonify({"status": "success", "pool": SESSION_POOL.stats()})
+
+
+@app.route('/api/circuits')
+def circuit_status():
+    """设备连接熔断状态：?state=open 只看熔断中的设备"""
+    circuits = RESILIENCE.snapshot()
+    state = request.args.get('state')
+    if state:
+        circuits = {key: value for key, value in circuits.items() if value["state"] == state}
+    return jsonify({"status": "success", "circuits": circuits})
+
+
+@app.route('/api/circuits/reset', methods=['POST'])
+@admin_required
+def circuit_reset():
+    """手动恢复熔断设备（如修正账号密码后）：ip、port为空时恢复全部"""
+    ip = request.form.get('ip')
+    port = request.form.get('port', 22, type=int)
+    RESILIENCE.reset({"ip": ip, "port": port} if ip else None)
+    logger.info(f"熔断状态已手动恢复：{f'{ip}:{port}' if ip else '全部设备'}，来源 {request.remote_addr}")
+    return jsonify({"status": "success"})
+
+
+def _metric_args():
+    """解析指标查询参数，时间为Unix秒，默认最近7天"""
+    metric = request.args.get('metric', 'cpu_usage')
+    if metric not in METRICS:
+        raise ValueError(f"不支持的指标：{metric}（可选：{list(METRICS)}）")
+    end = request.args.get('end', type=int) or int(datetime.now().timestamp())
+    start = request.args.get('start', type=int) or end - 7 * 86400
+    return metric, start, end
+
+
+@app.route('/api/metrics/range')
+def metrics_range():
+    """指标时间序列：?metric=cpu_usage&device=&group=&start=&end=&step=3600"""
+    try:
+        metric, start, end = _metric_args()
+        series = METRIC_STORE.query_range(metric,
+                                          device=request.args.get('device'),
+                                          group=request.args.get('group'),
+                                          start=start, end=end,
+                                          step=request.args.get('step', type=int))
+        return jsonify({"status": "success", "metric": metric, "start": start, "end": end,
+                        "columns": ["ts", "avg", "max"], "series": series})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+
+@app.route('/api/metrics/top')
+def metrics_top():
+    """指标Top-N设备：?metric=cpu_usage&n=10&group=&start=&end=&agg=avg"""
+    try:
+        metric, start, end = _metric_args()
+        top = METRIC_STORE.top_n(metric,
+                                 n=request.args.get('n', 10, type=int),
+                                 group=request.args.get('group'),
+                                 start=start, end=end,
+                                 agg=request.args.get('agg', 'avg'))
+        return jsonify({"status": "success", "metric": metric, "start": start, "end": end, "top": top})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+
+# 会话池与熔断状态指标（抓取时刷新）
+SESSION_POOL_GAUGE = REGISTRY.gauge("netauto_session_pool_sessions", "会话池会话数", ("state",))
+CIRCUIT_GAUGE = REGISTRY.gauge("netauto_connect_circuits", "各熔断状态的设备数", ("state",))
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus抓取接口：连接/命令/解析/配置下发/报告写入耗时直方图与计数"""
+    pool_stats = SESSION_POOL.stats()
+    SESSION_POOL_GAUGE.set(pool_stats["sessions"], state="total")
+    SESSION_POOL_GAUGE.set(pool_stats["busy"], state="busy")
+    states = [value["state"] for value in RESILIENCE.snapshot().values()]
+    for state in (CLOSED, OPEN, HALF_OPEN):
+        CIRCUIT_GAUGE.set(states.count(state), state=state)
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
 #错误处理
 @app.errorhandler(404)
 def page_not_found(e):
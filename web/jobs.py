@@ -0,0 +1,155 @@
+#后台任务模块：Web端巡检/配置任务异步执行，提供任务状态、进度与结果查询
+
+import os
+import sys
+import time
+import uuid
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config_read import SETTINGS
+from log.log_record import logger, log_context
+
+# 后台任务配置：并发任务数、已结束任务保留时长（秒）
+WEB_SETTINGS = SETTINGS.get("web", {}) or {}
+JOB_WORKERS = WEB_SETTINGS.get("job_workers", 4)
+JOB_RETENTION = WEB_SETTINGS.get("job_retention", 3600)
+
+
+class Job:
+    """后台任务"""
+
+    def __init__(self, kind, key, params, total=0):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.params = params
+        self.status = "queued"      # queued / running / success / failed
+        self.done = 0
+        self.total = total
+        self.result = None
+        self.error = ""
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        # 单设备结果事件，供流式接口按序读取
+        self.events = []
+        self._cond = threading.Condition()
+
+    def advance(self, step=1, event=None):
+        """推进进度，可附带单设备结果事件（多个巡检线程并发调用）"""
+        with self._cond:
+            self.done += step
+            if event is not None:
+                self.events.append(event)
+            self._cond.notify_all()
+
+    def finish(self):
+        """标记任务结束并唤醒等待事件的读取方"""
+        with self._cond:
+            self.finished = time.time()
+            self._cond.notify_all()
+
+    def wait_events(self, index, timeout=15):
+        """
+        等待index之后的新事件
+        :return: (新事件列表, 任务是否已结束)
+        """
+        with self._cond:
+            if len(self.events) <= index and not self.finished:
+                self._cond.wait(timeout)
+            return self.events[index:], self.finished is not None
+
+    def to_dict(self, with_result=False):
+        data = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "error": self.error,
+            "created": datetime.fromtimestamp(self.created).strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed": round((self.finished or time.time()) - (self.started or time.time()), 3)
+        }
+        if with_result:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """
+    后台任务管理
+    - 线程池执行任务，并发数受job_workers限制
+    - 同一任务键（如同一设备组巡检）在执行中时重复提交直接返回已有任务
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, retention=JOB_RETENTION):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.retention = retention
+        self._jobs = {}        # {job_id: Job}
+        self._inflight = {}    # {key: job_id}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, key, func, params=None, total=0):
+        """
+        提交任务
+        :param kind: 任务类型（inspect/config/backup）
+        :param key: 去重键，执行中的相同键任务不重复提交
+        :param func: 任务函数 func(job) -> result，可调用job.advance()上报进度
+        :return: (job, 是否复用已有任务)
+        """
+        with self._lock:
+            self._cleanup()
+            job_id = self._inflight.get(key)
+            if job_id and job_id in self._jobs:
+                return self._jobs[job_id], True
+            job = Job(kind, key, params or {}, total)
+            self._jobs[job.job_id] = job
+            self._inflight[key] = job.job_id
+        self.executor.submit(self._run, job, func)
+        logger.info(f"后台任务已提交：{kind} {job.job_id} 参数{params}")
+        return job, False
+
+    def _run(self, job, func):
+        job.status = "running"
+        job.started = time.time()
+        try:
+            # 任务内的日志带上任务ID
+            with log_context(job=job.job_id):
+                job.result = func(job)
+            job.status = "success"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"后台任务 {job.job_id} 执行失败：{str(e)}", exc_info=True)
+        finally:
+            job.finish()
+            with self._lock:
+                if self._inflight.get(job.key) == job.job_id:
+                    del self._inflight[job.key]
+            logger.info(f"后台任务 {job.job_id} 结束：{job.status}，耗时{round(job.finished - job.started, 3)}s")
+
+    def _cleanup(self):
+        """清理超过保留时长的已结束任务（调用方持有锁）"""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and now - job.finished > self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        """任务列表，按提交时间倒序"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda j: j.created, reverse=True)
+
+
+# 全局任务管理实例
+JOB_MANAGER = JobManager()
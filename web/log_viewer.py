@@ -0,0 +1,161 @@
+#日志查看模块：从文件末尾反向读取，支持向前翻页、级别/设备/关键字过滤与实时跟踪，避免整文件读入内存
+
+import os
+import re
+import time
+
+# 反向读取块大小
+BLOCK_SIZE = 64 * 1024
+# 单次查询最多扫描的字节数，过滤条件命中稀少时分批返回，避免一次扫描整个大文件
+MAX_SCAN_BYTES = 32 * 1024 * 1024
+# 每条日志的起始行（以时间戳开头），其余行（如异常堆栈）归属上一条日志
+RECORD_START = re.compile(rb"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+LEVEL_PATTERN = re.compile(r" - (DEBUG|INFO|WARNING|ERROR|CRITICAL)[ :]")
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+
+def list_log_files(log_dir):
+    """日志目录下的日志文件（含按日期轮转的历史文件）"""
+    if not os.path.exists(log_dir):
+        return []
+    return sorted(f for f in os.listdir(log_dir) if ".log" in f and os.path.isfile(os.path.join(log_dir, f)))
+
+
+def resolve_log(log_dir, log_file):
+    """
+    校验日志文件名，防止路径穿越
+    :return: 日志文件绝对路径，不存在时返回None
+    """
+    log_file = os.path.basename(log_file or "")
+    if log_file not in list_log_files(log_dir):
+        return None
+    return os.path.join(log_dir, log_file)
+
+
+def _reverse_lines(path, end=None, block_size=BLOCK_SIZE):
+    """
+    从end偏移量开始反向逐行读取
+    :return: 生成器 (行起始偏移量, 行内容bytes)
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell() if end is None else min(end, f.tell())
+        tail = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size) + tail
+            lines = chunk.split(b"\n")
+            # 第一段可能是不完整的行，留到下一块拼接
+            tail = lines.pop(0)
+            offset = position + len(chunk)
+            for line in reversed(lines):
+                offset -= len(line) + 1
+                yield offset + 1, line
+        if tail:
+            yield 0, tail
+
+
+def _reverse_records(path, end=None):
+    """
+    反向逐条读取日志，续行（异常堆栈等）合并到所属日志
+    :return: 生成器 (日志起始偏移量, 日志文本)
+    """
+    pending = []
+    for offset, line in _reverse_lines(path, end):
+        line = line.rstrip(b"\r")
+        if not line and not pending:
+            continue
+        pending.append(line)
+        if RECORD_START.match(line):
+            yield offset, b"\n".join(reversed(pending)).decode("utf-8", "replace")
+            pending = []
+    if pending:
+        yield 0, b"\n".join(reversed(pending)).decode("utf-8", "replace")
+
+
+def record_level(record):
+    match = LEVEL_PATTERN.search(record)
+    return match.group(1) if match else None
+
+
+def match_record(record, level=None, device=None, keyword=None):
+    """
+    日志过滤
+    :param level: 最低级别，如WARNING时同时包含ERROR/CRITICAL
+    :param device: 设备名或IP
+    :param keyword: 关键字（不区分大小写）
+    """
+    if level:
+        record_lvl = record_level(record)
+        if record_lvl is None or LEVELS[record_lvl] < LEVELS.get(level.upper(), 0):
+            return False
+    if device and device not in record:
+        return False
+    if keyword and keyword.lower() not in record.lower():
+        return False
+    return True
+
+
+def read_page(path, before=None, limit=100, level=None, device=None, keyword=None, max_scan=MAX_SCAN_BYTES):
+    """
+    按时间倒序分页读取日志
+    :param before: 翻页游标（字节偏移量），为None时从文件末尾开始
+    :param limit: 每页条数
+    :param max_scan: 本次最多扫描的字节数，达到上限时返回游标供继续翻页
+    :return: {"records": [按时间正序], "cursor": 下一页游标（已到文件开头时为None）, "size": 文件大小}
+    """
+    size = os.path.getsize(path)
+    start = size if before is None else min(int(before), size)
+    records, cursor = [], None
+    for offset, record in _reverse_records(path, start):
+        cursor = offset
+        if match_record(record, level, device, keyword):
+            records.append(record)
+            if len(records) >= limit:
+                break
+        if start - offset >= max_scan:
+            break
+    else:
+        # 已读到文件开头
+        cursor = None
+    records.reverse()
+    return {"records": records, "cursor": cursor or None, "size": size}
+
+
+def follow(path, offset=None, level=None, device=None, keyword=None, interval=1.0, heartbeat=15.0):
+    """
+    实时跟踪日志新增内容（类似tail -f），文件被轮转或截断后从头读取
+    :param offset: 起始偏移量，为None时从当前文件末尾开始
+    :return: 生成器，有新日志时产出日志文本，空闲超过heartbeat秒时产出None（供调用方发送心跳）
+    """
+    offset = os.path.getsize(path) if offset is None else offset
+    inode = os.stat(path).st_ino
+    buffer, idle = b"", 0.0
+    while True:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        if stat is not None and (stat.st_ino != inode or stat.st_size < offset):
+            inode, offset, buffer = stat.st_ino, 0, b""
+        data = b""
+        if stat is not None and stat.st_size > offset:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read(stat.st_size - offset)
+            offset += len(data)
+        if data:
+            buffer += data
+            end = buffer.rfind(b"\n") + 1
+            lines, buffer = buffer[:end], buffer[end:]
+            for line in lines.decode("utf-8", "replace").splitlines():
+                if line and match_record(line, level, device, keyword):
+                    idle = 0.0
+                    yield line
+        time.sleep(interval)
+        idle += interval
+        if idle >= heartbeat:
+            idle = 0.0
+            yield None